@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'betondekor.settings')
+# Servindo por ASGI, as páginas públicas usam as views assíncronas (core/views_async.py)
+os.environ.setdefault('DJANGO_ASYNC_VIEWS', '1')
+# Sem conexões persistentes por padrão (ver CONN_MAX_AGE em settings.py)
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
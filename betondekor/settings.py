@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -81,6 +83,13 @@ MIDDLEWARE = [
     'django_htmx.middleware.HtmxMiddleware',
 ]
 
+# Contagem de queries por request e aviso de N+1 / orçamento estourado (core/query_budget.py).
+# Ligado por padrão em DEBUG; QUERY_BUDGET_STRICT=1 transforma orçamento estourado em erro.
+QUERY_BUDGET = os.getenv('QUERY_BUDGET', '1' if DEBUG else '0') == '1'
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', '0') == '1'
+if QUERY_BUDGET:
+    MIDDLEWARE.insert(0, 'core.query_budget.OrcamentoQueriesMiddleware')
+
 ROOT_URLCONF = 'betondekor.urls'
 
 TEMPLATES = [
@@ -93,19 +102,36 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.base_template',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'betondekor.wsgi.application'
+ASGI_APPLICATION = 'betondekor.asgi.application'
+
+# Views públicas assíncronas (core/views_async.py). Ligado automaticamente por
+# betondekor/asgi.py; sob WSGI as views síncronas continuam sendo usadas.
+ASYNC_VIEWS = os.getenv('DJANGO_ASYNC_VIEWS', '0') == '1'
+# Processo servido por betondekor/asgi.py (uvicorn)
+SERVIDOR_ASGI = os.getenv('DJANGO_ASGI', '0') == '1'
 
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-# Use PostgreSQL if environment variables are set, otherwise use SQLite for development
-if os.getenv('DB_HOST'):
+# DB_ENGINE escolhe o perfil do banco; sem ele, PostgreSQL se DB_HOST estiver definido, senão SQLite.
+#   postgres       uma conexão persistente por worker (CONN_MAX_AGE), revalidada antes de cada request
+#                  (sob ASGI o padrão é 0: cada request roda em outra thread e as conexões persistentes
+#                  vazariam; para reaproveitar conexões ali use postgres-pool)
+#   postgres-pool  pool de conexões do psycopg 3 por processo (DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE)
+#   sqlite         arquivo local com WAL, synchronous=NORMAL, mmap e busy_timeout aplicados ao conectar
+# As estatísticas das conexões de cada worker ficam em /admin/banco/estatisticas/.
+DB_ENGINE = os.getenv('DB_ENGINE') or ('postgres' if os.getenv('DB_HOST') else 'sqlite')
+CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '0' if SERVIDOR_ASGI else '60'))
+
+if DB_ENGINE in ('postgres', 'postgres-pool'):
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.postgresql',
@@ -114,16 +140,75 @@ if os.getenv('DB_HOST'):
             'PASSWORD': os.getenv('DB_PASSWORD', 'betondekor_password'),
             'HOST': os.getenv('DB_HOST', 'localhost'),
             'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5'))},
         }
     }
-else:
+    if DB_ENGINE == 'postgres-pool':
+        from psycopg_pool import ConnectionPool
+
+        # Com pool o Django devolve a conexão ao pool no fim do request (CONN_MAX_AGE precisa ser 0)
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+            # Segundos esperando uma conexão livre antes de falhar o request
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+            # Testa a conexão ao emprestá-la (o servidor pode ter derrubado conexões ociosas)
+            'check': ConnectionPool.check_connection,
+        }
+elif DB_ENGINE == 'sqlite':
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'OPTIONS': {
+                # WAL: leitores não bloqueiam o escritor; NORMAL é seguro com WAL e evita um fsync por commit
+                'init_command': ';'.join([
+                    'PRAGMA journal_mode=WAL',
+                    'PRAGMA synchronous=NORMAL',
+                    f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024)))}",
+                    f"PRAGMA busy_timeout={int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))}",
+                    'PRAGMA temp_store=MEMORY',
+                ]),
+                # Pega o lock de escrita no BEGIN: evita "database is locked" ao promover leitura em escrita
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'DB_ENGINE inválido: {DB_ENGINE!r} (use postgres, postgres-pool ou sqlite)')
+
+
+# Cache
+# Com REDIS_URL o cache (e a invalidação das páginas) é compartilhado entre todos os workers.
+# Sem ele, cada processo mantém seu próprio cache em memória e PAGE_CACHE_TIMEOUT limita
+# por quanto tempo um worker que não recebeu a edição pode servir a página antiga.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'betondekor',
         }
     }
 
+# Tempo (segundos) que uma página pública fica em cache; edições no catálogo invalidam antes disso
+PAGE_CACHE_TIMEOUT = int(os.getenv('PAGE_CACHE_TIMEOUT', '300'))
+# Entra no ETag das páginas públicas (core.cache.resposta_condicional): troque a cada deploy
+# que altere templates, senão os navegadores continuam usando o HTML antigo (304)
+VERSAO_DEPLOY = os.getenv('VERSAO_DEPLOY', '')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -165,8 +250,12 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# WhiteNoise settings - using simpler storage to avoid manifest issues
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+# Nomes com hash do conteúdo + .gz/.br (core/storage.py); o WhiteNoise serve os arquivos com hash
+# com Cache-Control immutable. Os pacotes de CSS/JS vêm do `build_assets` (core/assets.py).
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.storage.ArmazenamentoEstatico'},
+}
 
 # Cloudinary settings
 import cloudinary
@@ -1,7 +1,76 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 from django import forms
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Case, F, QuerySet, When
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.safestring import mark_safe
-from .models import Produto, CategoriaPrincipal, Subcategoria, MensagemContato
+from .cache import invalidar_paginas
+from .models import Produto, CategoriaPrincipal, Subcategoria, MensagemContato, EmailPendente
+
+# Acima disso, listas sem filtro usam a estimativa do banco em vez de COUNT(*)
+LIMITE_CONTAGEM_EXATA = 10000
+
+
+def contagem_estimada(model, using='default'):
+    """Total de linhas segundo as estatísticas do banco (ou `None` se não houver).
+
+    PostgreSQL: `pg_class.reltuples` (mantido pelo autovacuum/ANALYZE).
+    SQLite: `sqlite_stat1`, preenchida pelo `ANALYZE`/`PRAGMA optimize`.
+    """
+    connection = connections[using]
+    tabela = model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql, params = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [tabela]
+    elif connection.vendor == 'sqlite':
+        # A primeira posição de `stat` é o número de linhas; índices parciais têm menos, daí o MAX
+        sql = "SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s"
+        params = [tabela]
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            linha = cursor.fetchone()
+    except DatabaseError:
+        # sqlite_stat1 só existe depois do primeiro ANALYZE
+        return None
+    return linha[0] if linha and linha[0] is not None and linha[0] >= 0 else None
+
+
+class ContagemEstimadaPaginator(Paginator):
+    """Paginator do admin que troca o COUNT(*) da lista sem filtros pela estimativa do banco.
+
+    Só vale para tabelas grandes (`LIMITE_CONTAGEM_EXATA`); com filtro, busca ou
+    sem estatísticas a contagem continua exata.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimativa = contagem_estimada(queryset.model, queryset.db)
+            if estimativa is not None and estimativa > LIMITE_CONTAGEM_EXATA:
+                return estimativa
+        return super().count
+
+
+@admin.action(description='Ativar selecionados')
+def ativar(modeladmin, request, queryset):
+    total = queryset.update(ativo=True, updated_at=timezone.now())
+    # update() não dispara post_save: invalida as páginas em cache explicitamente
+    invalidar_paginas()
+    modeladmin.message_user(request, f'{total} registro(s) ativado(s).')
+
+
+@admin.action(description='Desativar selecionados')
+def desativar(modeladmin, request, queryset):
+    total = queryset.update(ativo=False, updated_at=timezone.now())
+    invalidar_paginas()
+    modeladmin.message_user(request, f'{total} registro(s) desativado(s).')
 
 
 class ImageWithAddWidget(forms.ClearableFileInput):
@@ -59,19 +128,71 @@ class CategoriaPrincipalAdmin(admin.ModelAdmin):
     ordering = ['ordem', 'nome']
     inlines = [SubcategoriaInline]
 
+class SubcategoriaListFilter(admin.RelatedFieldListFilter):
+    """Filtro por subcategoria sem uma query por opção (o __str__ da Subcategoria usa a categoria principal)."""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin) or Subcategoria._meta.ordering
+        subcategorias = Subcategoria.objects.select_related('categoria_principal').order_by(*ordering)
+        return [(subcategoria.pk, str(subcategoria)) for subcategoria in subcategorias]
+
 @admin.register(Subcategoria)
 class SubcategoriaAdmin(admin.ModelAdmin):
     list_display = ['nome', 'categoria_principal', 'ordem', 'ativo', 'created_at']
+    list_select_related = ['categoria_principal']
     list_filter = ['ativo', 'categoria_principal']
     search_fields = ['nome', 'categoria_principal__nome']
     ordering = ['categoria_principal__ordem', 'ordem', 'nome']
+    autocomplete_fields = ['categoria_principal']
+    actions = [ativar, desativar]
+    paginator = ContagemEstimadaPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # O autocomplete de Produto.subcategoria exibe Subcategoria.__str__, que lê a categoria principal
+        return super().get_queryset(request).select_related('categoria_principal')
+
+class ProdutoActionForm(ActionForm):
+    """Formulário de ações do changelist de produtos com o destino de "Mover para a categoria"."""
+    categoria_principal = forms.ModelChoiceField(
+        queryset=CategoriaPrincipal.objects.order_by('ordem', 'nome'), required=False, label='Categoria'
+    )
 
 @admin.register(Produto)
 class ProdutoAdmin(admin.ModelAdmin):
     list_display = ['nome', 'categoria_principal', 'subcategoria', 'categoria', 'ativo', 'ordem', 'created_at']
-    list_filter = ['ativo', 'categoria_principal', 'subcategoria', 'categoria']
-    search_fields = ['nome', 'categoria', 'categoria_principal', 'descricao']
+    list_filter = ['ativo', 'categoria_principal', ('subcategoria', SubcategoriaListFilter), 'categoria']
+    # A coluna subcategoria usa Subcategoria.__str__, que lê a categoria principal
+    list_select_related = ['categoria_principal', 'subcategoria__categoria_principal']
+    # Campos curtos: no PostgreSQL nome e categoria têm índices trigram (migração 0013)
+    search_fields = ['nome', 'categoria', '=slug', 'categoria_principal__nome']
     ordering = ['ordem', 'nome']
+    autocomplete_fields = ['categoria_principal', 'subcategoria']
+    actions = [ativar, desativar, 'mover_para_categoria']
+    action_form = ProdutoActionForm
+    paginator = ContagemEstimadaPaginator
+    show_full_result_count = False
+
+    @admin.action(description='Mover para a categoria escolhida')
+    def mover_para_categoria(self, request, queryset):
+        try:
+            categoria = self.action_form.base_fields['categoria_principal'].clean(request.POST.get('categoria_principal'))
+        except ValidationError:
+            categoria = None
+        if categoria is None:
+            self.message_user(request, 'Escolha a categoria de destino.', messages.ERROR)
+            return
+        # Um único UPDATE: a subcategoria só é mantida se já pertencer à nova categoria
+        total = queryset.update(
+            categoria_principal=categoria,
+            subcategoria=Case(
+                When(subcategoria__in=Subcategoria.objects.filter(categoria_principal=categoria), then=F('subcategoria')),
+                default=None,
+            ),
+            updated_at=timezone.now(),
+        )
+        invalidar_paginas()
+        self.message_user(request, f'{total} produto(s) movido(s) para {categoria.nome}.')
     
     # Use a custom ModelForm to inject a permanent + button beside the main image field
     class ProdutoAdminForm(forms.ModelForm):
@@ -117,6 +238,19 @@ class MensagemContatoAdmin(admin.ModelAdmin):
     search_fields = ['nome', 'email', 'mensagem']
     readonly_fields = ['nome', 'email', 'mensagem', 'created_at']
     ordering = ['-created_at']
+    actions = ['marcar_como_lida', 'marcar_como_nao_lida']
+    paginator = ContagemEstimadaPaginator
+    show_full_result_count = False
+
+    @admin.action(description='Marcar como lidas')
+    def marcar_como_lida(self, request, queryset):
+        total = queryset.update(lida=True)
+        self.message_user(request, f'{total} mensagem(ns) marcada(s) como lida(s).')
+
+    @admin.action(description='Marcar como não lidas')
+    def marcar_como_nao_lida(self, request, queryset):
+        total = queryset.update(lida=False)
+        self.message_user(request, f'{total} mensagem(ns) marcada(s) como não lida(s).')
     
     fieldsets = (
         ('Informações do Contato', {
@@ -129,3 +263,20 @@ class MensagemContatoAdmin(admin.ModelAdmin):
             'fields': ('lida',)
         }),
     )
+
+@admin.register(EmailPendente)
+class EmailPendenteAdmin(admin.ModelAdmin):
+    list_display = ['assunto', 'status', 'tentativas', 'proxima_tentativa', 'enviado_em', 'created_at']
+    list_filter = ['status']
+    search_fields = ['assunto', 'ultimo_erro']
+    readonly_fields = ['mensagem_contato', 'assunto', 'corpo', 'remetente', 'destinatarios',
+                       'tentativas', 'ultimo_erro', 'created_at', 'enviado_em']
+    ordering = ['-created_at']
+    actions = ['reenfileirar']
+
+    @admin.action(description='Reenfileirar e-mails selecionados')
+    def reenfileirar(self, request, queryset):
+        total = queryset.exclude(status=EmailPendente.STATUS_ENVIADO).update(
+            status=EmailPendente.STATUS_PENDENTE, tentativas=0, proxima_tentativa=timezone.now()
+        )
+        self.message_user(request, f'{total} e-mail(s) reenfileirado(s).')
@@ -0,0 +1,51 @@
+"""Pacotes de CSS/JS: arquivos de static/ concatenados e minificados em static/bundles/.
+
+Gerados pelo comando `build_assets` e referenciados pela tag `{% bundle %}`,
+que aponta para o pacote quando ele já foi gerado e, antes disso ou em DEBUG,
+para os arquivos de origem um a um. No collectstatic o armazenamento
+(`core.storage`) acrescenta o hash do conteúdo ao nome e grava as versões
+.gz e .br; o WhiteNoise serve esses nomes com `Cache-Control: immutable`.
+"""
+import json
+
+from django.conf import settings
+
+DIRETORIO_ORIGEM = settings.BASE_DIR / 'static'
+DIRETORIO_PACOTES = DIRETORIO_ORIGEM / 'bundles'
+# Caminho dos pacotes relativo ao STATIC_URL (mesma profundidade de css/ e js/, então os url() relativos continuam valendo)
+PREFIXO_STATIC = 'bundles'
+MANIFESTO = DIRETORIO_PACOTES / 'manifest.json'
+
+# Nome do pacote -> arquivos de origem (relativos a static/), na ordem de concatenação
+PACOTES = {
+    'site.css': ('css/style.css',),
+    'produtos.css': ('css/produtos.css',),
+    'produto-detalhe.css': ('css/produto-detalhe.css',),
+    'site.js': ('js/site.js',),
+    'home.js': ('js/home.js',),
+    'produtos.js': ('js/products-page.js', 'js/produtos.js'),
+    'produto-detalhe.js': ('js/produto-detalhe.js',),
+}
+
+_cache = {'mtime': None, 'manifesto': {}}
+
+
+def carregar_manifesto():
+    """Lê o manifesto, relendo o arquivo só quando ele muda (mtime)."""
+    try:
+        mtime = MANIFESTO.stat().st_mtime
+    except OSError:
+        return {}
+    if _cache['mtime'] != mtime:
+        with open(MANIFESTO, encoding='utf-8') as f:
+            _cache['manifesto'] = json.load(f)
+        _cache['mtime'] = mtime
+    return _cache['manifesto']
+
+
+def caminhos_do_pacote(nome):
+    """Caminhos (relativos ao STATIC_URL) a incluir na página para o pacote `nome`."""
+    fontes = PACOTES[nome]
+    if settings.DEBUG or nome not in carregar_manifesto():
+        return list(fontes)
+    return [f'{PREFIXO_STATIC}/{nome}']
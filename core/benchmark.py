@@ -0,0 +1,140 @@
+"""Benchmark em processo das páginas do site.
+
+Cada cenário (página pública, POST do contato, listas do painel) é
+disparado por N clientes concorrentes (threads com `django.test.Client`,
+cada uma com a sua conexão). Por request são medidos a latência, as queries
+(via `RegistroQueries`) e os bytes da resposta; por cenário, p50/p95/p99,
+requisições/s e as médias de queries e bytes.
+
+`comparar()` confronta o resultado com um baseline JSON salvo antes e lista
+as regressões: latência p95 acima da tolerância ou mais queries/bytes por
+request do que no baseline.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from .query_budget import RegistroQueries
+
+# login: o cenário usa um cliente autenticado como o usuário do benchmark
+Cenario = namedtuple('Cenario', ['nome', 'metodo', 'caminho', 'dados', 'login'])
+
+USUARIO_BENCHMARK = 'benchmark'
+# Folga aceita antes de acusar regressão de latência / bytes (0.2 = 20%)
+TOLERANCIA = 0.2
+
+
+def percentil(valores, p):
+    """Percentil por vizinho mais próximo de uma lista já ordenada."""
+    if not valores:
+        return 0.0
+    indice = min(len(valores) - 1, max(0, round(p / 100 * len(valores)) - 1))
+    return valores[indice]
+
+
+def cenarios_padrao(slug_produto):
+    return [
+        Cenario('home', 'GET', reverse('home'), None, False),
+        Cenario('produtos', 'GET', reverse('produtos'), None, False),
+        Cenario('produto_detalhe', 'GET', reverse('produto-detalhe', kwargs={'slug': slug_produto}), None, False),
+        Cenario('contato', 'POST', reverse('contato'),
+                {'nome': 'Benchmark', 'email': 'benchmark@example.com', 'mensagem': 'Mensagem de teste'}, False),
+        Cenario('admin_produtos', 'GET', reverse('admin-produtos'), None, True),
+        Cenario('admin_destaques', 'GET', reverse('admin-destaques'), None, True),
+        Cenario('django_admin_produtos', 'GET', reverse('admin:core_produto_changelist'), None, True),
+    ]
+
+
+def _cliente(cenario, usuario):
+    cliente = Client()
+    if cenario.login:
+        cliente.force_login(usuario)
+    return cliente
+
+
+def _requisitar(cliente, cenario):
+    inicio = time.perf_counter()
+    with RegistroQueries() as registro:
+        if cenario.metodo == 'POST':
+            response = cliente.post(cenario.caminho, cenario.dados)
+        else:
+            response = cliente.get(cenario.caminho)
+    latencia = (time.perf_counter() - inicio) * 1000
+    tamanho = len(b''.join(response)) if response.streaming else len(response.content)
+    return latencia, registro.total, tamanho, response.status_code
+
+
+def medir_cenario(cenario, usuario, requisicoes, concorrencia, aquecimento=1):
+    """Dispara `requisicoes` requests do `cenario` divididas entre `concorrencia` clientes.
+
+    Com `concorrencia=1` tudo roda na thread atual (e na conexão atual do banco).
+    """
+    amostras = []
+    erros = []
+    trava = threading.Lock()
+
+    def trabalhador(quantidade, isolado):
+        try:
+            cliente = _cliente(cenario, usuario)
+            for _ in range(aquecimento):
+                _requisitar(cliente, cenario)
+            minhas = [_requisitar(cliente, cenario) for _ in range(quantidade)]
+            with trava:
+                amostras.extend(minhas)
+        except Exception as e:
+            with trava:
+                erros.append(e)
+        finally:
+            if isolado:
+                connections.close_all()
+
+    concorrencia = max(1, min(concorrencia, requisicoes))
+    cotas = [requisicoes // concorrencia + (1 if n < requisicoes % concorrencia else 0) for n in range(concorrencia)]
+    inicio = time.perf_counter()
+    if concorrencia == 1:
+        trabalhador(cotas[0], isolado=False)
+    else:
+        threads = [threading.Thread(target=trabalhador, args=(cota, True)) for cota in cotas]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    segundos = time.perf_counter() - inicio
+    if erros:
+        raise erros[0]
+
+    latencias = sorted(amostra[0] for amostra in amostras)
+    total = len(amostras) or 1
+    return {
+        'requisicoes': len(amostras),
+        'req_s': len(amostras) / segundos if segundos else 0.0,
+        'p50_ms': percentil(latencias, 50),
+        'p95_ms': percentil(latencias, 95),
+        'p99_ms': percentil(latencias, 99),
+        'queries': sum(amostra[1] for amostra in amostras) / total,
+        'bytes': sum(amostra[2] for amostra in amostras) / total,
+        'erros_http': sum(1 for amostra in amostras if amostra[3] >= 400),
+    }
+
+
+def comparar(atual, baseline, tolerancia=TOLERANCIA):
+    """Lista de regressões (texto) de `atual` em relação a `baseline` (dicts cenário -> métricas)."""
+    regressoes = []
+    for nome, metricas in atual.items():
+        referencia = baseline.get(nome)
+        if not referencia:
+            continue
+        if metricas['p95_ms'] > referencia['p95_ms'] * (1 + tolerancia):
+            regressoes.append(f"{nome}: p95 {metricas['p95_ms']:.1f}ms (baseline {referencia['p95_ms']:.1f}ms)")
+        # Queries por request são determinísticas: qualquer aumento é regressão
+        if metricas['queries'] > referencia['queries'] + 1e-9:
+            regressoes.append(f"{nome}: {metricas['queries']:.1f} queries/request (baseline {referencia['queries']:.1f})")
+        if metricas['bytes'] > referencia['bytes'] * (1 + tolerancia):
+            regressoes.append(f"{nome}: {metricas['bytes']:.0f} bytes (baseline {referencia['bytes']:.0f})")
+        if metricas['erros_http'] > referencia.get('erros_http', 0):
+            regressoes.append(f"{nome}: {metricas['erros_http']} resposta(s) com erro HTTP")
+    return regressoes
@@ -0,0 +1,265 @@
+"""Cache de página inteira para as páginas públicas do catálogo.
+
+As entradas são indexadas por uma versão global guardada no próprio cache.
+Qualquer save/delete de Produto, CategoriaPrincipal, Subcategoria ou Destaque
+troca essa versão (ver `core.signals`), o que invalida todas as páginas de uma
+vez sem precisar enumerar chaves.
+
+`resposta_condicional` responde GET condicional (ETag/Last-Modified -> 304)
+a partir do estado das tabelas de que a página depende, sem renderizar nada.
+"""
+import hashlib
+import re
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Max, Value
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+VERSAO_KEY = 'pagina:versao'
+
+# O formulário de contato (base.html) carrega um token CSRF mascarado por requisição.
+# Ele é trocado por um marcador antes de guardar e regenerado a cada resposta servida.
+CSRF_INPUT_RE = re.compile(rb'(name="csrfmiddlewaretoken" value=")[^"]*(")')
+CSRF_PLACEHOLDER = b'__CSRF_TOKEN__'
+
+# Cabeçalhos que mudam o HTML de uma mesma URL (fragmento HTMX x página completa)
+VARY_HTMX = ('HX-Request', 'HX-History-Restore-Request')
+
+
+def versao_atual():
+    versao = cache.get(VERSAO_KEY)
+    if versao is None:
+        cache.add(VERSAO_KEY, uuid.uuid4().hex, None)
+        versao = cache.get(VERSAO_KEY)
+    return versao
+
+
+def invalidar_paginas():
+    """Invalida todas as páginas em cache trocando a versão global."""
+    cache.set(VERSAO_KEY, uuid.uuid4().hex, None)
+
+
+def modo_htmx(request):
+    """'full' (acesso direto), 'htmx' (fragmento) ou 'historico' (restauração do histórico, página completa)."""
+    if not request.htmx:
+        return 'full'
+    return 'historico' if request.htmx.history_restore_request else 'htmx'
+
+
+def chave_pagina(request, versao=None):
+    modo = modo_htmx(request)
+    caminho = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+    return f'pagina:{versao or versao_atual()}:{modo}:{caminho}'
+
+
+async def aversao_atual():
+    versao = await cache.aget(VERSAO_KEY)
+    if versao is None:
+        await cache.aadd(VERSAO_KEY, uuid.uuid4().hex, None)
+        versao = await cache.aget(VERSAO_KEY)
+    return versao
+
+
+def _resposta_do_cache(request, cached):
+    content, content_type = cached
+    response = HttpResponse(
+        content.replace(CSRF_PLACEHOLDER, get_token(request).encode('ascii')),
+        content_type=content_type,
+    )
+    response['X-Page-Cache'] = 'HIT'
+    return response
+
+
+def _conteudo_cacheavel(response):
+    """`(content, content_type)` a guardar, ou None se a resposta não deve ir para o cache."""
+    if response.status_code != 200 or response.streaming:
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    response['X-Page-Cache'] = 'MISS'
+    return CSRF_INPUT_RE.sub(rb'\1' + CSRF_PLACEHOLDER + rb'\2', response.content), response['Content-Type']
+
+
+def cache_pagina_publica(view_func):
+    """Serve a resposta da view a partir do cache para visitantes anônimos.
+
+    Usuários autenticados veem links diferentes no cabeçalho, então sempre
+    recebem a página renderizada na hora. Somente respostas 200 de GET são guardadas.
+    Funciona com views síncronas e assíncronas (no modo ASGI o cache é
+    acessado pela API assíncrona, sem bloquear o event loop).
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def _wrapped_async(request, *args, **kwargs):
+            usuario = await request.auser()
+            if request.method not in ('GET', 'HEAD') or usuario.is_authenticated:
+                return await view_func(request, *args, **kwargs)
+
+            chave = chave_pagina(request, await aversao_atual())
+            cached = await cache.aget(chave)
+            if cached is not None:
+                response = _resposta_do_cache(request, cached)
+            else:
+                response = await view_func(request, *args, **kwargs)
+                conteudo = _conteudo_cacheavel(response)
+                if conteudo:
+                    await cache.aset(chave, conteudo, settings.PAGE_CACHE_TIMEOUT)
+
+            patch_vary_headers(response, VARY_HTMX)
+            return response
+        return _wrapped_async
+
+    @wraps(view_func)
+    def _wrapped(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+
+        chave = chave_pagina(request)
+        cached = cache.get(chave)
+        if cached is not None:
+            response = _resposta_do_cache(request, cached)
+        else:
+            response = view_func(request, *args, **kwargs)
+            conteudo = _conteudo_cacheavel(response)
+            if conteudo:
+                cache.set(chave, conteudo, settings.PAGE_CACHE_TIMEOUT)
+
+        patch_vary_headers(response, VARY_HTMX)
+        return response
+    return _wrapped
+
+
+def _chave_estado(modelos, versao):
+    return f'condicional:{versao}:' + ','.join(modelo._meta.label_lower for modelo in modelos)
+
+
+def _consulta_estado(modelos):
+    """Um SELECT (UNION ALL) com `(posição, MAX(updated_at), COUNT)` de cada modelo."""
+    partes = [
+        modelo.objects.order_by()
+        .annotate(posicao=Value(n, IntegerField()))
+        .values('posicao')
+        .annotate(ultima=Max('updated_at'), total=Count('pk'))
+        .values_list('posicao', 'ultima', 'total')
+        for n, modelo in enumerate(modelos)
+    ]
+    return partes[0].union(*partes[1:], all=True)
+
+
+def _ordenar_estado(linhas):
+    return [(ultima, total) for _, ultima, total in sorted(linhas, key=lambda linha: linha[0])]
+
+
+def estado_das_tabelas(modelos):
+    """`[(ultima_alteracao, total), ...]` de cada modelo, na ordem recebida.
+
+    `MAX(updated_at)` e `COUNT` (que também muda quando uma linha é apagada)
+    de todas as tabelas em uma só consulta, guardados no cache sob a versão
+    das páginas: até a próxima edição do catálogo, o valor sai do cache.
+    """
+    chave = _chave_estado(modelos, versao_atual())
+    estado = cache.get(chave)
+    if estado is None:
+        estado = _ordenar_estado(_consulta_estado(modelos))
+        cache.set(chave, estado, settings.PAGE_CACHE_TIMEOUT)
+    return estado
+
+
+async def aestado_das_tabelas(modelos):
+    chave = _chave_estado(modelos, await aversao_atual())
+    estado = await cache.aget(chave)
+    if estado is None:
+        estado = _ordenar_estado([linha async for linha in _consulta_estado(modelos)])
+        await cache.aset(chave, estado, settings.PAGE_CACHE_TIMEOUT)
+    return estado
+
+
+def _validadores(request, estado):
+    """`(etag, last_modified)` da página: o estado das tabelas, o modo (HTMX ou
+    completo), `VERSAO_DEPLOY` (muda quando os templates mudam) e o segredo
+    CSRF do visitante, cujo token vai embutido no HTML (formulário de contato).
+    O segredo vem de `CSRF_COOKIE`, que o middleware preenche a partir do
+    cookie e o `get_token` troca quando cria um cookie novo."""
+    modo = modo_htmx(request)
+    csrf = request.META.get('CSRF_COOKIE', '')
+    etag = hashlib.md5(repr((estado, modo, settings.VERSAO_DEPLOY, csrf)).encode('utf-8')).hexdigest()
+    ultimas = [ultima for ultima, _ in estado if ultima is not None]
+    last_modified = int(max(ultimas).timestamp()) if ultimas else None
+    return quote_etag(etag), last_modified
+
+
+def _resposta_304(request, etag, last_modified):
+    """304 se o navegador já tem esta versão; None para renderizar.
+
+    Sem o cookie CSRF a página sempre é renderizada: só a renderização (o
+    `{% csrf_token %}`) grava um cookie novo, e o HTML guardado pelo navegador
+    traria um token que não vale mais.
+    """
+    if settings.CSRF_COOKIE_NAME not in request.COOKIES:
+        return None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def _aplicar_validadores(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # O HTML carrega o token CSRF do visitante: só o navegador guarda, sempre revalidando
+        patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, VARY_HTMX)
+    return response
+
+
+def resposta_condicional(*modelos):
+    """GET condicional para páginas públicas que dependem das tabelas de `modelos`.
+
+    O ETag e o Last-Modified vêm de `estado_das_tabelas` (sem renderizar);
+    se o navegador já tem essa versão (If-None-Match / If-Modified-Since), a
+    resposta é um 304 sem corpo e a view nem é chamada (desde que o visitante
+    tenha o cookie CSRF; ver `_resposta_304`). Fica por fora de
+    `cache_pagina_publica`, então nem o cache de páginas é consultado.
+    Usuários autenticados passam direto, como no cache de páginas.
+    Todos os modelos precisam ter `updated_at`.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def _wrapped_async(request, *args, **kwargs):
+                usuario = await request.auser()
+                if request.method not in ('GET', 'HEAD') or usuario.is_authenticated:
+                    return await view_func(request, *args, **kwargs)
+
+                estado = await aestado_das_tabelas(modelos)
+                etag, last_modified = _validadores(request, estado)
+                response = _resposta_304(request, etag, last_modified)
+                if response is None:
+                    response = await view_func(request, *args, **kwargs)
+                    # A renderização pode ter criado o cookie CSRF: o ETag usa o segredo novo
+                    etag, last_modified = _validadores(request, estado)
+                return _aplicar_validadores(response, etag, last_modified)
+            return _wrapped_async
+
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+
+            estado = estado_das_tabelas(modelos)
+            etag, last_modified = _validadores(request, estado)
+            response = _resposta_304(request, etag, last_modified)
+            if response is None:
+                response = view_func(request, *args, **kwargs)
+                # A renderização pode ter criado o cookie CSRF: o ETag usa o segredo novo
+                etag, last_modified = _validadores(request, estado)
+            return _aplicar_validadores(response, etag, last_modified)
+        return _wrapped
+    return decorator
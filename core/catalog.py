@@ -0,0 +1,243 @@
+"""Montagem do catálogo público (árvore de filtros e páginas de produtos).
+
+Tudo é resolvido em um número fixo de consultas, independente do tamanho do
+catálogo: uma para as categorias, uma para as subcategorias (prefetch), uma
+para as contagens da barra lateral e uma para cada página de produtos, com as
+FKs já resolvidas via JOIN. Os cards chegam em páginas de `PRODUTOS_POR_PAGINA`
+(paginação por chave), pedidas pela sentinela do scroll infinito.
+"""
+import base64
+import json
+import operator
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+from django.utils.text import slugify
+
+from .models import Produto, CategoriaPrincipal
+
+# Limite do termo de busca aceito pelo endpoint de filtro
+TAMANHO_MAXIMO_BUSCA = 100
+
+# Cards carregados por página no catálogo, nas categorias e no filtro (scroll infinito)
+PRODUTOS_POR_PAGINA = 24
+# Ordem dos cards; termina no id para a paginação por chave não pular nem repetir itens
+ORDEM_CATALOGO = ('ordem', 'nome', 'id')
+
+
+def categorias_ativas():
+    """Categorias principais ativas com as subcategorias pré-carregadas."""
+    return CategoriaPrincipal.objects.filter(ativo=True).order_by('ordem', 'nome').prefetch_related('subcategorias')
+
+
+def produtos_ativos():
+    """Produtos ativos com categoria principal e subcategoria resolvidas no mesmo SELECT."""
+    return (
+        Produto.objects.filter(ativo=True)
+        .select_related('categoria_principal', 'subcategoria')
+        .order_by('ordem', 'nome')
+    )
+
+
+def montar_catalogo():
+    """Contexto da página /produtos/: barra lateral e a primeira página de cards.
+
+    São 4 consultas (categorias, subcategorias, contagens e uma página de
+    `PRODUTOS_POR_PAGINA` cards), independente do tamanho do catálogo; o resto
+    vem do endpoint de filtro pela sentinela do scroll infinito.
+    """
+    categorias = list(categorias_ativas())
+    arvore, contagem_subcategorias = arvore_de_filtros(categorias)
+    produtos, proximo_cursor = pagina_de_produtos(produtos_ativos())
+    return _contexto_catalogo(categorias, arvore, contagem_subcategorias, produtos, proximo_cursor)
+
+
+async def amontar_catalogo():
+    """Versão assíncrona de `montar_catalogo` (mesmas 4 consultas, pelo ORM assíncrono)."""
+    categorias = [categoria async for categoria in categorias_ativas()]
+    linhas = [linha async for linha in _consulta_contagens(Produto.objects.filter(ativo=True))]
+    arvore, contagem_subcategorias = _montar_arvore(categorias, linhas)
+    produtos, proximo_cursor = await apagina_de_produtos(produtos_ativos())
+    return _contexto_catalogo(categorias, arvore, contagem_subcategorias, produtos, proximo_cursor)
+
+
+def _contexto_catalogo(categorias, arvore, contagem_subcategorias, produtos, proximo_cursor):
+    return {
+        'categorias_principais': categorias,
+        'produtos_agrupados_list': arvore,
+        'contagem_subcategorias': contagem_subcategorias,
+        'produtos': produtos,
+        'proximo_cursor': proximo_cursor,
+    }
+
+
+def _parse_id(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def ler_filtros(params):
+    """Normaliza os parâmetros `categoria`, `subcategoria` e `q` vindos da querystring."""
+    return {
+        'categoria': _parse_id(params.get('categoria')),
+        'subcategoria': _parse_id(params.get('subcategoria')),
+        'q': params.get('q', '').strip()[:TAMANHO_MAXIMO_BUSCA],
+    }
+
+
+def _contar(queryset, campo):
+    """`{fk_id: total}` agregado no banco (GROUP BY na FK), ignorando produtos sem a FK."""
+    return dict(
+        queryset.exclude(**{campo: None})
+        .values_list(campo)
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def filtrar_catalogo(categoria=None, subcategoria=None, q='', cursor=None):
+    """Filtra os produtos ativos, paginados por cursor, e calcula as contagens por faceta.
+
+    Cada faceta ignora o próprio filtro (as categorias são contadas só com a
+    busca aplicada; as subcategorias, com a busca e a categoria), para que o
+    usuário veja quantos produtos teria ao trocar de opção.
+
+    Retorna `(produtos, proximo_cursor, contagem_categorias, contagem_subcategorias)`
+    em 3 consultas. Os filtros de faceta usam as FKs indexadas de `Produto`; a
+    busca `q` (`nome__icontains`, LIKE com curinga inicial) percorre a tabela,
+    exceto no PostgreSQL quando a migração 0013 conseguiu criar o índice trigram
+    de `nome` (extensão pg_trgm). Com `cursor` (páginas seguintes do scroll
+    infinito) as contagens não mudam e não são recalculadas: voltam como
+    `None`, e sobra só a consulta da página.
+    """
+    base = Produto.objects.filter(ativo=True)
+    if q:
+        base = base.filter(nome__icontains=q)
+
+    contagem_categorias = None if cursor else _contar(base, 'categoria_principal_id')
+
+    if categoria:
+        base = base.filter(categoria_principal_id=categoria)
+
+    contagem_subcategorias = None if cursor else _contar(base, 'subcategoria_id')
+
+    if subcategoria:
+        base = base.filter(subcategoria_id=subcategoria)
+
+    produtos, proximo_cursor = pagina_de_produtos(base.select_related('categoria_principal', 'subcategoria'), cursor)
+    return produtos, proximo_cursor, contagem_categorias, contagem_subcategorias
+
+
+def resolver_categoria(categorias, ref):
+    """Encontra, entre as `categorias` já carregadas, a referenciada por id ou pelo slug do nome."""
+    for categoria in categorias:
+        if str(categoria.pk) == ref or slugify(categoria.nome) == ref:
+            return categoria
+    return None
+
+
+def _consulta_contagens(queryset):
+    """`(categoria_principal_id, subcategoria_id, total)` por par de FKs: uma agregação para as duas facetas."""
+    return (
+        queryset.values_list('categoria_principal_id', 'subcategoria_id')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+
+def _montar_arvore(categorias, linhas):
+    contagem_categorias = {}
+    contagem_subcategorias = {}
+    for categoria_id, subcategoria_id, total in linhas:
+        if categoria_id is not None:
+            contagem_categorias[categoria_id] = contagem_categorias.get(categoria_id, 0) + total
+        if subcategoria_id is not None:
+            contagem_subcategorias[subcategoria_id] = contagem_subcategorias.get(subcategoria_id, 0) + total
+    arvore = [
+        {'categoria': categoria, 'total': contagem_categorias[categoria.pk]}
+        for categoria in categorias
+        if contagem_categorias.get(categoria.pk)
+    ]
+    return arvore, contagem_subcategorias
+
+
+def arvore_de_filtros(categorias):
+    """Árvore da barra lateral (categorias com produtos + contagens) sem carregar os produtos.
+
+    Usa uma agregação por par (categoria, subcategoria), então o custo não
+    depende do tamanho do catálogo.
+    """
+    return _montar_arvore(categorias, _consulta_contagens(Produto.objects.filter(ativo=True)))
+
+
+def codificar_cursor(valores):
+    """Cursor opaco com os valores da chave de ordenação do último item entregue."""
+    chave = json.dumps(list(valores), separators=(',', ':'))
+    return base64.urlsafe_b64encode(chave.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(valor, campos):
+    """Valores da chave guardados no cursor, convertidos pelos `campos` do modelo (ou `None` se inválido)."""
+    if not valor:
+        return None
+    try:
+        chave = json.loads(base64.urlsafe_b64decode(valor + '=' * (-len(valor) % 4)))
+        if not isinstance(chave, list) or len(chave) != len(campos):
+            return None
+        return [campo.to_python(item) for campo, item in zip(campos, chave)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def pagina_por_chave(queryset, ordenacao, cursor=None, tamanho=None):
+    """Paginação por chave (keyset) sobre os campos de `ordenacao` (`'-campo'` = decrescente).
+
+    Diferente de OFFSET, o custo de cada página é o mesmo independente da
+    posição na lista. A ordenação precisa terminar em um campo único (`id`).
+    Retorna `(itens, proximo_cursor)`; o cursor é `None` na última página.
+    """
+    queryset, campos, tamanho = _consulta_pagina(queryset, ordenacao, cursor, tamanho)
+    return _fechar_pagina(list(queryset), campos, tamanho)
+
+
+async def apagina_por_chave(queryset, ordenacao, cursor=None, tamanho=None):
+    """Versão assíncrona de `pagina_por_chave`."""
+    queryset, campos, tamanho = _consulta_pagina(queryset, ordenacao, cursor, tamanho)
+    return _fechar_pagina([item async for item in queryset], campos, tamanho)
+
+
+def _consulta_pagina(queryset, ordenacao, cursor, tamanho):
+    """Queryset da página (com um item a mais, para saber se há próxima), os campos da chave e o tamanho."""
+    tamanho = tamanho or PRODUTOS_POR_PAGINA
+    nomes = [nome.lstrip('-') for nome in ordenacao]
+    campos = [queryset.model._meta.get_field(nome) for nome in nomes]
+    queryset = queryset.order_by(*ordenacao)
+    chave = decodificar_cursor(cursor, campos)
+    if chave:
+        # (a > x) OR (a = x AND b > y) OR ..., com < nos campos decrescentes
+        condicoes = []
+        for i, nome in enumerate(ordenacao):
+            operador = 'lt' if nome.startswith('-') else 'gt'
+            iguais = dict(zip(nomes[:i], chave))
+            condicoes.append(Q(**iguais, **{f'{nomes[i]}__{operador}': chave[i]}))
+        queryset = queryset.filter(reduce(operator.or_, condicoes))
+    return queryset[:tamanho + 1], campos, tamanho
+
+
+def _fechar_pagina(itens, campos, tamanho):
+    if len(itens) > tamanho:
+        itens = itens[:tamanho]
+        return itens, codificar_cursor(getattr(itens[-1], campo.attname) for campo in campos)
+    return itens, None
+
+
+def pagina_de_produtos(queryset, cursor=None, tamanho=None):
+    """Página de produtos na ordem do catálogo (`ordem`, `nome`, `id`); veja `pagina_por_chave`."""
+    return pagina_por_chave(queryset, ORDEM_CATALOGO, cursor=cursor, tamanho=tamanho)
+
+
+async def apagina_de_produtos(queryset, cursor=None, tamanho=None):
+    return await apagina_por_chave(queryset, ORDEM_CATALOGO, cursor=cursor, tamanho=tamanho)
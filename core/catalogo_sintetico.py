@@ -0,0 +1,198 @@
+"""Catálogo sintético para medir desempenho com volume realista.
+
+Gera categorias, subcategorias, produtos (com slugs, especificações, o campo
+legado `categoria` e imagens de `static/images/`) e slides de `Destaque`.
+Tudo é derivado de um `random.Random(seed)`: a mesma seed gera sempre o
+mesmo catálogo.
+
+A árvore e os destaques usam `bulk_create`. Os produtos são inseridos em
+lotes com `executemany` sobre tuplas já no formato do banco: com 100 mil
+linhas, instanciar cada modelo e converter cada valor no `bulk_create`
+dominava o tempo da carga.
+"""
+import random
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import invalidar_paginas
+from .categorias_iniciais import CATEGORIAS_INICIAIS
+from .image_variants import DIRETORIO_ORIGEM, EXTENSOES_ORIGEM
+from .midia import midia_produto
+from .models import CategoriaPrincipal, Destaque, Produto, Subcategoria, escolher_slug
+
+TAMANHO_LOTE = 5000
+
+ESTILOS = ('Amadeirado', 'Tijolinho', 'Clássico', 'Geométrico', 'Mosaico', 'Pisante', 'Cobogó', 'Cuba', 'Lajota')
+ACABAMENTOS = ('Natural', 'Grafite', 'Areia', 'Branco', 'Terracota', 'Chumbo', 'Off-white')
+FORMATOS = ('30x30x2cm', '40x40x3cm', '20x40x2cm', '50x50x4cm', '15x60x2cm')
+UNIDADES = ('Vendido o M²', 'Vendido por peça', 'Vendido o metro linear')
+ESPECIFICACOES = ('Alta resistência', 'Uso interno', 'Uso externo', 'Antiderrapante', 'Impermeabilizável')
+
+
+def imagens_disponiveis():
+    """Nomes dos arquivos de `static/images/` usados como `imagem_nome` (ordem estável)."""
+    if not DIRETORIO_ORIGEM.exists():
+        return ['cobogo.png']
+    return sorted(
+        caminho.name for caminho in DIRETORIO_ORIGEM.iterdir()
+        if caminho.is_file() and caminho.suffix.lower() in EXTENSOES_ORIGEM
+    ) or ['cobogo.png']
+
+
+def arvore_sintetica(categorias, subcategorias_por_categoria, seed=42):
+    """Árvore no formato de `CATEGORIAS_INICIAIS` com `categorias` x `subcategorias_por_categoria` nós."""
+    rng = random.Random(seed)
+    return [
+        {
+            'nome': f'Linha {c:03d}',
+            'ordem': c,
+            'subcategorias': [
+                {'nome': f'{rng.choice(ESTILOS)} {c:03d}.{s:02d}', 'ordem': s}
+                for s in range(1, subcategorias_por_categoria + 1)
+            ],
+        }
+        for c in range(1, categorias + 1)
+    ]
+
+
+def garantir_arvore(arvore):
+    """Cria em lote as categorias e subcategorias de `arvore` que ainda não existem.
+
+    Retorna `{'subcategorias': [...], 'criadas': {...}}`: as subcategorias da
+    árvore (na ordem dela, com a categoria principal carregada) e os nomes do
+    que foi criado agora (`categorias` e pares `(categoria, subcategoria)`).
+    """
+    nomes = [dados['nome'] for dados in arvore]
+    existentes = set(CategoriaPrincipal.objects.filter(nome__in=nomes).values_list('nome', flat=True))
+    CategoriaPrincipal.objects.bulk_create([
+        CategoriaPrincipal(nome=dados['nome'], ordem=dados['ordem'])
+        for dados in arvore if dados['nome'] not in existentes
+    ])
+    categorias = {c.nome: c for c in CategoriaPrincipal.objects.filter(nome__in=nomes)}
+
+    sub_existentes = set(
+        Subcategoria.objects.filter(categoria_principal__in=categorias.values())
+        .values_list('categoria_principal__nome', 'nome')
+    )
+    novas = [
+        (dados['nome'], sub)
+        for dados in arvore
+        for sub in dados['subcategorias']
+        if (dados['nome'], sub['nome']) not in sub_existentes
+    ]
+    Subcategoria.objects.bulk_create([
+        Subcategoria(categoria_principal=categorias[categoria], nome=sub['nome'], ordem=sub['ordem'])
+        for categoria, sub in novas
+    ])
+
+    por_nome = {
+        (s.categoria_principal.nome, s.nome): s
+        for s in Subcategoria.objects.filter(categoria_principal__in=categorias.values())
+        .select_related('categoria_principal')
+    }
+    return {
+        'subcategorias': [por_nome[(dados['nome'], sub['nome'])] for dados in arvore for sub in dados['subcategorias']],
+        'criadas': {
+            'categorias': set(categorias) - existentes,
+            'subcategorias': {(categoria, sub['nome']) for categoria, sub in novas},
+        },
+    }
+
+
+def _insert_produtos():
+    """SQL do INSERT de produtos e os valores padrão (já no formato do banco) de cada coluna."""
+    campos = [campo for campo in Produto._meta.concrete_fields if not campo.primary_key]
+    agora = timezone.now()
+    padroes = {}
+    for campo in campos:
+        automatico = getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+        valor = agora if automatico else campo.get_default()
+        padroes[campo.attname] = campo.get_db_prep_save(valor, connection)
+    colunas = ', '.join(connection.ops.quote_name(campo.column) for campo in campos)
+    sql = (
+        f'INSERT INTO {connection.ops.quote_name(Produto._meta.db_table)} ({colunas}) '
+        f'VALUES ({", ".join(["%s"] * len(campos))})'
+    )
+    return sql, [campo.attname for campo in campos], padroes
+
+
+def gerar_catalogo(produtos, seed=42, destaques=4, arvore=None, tamanho_lote=TAMANHO_LOTE):
+    """Insere `produtos` produtos sintéticos (e `destaques` slides) e retorna um resumo.
+
+    Sem `arvore`, os produtos são espalhados pelas categorias do site
+    (`CATEGORIAS_INICIAIS`). Os slugs são escolhidos em memória contra os já
+    existentes, então rodar de novo acrescenta produtos em vez de falhar.
+    """
+    inicio = time.monotonic()
+    rng = random.Random(seed)
+    subcategorias = [
+        s for s in garantir_arvore(arvore or CATEGORIAS_INICIAIS)['subcategorias']
+        if s.ativo and s.categoria_principal.ativo
+    ]
+    if produtos and not subcategorias:
+        raise ValueError('Nenhuma subcategoria ativa (com categoria ativa) para receber os produtos')
+    imagens = imagens_disponiveis()
+    # `midia` já no formato do banco, uma por imagem (o INSERT direto não passa pelo pre_save)
+    campo_midia = Produto._meta.get_field('midia')
+    midias = {nome: campo_midia.get_db_prep_save(midia_produto([], nome), connection) for nome in imagens}
+    slugs = set(Produto.objects.values_list('slug', flat=True))
+    max_length_slug = Produto._meta.get_field('slug').max_length
+    sql, colunas, padroes = _insert_produtos()
+
+    lote = []
+    ativos = []
+    with connection.cursor() as cursor:
+        for n in range(produtos):
+            subcategoria = subcategorias[n % len(subcategorias)]
+            acabamento = rng.choice(ACABAMENTOS)
+            nome = f'{subcategoria.nome} {acabamento} {n + 1:06d}'
+            slug = escolher_slug(nome, slugs, max_length_slug)
+            slugs.add(slug)
+            # Uma pequena parte inativa, como no catálogo real
+            ativo = rng.random() > 0.05
+            imagem = rng.choice(imagens)
+            valores = dict(
+                padroes,
+                nome=nome,
+                slug=slug,
+                descricao=f'{subcategoria.nome} em concreto, acabamento {acabamento.lower()}.',
+                categoria_principal_id=subcategoria.categoria_principal_id,
+                subcategoria_id=subcategoria.pk,
+                categoria=subcategoria.nome,
+                imagem_nome=imagem,
+                midia=midias[imagem],
+                dimensoes=rng.choice(FORMATOS),
+                cor=acabamento,
+                unidade_venda=rng.choice(UNIDADES),
+                especificacoes='\n'.join(rng.sample(ESPECIFICACOES, 2)),
+                ordem=rng.randint(0, 100),
+                ativo=ativo,
+            )
+            lote.append(tuple(valores[coluna] for coluna in colunas))
+            if ativo:
+                ativos.append(slug)
+            if len(lote) >= tamanho_lote:
+                with transaction.atomic():
+                    cursor.executemany(sql, lote)
+                lote = []
+        if lote:
+            with transaction.atomic():
+                cursor.executemany(sql, lote)
+
+    escolhidos = rng.sample(ativos, min(destaques, len(ativos)))
+    por_slug = Produto.objects.in_bulk(escolhidos, field_name='slug')
+    slides = Destaque.objects.bulk_create([
+        Destaque(titulo=f'Destaque {n + 1}', subtitulo='Conheça a linha', produto_link=por_slug[slug], ordem=n)
+        for n, slug in enumerate(escolhidos)
+    ])
+
+    # Nada aqui dispara post_save: invalida as páginas em cache explicitamente
+    invalidar_paginas()
+    return {
+        'produtos': produtos,
+        'destaques': len(slides),
+        'subcategorias': len(subcategorias),
+        'segundos': time.monotonic() - inicio,
+    }
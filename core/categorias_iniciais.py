@@ -0,0 +1,49 @@
+"""Árvore de categorias e subcategorias do site (`populate_categorias`, catálogo sintético)."""
+
+CATEGORIAS_INICIAIS = [
+    {
+        'nome': 'Revestimento 3D cimentício',
+        'ordem': 1,
+        'subcategorias': [
+            {'nome': 'Amadeirados', 'ordem': 1},
+            {'nome': 'Brick´s/Tijolinho', 'ordem': 2},
+            {'nome': 'Clássicos', 'ordem': 3},
+            {'nome': 'Geométricos', 'ordem': 4},
+            {'nome': 'Mosaicos', 'ordem': 5},
+        ]
+    },
+    {
+        'nome': 'Artefatos Cimentícios',
+        'ordem': 2,
+        'subcategorias': [
+            {'nome': 'Lajota Piso', 'ordem': 1},
+            {'nome': 'Pingadeira', 'ordem': 2},
+        ]
+    },
+    {
+        'nome': 'Cube Concreto',
+        'ordem': 3,
+        'subcategorias': [
+            {'nome': 'Cuba redonda', 'ordem': 1},
+            {'nome': 'Cuba quadrada', 'ordem': 2},
+        ]
+    },
+    {
+        'nome': 'Linha Jardim',
+        'ordem': 4,
+        'subcategorias': [
+            {'nome': 'Pisante', 'ordem': 1},
+            {'nome': 'Guia jardim', 'ordem': 2},
+            {'nome': 'Concregrama', 'ordem': 3},
+        ]
+    },
+    {
+        'nome': 'Elemento Vazado Cobogó',
+        'ordem': 5,
+        'subcategorias': [
+            {'nome': 'Cobogó 40x40', 'ordem': 1},
+            {'nome': 'Cobogó 30x30', 'ordem': 2},
+            {'nome': 'Cobogó Dupla face 30x30', 'ordem': 3},
+        ]
+    },
+]
@@ -0,0 +1,176 @@
+"""Envio em paralelo de imagens locais para o Cloudinary.
+
+Usado pelos comandos `upload_images_to_cloudinary` e
+`migrate_images_to_cloudinary`. Os uploads rodam em um pool de threads
+limitado (são chamadas HTTP, o GIL não atrapalha); as escritas no banco
+ficam na thread principal, com `save(update_fields=...)`.
+
+Cada upload concluído é anotado em um checkpoint (JSON Lines). Se o comando
+for interrompido, a próxima execução reaproveita o que já subiu em vez de
+começar do zero. Os `public_id` são determinísticos (produto + campo), então
+repetir um upload sobrescreve o mesmo recurso em vez de duplicá-lo.
+"""
+import json
+import os
+import shutil
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from cloudinary import uploader
+from django.conf import settings
+
+PASTA_PRODUTOS = 'produtos'
+TENTATIVAS = 3
+ATRASO_RETRY = 1.0
+
+# Um arquivo local a enviar para `campo` do produto `produto_id`
+Tarefa = namedtuple('Tarefa', ['produto_id', 'campo', 'caminho', 'public_id'])
+
+
+def upload_cloudinary(caminho, public_id):
+    """Envia `caminho` para o Cloudinary e retorna o `public_id` gravado."""
+    resultado = uploader.upload(
+        str(caminho), public_id=public_id, folder=PASTA_PRODUTOS, overwrite=True, resource_type='image'
+    )
+    return resultado['public_id']
+
+
+class UploaderLocal:
+    """Substituto offline da API de upload: copia os arquivos para `diretorio`.
+
+    Útil para ensaiar uma migração (e nos testes) sem credenciais nem rede.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = Path(diretorio)
+
+    def __call__(self, caminho, public_id):
+        public_id = f'{PASTA_PRODUTOS}/{public_id}'
+        destino = self.diretorio / f'{public_id}{Path(caminho).suffix.lower()}'
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(caminho, destino)
+        return public_id
+
+
+class Checkpoint:
+    """Registro append-only dos uploads concluídos (`{"chave": ..., "public_id": ...}` por linha).
+
+    A chave inclui tamanho e mtime do arquivo, então um arquivo alterado
+    depois do upload é enviado de novo.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = Path(caminho) if caminho else None
+        self.concluidos = {}
+        if self.caminho and self.caminho.exists():
+            with open(self.caminho, encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        continue  # última linha truncada por uma interrupção
+                    self.concluidos[registro['chave']] = registro['public_id']
+        self._arquivo = None
+
+    @staticmethod
+    def chave(tarefa):
+        stat = os.stat(tarefa.caminho)
+        return f'{tarefa.produto_id}:{tarefa.campo}:{stat.st_size}:{int(stat.st_mtime)}'
+
+    def get(self, tarefa):
+        return self.concluidos.get(self.chave(tarefa))
+
+    def registrar(self, tarefa, public_id):
+        chave = self.chave(tarefa)
+        self.concluidos[chave] = public_id
+        if not self.caminho:
+            return
+        if self._arquivo is None:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+        self._arquivo.write(json.dumps({'chave': chave, 'public_id': public_id}) + '\n')
+        self._arquivo.flush()
+
+    def fechar(self):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+
+
+def _enviar_com_retry(upload, tarefa):
+    for tentativa in range(1, TENTATIVAS + 1):
+        try:
+            return upload(tarefa.caminho, tarefa.public_id)
+        except Exception:
+            if tentativa == TENTATIVAS:
+                raise
+            time.sleep(ATRASO_RETRY * 2 ** (tentativa - 1))
+
+
+def executar(tarefas, aplicar, upload=upload_cloudinary, workers=4, checkpoint=None, log=None):
+    """Envia as `tarefas` em paralelo e chama `aplicar(tarefa, public_id)` na thread principal.
+
+    Tarefas já presentes no `checkpoint` não são reenviadas (só reaplicadas
+    no banco). Retorna um dicionário com o resumo da execução.
+    """
+    log = log or (lambda mensagem, erro=False: None)
+    checkpoint = checkpoint or Checkpoint(None)
+    resumo = {'enviados': 0, 'retomados': 0, 'falhas': 0, 'bytes': 0}
+    inicio = time.monotonic()
+
+    pendentes = []
+    for tarefa in tarefas:
+        public_id = checkpoint.get(tarefa)
+        if public_id:
+            aplicar(tarefa, public_id)
+            resumo['retomados'] += 1
+        else:
+            pendentes.append(tarefa)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futuros = {pool.submit(_enviar_com_retry, upload, tarefa): tarefa for tarefa in pendentes}
+            for futuro in as_completed(futuros):
+                tarefa = futuros[futuro]
+                try:
+                    public_id = futuro.result()
+                except Exception as e:
+                    resumo['falhas'] += 1
+                    log(f'Erro ao enviar {tarefa.caminho} ({tarefa.campo} do produto {tarefa.produto_id}): {e}', erro=True)
+                    continue
+                # Checkpoint antes do banco: se cair entre os dois, a retomada só reaplica
+                checkpoint.registrar(tarefa, public_id)
+                aplicar(tarefa, public_id)
+                resumo['enviados'] += 1
+                resumo['bytes'] += os.path.getsize(tarefa.caminho)
+                log(f'  ✓ {tarefa.campo} do produto {tarefa.produto_id} -> {public_id}')
+    finally:
+        checkpoint.fechar()
+
+    resumo['segundos'] = time.monotonic() - inicio
+    return resumo
+
+
+def adicionar_argumentos(parser, nome_checkpoint):
+    """Opções comuns dos comandos de upload."""
+    parser.add_argument('--workers', type=int, default=4, help='Uploads simultâneos')
+    parser.add_argument('--checkpoint', type=str,
+                        default=str(settings.MEDIA_ROOT / f'.cloudinary-{nome_checkpoint}.jsonl'),
+                        help='Arquivo de checkpoint usado para retomar uma execução interrompida')
+    parser.add_argument('--local-dir', type=str, default='',
+                        help='Copia os arquivos para este diretório em vez de enviar ao Cloudinary (ensaio offline)')
+
+
+def upload_das_opcoes(options):
+    return UploaderLocal(options['local_dir']) if options['local_dir'] else upload_cloudinary
+
+
+def formatar_resumo(resumo):
+    segundos = resumo['segundos'] or 1e-9
+    return (
+        f"{resumo['enviados']} enviada(s), {resumo['retomados']} retomada(s) do checkpoint, "
+        f"{resumo['falhas']} falha(s) em {resumo['segundos']:.1f}s "
+        f"({resumo['enviados'] / segundos:.1f} arquivos/s, {resumo['bytes'] / segundos / 1024 / 1024:.2f} MB/s)"
+    )
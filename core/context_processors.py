@@ -0,0 +1,12 @@
+def navegacao_htmx(request):
+    """Navegação HTMX entre páginas: o cliente troca só o <body>, então basta o fragmento.
+
+    Pedidos de restauração do histórico (HX-History-Restore-Request) precisam da
+    página completa, como um acesso direto.
+    """
+    return bool(request.htmx) and not request.htmx.history_restore_request
+
+
+def base_template(request):
+    """`base_template` para `{% extends base_template|default:'base.html' %}` nas páginas públicas."""
+    return {'base_template': 'base_fragmento.html' if navegacao_htmx(request) else 'base.html'}
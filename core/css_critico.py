@@ -0,0 +1,312 @@
+"""CSS crítico por página: as regras do style.css que a parte visível de cada template usa.
+
+Gerado pelo comando `build_critical_css` e inserido pela tag `{% css_critico %}`
+do base.html: a página recebe essas regras num <style> inline e o pacote
+`site.css` completo é carregado sem bloquear a renderização (e fica em cache
+para as próximas páginas).
+
+A análise é estática, sem navegador:
+
+- do template da página, dos que ele inclui e dos pais saem as classes e ids
+  usados no markup (`class`, `css_class` das tags de imagem e `id`);
+- dos scripts que a página carrega (pacotes, `{% static %}` e <script> inline)
+  saem os literais de texto, para cobrir classes ligadas por JS
+  (`header-home`, `scrolled`, `active`...);
+- uma regra entra se algum dos seus seletores só exige classes e ids
+  presentes. Seletores de tipo, pseudo-classes e atributos não restringem
+  (`h1`, `a:hover` e `[hidden]` sempre entram).
+
+A dobra é marcada no template da página com o comentário `{# dobra #}`: o
+markup entre ele e o fim do bloco fica de fora do CSS crítico. Sem marcador,
+a página inteira conta como acima da dobra.
+"""
+import hashlib
+import json
+import posixpath
+import re
+
+from django.conf import settings
+from django.template.loader import get_template
+
+from . import assets
+
+DIRETORIO_TEMPLATES = settings.BASE_DIR / 'templates'
+DIRETORIO_CRITICO = assets.DIRETORIO_PACOTES / 'critico'
+MANIFESTO = DIRETORIO_CRITICO / 'manifest.json'
+# Pacote cujas regras são filtradas (e que a página carrega de forma assíncrona)
+PACOTE = 'site.css'
+
+# Páginas públicas; as do painel (core/admin/, exceto parciais `_*.html`) são somadas em `paginas()`
+PAGINAS = (
+    'core/home.html',
+    'core/produtos.html',
+    'core/produto-detalhe.html',
+    'core/quem-somos.html',
+    'core/login.html',
+)
+DIRETORIO_ADMIN = 'core/admin'
+
+# At-rules cujo conteúdo são outras regras (filtradas uma a uma)
+AGRUPADORES = ('@media', '@supports', '@layer', '@container')
+
+RE_COMENTARIO_CSS = re.compile(r'/\*.*?\*/', re.S)
+RE_STRING = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+RE_DOBRA = re.compile(r'\{#\s*dobra\s*#\}.*?(?=\{%\s*endblock\b)', re.S)
+RE_COMENTARIO_HTML = re.compile(r'<!--.*?-->|\{#.*?#\}', re.S)
+RE_TAG_TEMPLATE = re.compile(r'\{\{.*?\}\}|\{%.*?%\}', re.S)
+RE_INCLUDE = re.compile(r'\{%\s*(?:include|extends)\s+[^%]*?["\']([^"\']+)["\']')
+RE_CLASSE = re.compile(r'(?<![\w-])(?:css_)?class\s*=\s*(["\'])(.*?)\1', re.S)
+RE_ID = re.compile(r'(?<![\w-])id\s*=\s*(["\'])(.*?)\1', re.S)
+RE_SCRIPT_INLINE = re.compile(r'<script\b[^>]*>(.*?)</script>', re.S | re.I)
+RE_BUNDLE_JS = re.compile(r'\{%\s*bundle\s+["\']([^"\']+\.js)["\']')
+RE_STATIC_JS = re.compile(r'\{%\s*static\s+["\']([^"\']+\.js)["\']')
+RE_LITERAL_JS = re.compile(r'(["\'`])([\w\- ]+)\1')
+RE_SELETOR_CLASSE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+RE_SELETOR_ID = re.compile(r'#(-?[_a-zA-Z][\w-]*)')
+RE_URL = re.compile(r'url\(\s*(["\']?)([^"\')]+)\1\s*\)')
+
+
+def paginas():
+    """Templates que recebem CSS crítico: `PAGINAS` e as páginas do painel."""
+    admin = sorted(
+        f'{DIRETORIO_ADMIN}/{caminho.name}'
+        for caminho in (DIRETORIO_TEMPLATES / DIRETORIO_ADMIN).glob('*.html')
+        if not caminho.name.startswith('_')
+    )
+    return [*PAGINAS, *admin]
+
+
+# --- CSS ---------------------------------------------------------------------
+
+def _pular_string(css, i):
+    m = RE_STRING.match(css, i)
+    return m.end() if m else i + 1
+
+
+def _fim_do_bloco(css, i):
+    """Índice logo depois do `}` que fecha o bloco cujo conteúdo começa em `i`."""
+    nivel = 1
+    while i < len(css):
+        c = css[i]
+        if c in '"\'':
+            i = _pular_string(css, i)
+            continue
+        if c == '{':
+            nivel += 1
+        elif c == '}':
+            nivel -= 1
+            if nivel == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def _analisar(css, i, aninhado):
+    nos = []
+    inicio = i
+    while i < len(css):
+        c = css[i]
+        if c in '"\'':
+            i = _pular_string(css, i)
+        elif c == ';':
+            texto = css[inicio:i].strip()
+            if texto:
+                nos.append(('instrucao', texto))
+            i = inicio = i + 1
+        elif c == '{':
+            cabecalho = css[inicio:i].strip()
+            if cabecalho.startswith(AGRUPADORES):
+                filhos, i = _analisar(css, i + 1, aninhado=True)
+                nos.append(('bloco', cabecalho, filhos))
+            else:
+                fim = _fim_do_bloco(css, i + 1)
+                nos.append(('regra', cabecalho, css[i + 1:fim - 1].strip()))
+                i = fim
+            inicio = i
+        elif c == '}':
+            if aninhado:
+                return nos, i + 1
+            i = inicio = i + 1
+        else:
+            i += 1
+    return nos, i
+
+
+def analisar_css(css):
+    """Árvore de nós `('regra', seletores, corpo)`, `('bloco', cabecalho, filhos)` e `('instrucao', texto)`."""
+    return _analisar(RE_COMENTARIO_CSS.sub('', css), 0, aninhado=False)[0]
+
+
+def dividir_seletores(seletores):
+    """Divide uma lista de seletores nas vírgulas de nível zero (fora de parênteses e colchetes)."""
+    partes, nivel, inicio = [], 0, 0
+    for i, c in enumerate(seletores):
+        if c in '([':
+            nivel += 1
+        elif c in ')]':
+            nivel -= 1
+        elif c == ',' and nivel == 0:
+            partes.append(seletores[inicio:i].strip())
+            inicio = i + 1
+    partes.append(seletores[inicio:].strip())
+    return [parte for parte in partes if parte]
+
+
+def exigencias(seletor):
+    """Classes e ids que o elemento precisa ter para o seletor casar (argumentos de `:not()` etc. não contam)."""
+    seletor = re.sub(r'\[[^\]]*\]', '', seletor)
+    anterior = None
+    while anterior != seletor:
+        anterior, seletor = seletor, re.sub(r'\([^()]*\)', '', seletor)
+    return set(RE_SELETOR_CLASSE.findall(seletor)), set(RE_SELETOR_ID.findall(seletor))
+
+
+def filtrar(nos, classes, ids):
+    """Nós cujas regras podem casar com a página; em cada regra ficam só os seletores que casam."""
+    resultado = []
+    for no in nos:
+        if no[0] == 'bloco':
+            filhos = filtrar(no[2], classes, ids)
+            if filhos:
+                resultado.append(('bloco', no[1], filhos))
+        elif no[0] == 'regra' and no[1].startswith('@'):
+            # @font-face, @keyframes (podados na serialização), @page...
+            resultado.append(no)
+        elif no[0] == 'regra':
+            seletores = []
+            for seletor in dividir_seletores(no[1]):
+                exige_classes, exige_ids = exigencias(seletor)
+                if exige_classes <= classes and exige_ids <= ids:
+                    seletores.append(seletor)
+            if seletores:
+                resultado.append(('regra', ','.join(seletores), no[2]))
+        # Instruções (@import, @charset) ficam de fora: o <head> já carrega as fontes
+    return resultado
+
+
+def _nome_keyframes(cabecalho):
+    m = re.match(r'@(?:-\w+-)?keyframes\s+(\S+)', cabecalho)
+    return m.group(1) if m else None
+
+
+def serializar(nos, animacoes=None):
+    """CSS dos nós; `@keyframes` só entram se o nome estiver em `animacoes` (None: nenhum)."""
+    partes = []
+    for no in nos:
+        if no[0] == 'bloco':
+            partes.append(f'{no[1]}{{{serializar(no[2], animacoes)}}}')
+        elif no[0] == 'regra':
+            nome = _nome_keyframes(no[1])
+            if nome is None or nome in (animacoes or ()):
+                partes.append(f'{no[1]}{{{no[2]}}}')
+        else:
+            partes.append(f'{no[1]};')
+    return '\n'.join(partes)
+
+
+def css_usado(nos, classes, ids):
+    """CSS das regras de `nos` que casam com as classes e ids, com os `@keyframes` que elas usam."""
+    filtrados = filtrar(nos, classes, ids)
+    sem_animacoes = serializar(filtrados)
+    animacoes = {
+        nome for nome in map(_nome_keyframes, _cabecalhos(filtrados))
+        if nome and re.search(rf'(?<![\w-]){re.escape(nome)}(?![\w-])', sem_animacoes)
+    }
+    return serializar(filtrados, animacoes)
+
+
+def _cabecalhos(nos):
+    for no in nos:
+        if no[0] == 'bloco':
+            yield from _cabecalhos(no[2])
+        elif no[0] == 'regra':
+            yield no[1]
+
+
+def urls_absolutas(css, fonte):
+    """Reescreve os `url()` relativos de `fonte` (caminho em static/) para o STATIC_URL, já que o CSS vai inline."""
+    base = posixpath.dirname(fonte)
+
+    def trocar(m):
+        url = m.group(2).strip()
+        if url.startswith(('/', 'data:', 'http:', 'https:', '#')):
+            return m.group(0)
+        return f'url("{settings.STATIC_URL}{posixpath.normpath(posixpath.join(base, url))}")'
+    return RE_URL.sub(trocar, css)
+
+
+# --- Templates ---------------------------------------------------------------
+
+def _scripts(markup):
+    """Código JS referenciado pelo markup: <script> inline, `{% bundle '*.js' %}` e `{% static '*.js' %}`."""
+    codigos = RE_SCRIPT_INLINE.findall(markup)
+    caminhos = [fonte for nome in RE_BUNDLE_JS.findall(markup) for fonte in assets.PACOTES.get(nome, ())]
+    caminhos += RE_STATIC_JS.findall(markup)
+    for caminho in caminhos:
+        arquivo = assets.DIRETORIO_ORIGEM / caminho
+        if arquivo.exists():
+            codigos.append(arquivo.read_text(encoding='utf-8'))
+    return codigos
+
+
+def textos_da_pagina(nome, dobra=True):
+    """Markup (template, incluídos e pais) e scripts da página; com `dobra`, sem o que fica abaixo do `{# dobra #}`."""
+    markup, pendentes, vistos = [], [nome], set()
+    while pendentes:
+        atual = pendentes.pop()
+        if atual in vistos:
+            continue
+        vistos.add(atual)
+        texto = get_template(atual).template.source
+        if dobra and atual == nome:
+            texto = RE_DOBRA.sub('', texto)
+        texto = RE_COMENTARIO_HTML.sub('', texto)
+        markup.append(texto)
+        pendentes.extend(RE_INCLUDE.findall(texto))
+    return markup, _scripts('\n'.join(markup))
+
+
+def tokens(markup, scripts):
+    """Conjuntos `(classes, ids)` citados pelo markup e pelos scripts da página."""
+    classes, ids = set(), set()
+    for texto in [*markup, *scripts]:
+        for _, valor in RE_CLASSE.findall(texto):
+            classes.update(RE_TAG_TEMPLATE.sub(' ', valor).split())
+        for _, valor in RE_ID.findall(texto):
+            ids.update(RE_TAG_TEMPLATE.sub(' ', valor).split())
+    for codigo in scripts:
+        for _, literal in RE_LITERAL_JS.findall(codigo):
+            classes.update(literal.split())
+            ids.update(literal.split())
+    return classes, ids
+
+
+def hash_entradas(*textos):
+    sha = hashlib.sha256()
+    for texto in textos:
+        sha.update(f'{texto}\0'.encode('utf-8'))
+    return sha.hexdigest()
+
+
+# --- Leitura em tempo de renderização ------------------------------------------
+
+_cache = {'mtime': None, 'manifesto': {}}
+
+
+def carregar_manifesto():
+    """Lê o manifesto, relendo o arquivo só quando ele muda (mtime)."""
+    try:
+        mtime = MANIFESTO.stat().st_mtime
+    except OSError:
+        return {}
+    if _cache['mtime'] != mtime:
+        with open(MANIFESTO, encoding='utf-8') as f:
+            _cache['manifesto'] = json.load(f)
+        _cache['mtime'] = mtime
+    return _cache['manifesto']
+
+
+def css_critico_de(template):
+    """CSS crítico gerado para `template` (nome do template da página) ou None."""
+    pagina = carregar_manifesto().get(template)
+    return pagina['css'] if pagina else None
@@ -0,0 +1,38 @@
+"""Estatísticas das conexões com o banco, para dimensionar workers e o pool.
+
+Os números são do processo atual (cada worker do gunicorn/uvicorn tem o seu
+pool ou a sua conexão persistente); `pid` identifica de qual worker vieram.
+"""
+import os
+
+from django.conf import settings
+from django.db import connections
+
+# PRAGMAs do perfil sqlite conferidos na conexão aberta
+PRAGMAS_SQLITE = ('journal_mode', 'synchronous', 'mmap_size', 'busy_timeout', 'temp_store')
+
+
+def estatisticas_conexoes(alias='default'):
+    """Perfil, configuração e números da conexão `alias` no processo atual."""
+    connection = connections[alias]
+    dados = {
+        'pid': os.getpid(),
+        'perfil': getattr(settings, 'DB_ENGINE', connection.vendor),
+        'vendor': connection.vendor,
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+        'conn_health_checks': connection.settings_dict.get('CONN_HEALTH_CHECKS'),
+    }
+
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        # psycopg_pool: pool_size, pool_available, requests_waiting, requests_wait_ms, ...
+        dados['pool'] = pool.get_stats()
+    elif connection.vendor == 'sqlite':
+        dados['pragmas'] = {}
+        with connection.cursor() as cursor:
+            for pragma in PRAGMAS_SQLITE:
+                cursor.execute(f'PRAGMA {pragma}')
+                linha = cursor.fetchone()
+                # Bancos em memória não respondem a alguns PRAGMAs (ex.: mmap_size)
+                dados['pragmas'][pragma] = linha[0] if linha else None
+    return dados
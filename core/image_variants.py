@@ -0,0 +1,58 @@
+"""Variantes (WebP/AVIF em várias larguras) das imagens de static/images/.
+
+Geradas pelo comando `build_image_variants` e lidas pela tag `{% picture %}`
+através do manifesto JSON gravado junto com os arquivos.
+"""
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+DIRETORIO_ORIGEM = settings.BASE_DIR / 'static' / 'images'
+DIRETORIO_VARIANTES = DIRETORIO_ORIGEM / 'variants'
+MANIFESTO = DIRETORIO_VARIANTES / 'manifest.json'
+
+LARGURAS = (480, 960, 1440, 1920)
+# Ordem de preferência no <picture>: o navegador usa o primeiro <source> que suportar
+FORMATOS = ('avif', 'webp')
+EXTENSOES_ORIGEM = ('.png', '.jpg', '.jpeg', '.jfif')
+# `<nome>.<hash>.<largura>.<formato>`, como gravado pelo `build_image_variants`
+NOME_VARIANTE = re.compile(r'^.+\.[0-9a-f]{10}\.\d+\.(?:%s)$' % '|'.join(FORMATOS))
+
+_cache = {'mtime': None, 'manifesto': {}}
+
+
+def prefixo_static(diretorio):
+    """Caminho de `diretorio` relativo ao STATIC_URL (para montar as URLs com `static()`).
+
+    Retorna None se o diretório não estiver dentro de um dos STATICFILES_DIRS.
+    """
+    diretorio = Path(diretorio).resolve()
+    for raiz in settings.STATICFILES_DIRS:
+        prefixo, raiz = raiz if isinstance(raiz, (list, tuple)) else ('', raiz)
+        try:
+            relativo = diretorio.relative_to(Path(raiz).resolve())
+        except ValueError:
+            continue
+        return '/'.join(parte for parte in (prefixo, relativo.as_posix()) if parte not in ('', '.'))
+    return None
+
+
+def carregar_manifesto():
+    """Lê o manifesto, relendo o arquivo só quando ele muda (mtime)."""
+    try:
+        mtime = MANIFESTO.stat().st_mtime
+    except OSError:
+        return {}
+    if _cache['mtime'] != mtime:
+        with open(MANIFESTO, encoding='utf-8') as f:
+            _cache['manifesto'] = json.load(f)
+        _cache['mtime'] = mtime
+    return _cache['manifesto']
+
+
+def variantes_de(nome):
+    """`{formato: [[largura, caminho_static], ...]}` de uma imagem, ou `{}` se ainda não foi processada."""
+    entrada = carregar_manifesto().get(nome)
+    return entrada['variantes'] if entrada else {}
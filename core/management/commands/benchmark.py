@@ -0,0 +1,132 @@
+"""
+Benchmark das páginas com um catálogo sintético grande.
+
+Uso:
+    python manage.py benchmark --products 10000 --concurrency 8 --requests 200
+    python manage.py benchmark --save-baseline benchmarks/baseline.json
+    python manage.py benchmark --baseline benchmarks/baseline.json    # falha se houver regressão
+
+Por padrão o benchmark cria um banco descartável (como o test runner), gera
+o catálogo com `core.catalogo_sintetico` e o apaga no final; `--current-db`
+usa o banco configurado sem semear nada além do pedido em `--products`.
+Para medir um servidor de verdade (gunicorn x uvicorn) use `benchmark_servers`.
+"""
+
+import json
+import tempfile
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from core import benchmark, catalogo_sintetico
+from core.models import Produto
+
+NOMES_CENARIOS = [
+    'home', 'produtos', 'produto_detalhe', 'contato', 'admin_produtos', 'admin_destaques', 'django_admin_produtos',
+]
+
+
+@contextmanager
+def banco_descartavel():
+    """Banco de teste criado e destruído em volta do benchmark (arquivo temporário no SQLite)."""
+    setup_test_environment()
+    try:
+        with tempfile.TemporaryDirectory() as diretorio:
+            settings_dict = connections['default'].settings_dict
+            if settings_dict['ENGINE'].endswith('sqlite3'):
+                # Em arquivo (e não em memória) para as threads dos clientes usarem conexões próprias
+                settings_dict.setdefault('TEST', {})['NAME'] = str(Path(diretorio) / 'benchmark.sqlite3')
+            antigos = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+            try:
+                yield
+            finally:
+                teardown_databases(antigos, verbosity=0)
+    finally:
+        teardown_test_environment()
+
+
+class Command(BaseCommand):
+    help = 'Mede latência (p50/p95/p99), queries e bytes das páginas com um catálogo sintético'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=10000, help='Produtos sintéticos a gerar')
+        parser.add_argument('--seed', type=int, default=42, help='Seed do catálogo sintético')
+        parser.add_argument('--requests', type=int, default=100, help='Requisições medidas por cenário')
+        parser.add_argument('--concurrency', type=int, default=8, help='Clientes simultâneos por cenário')
+        parser.add_argument('--scenario', nargs='*', choices=NOMES_CENARIOS, default=NOMES_CENARIOS,
+                            help='Cenários a medir')
+        parser.add_argument('--baseline', type=str, default='', help='Baseline JSON a comparar')
+        parser.add_argument('--save-baseline', type=str, default='', help='Grava o resultado como baseline JSON')
+        parser.add_argument('--tolerance', type=float, default=benchmark.TOLERANCIA,
+                            help='Folga de latência/bytes antes de acusar regressão (0.2 = 20%%)')
+        parser.add_argument('--cold', action='store_true',
+                            help='Desliga o cache de páginas públicas (mede a renderização completa)')
+        parser.add_argument('--current-db', action='store_true',
+                            help='Usa o banco configurado em vez de um banco descartável')
+
+    def handle(self, *args, **options):
+        if options['current_db']:
+            resultados = self.executar(options)
+        else:
+            with banco_descartavel():
+                resultados = self.executar(options)
+
+        self.imprimir(resultados, options)
+        config = {chave: options[chave] for chave in ('products', 'seed', 'requests', 'concurrency', 'cold')}
+        if options['save_baseline']:
+            destino = Path(options['save_baseline'])
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            destino.write_text(json.dumps({'config': config, 'cenarios': resultados}, indent=2, sort_keys=True))
+            self.stdout.write(self.style.SUCCESS(f'Baseline gravado em {destino}'))
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())
+            if baseline.get('config') != config:
+                self.stdout.write(self.style.WARNING(f"Configuração diferente do baseline: {baseline.get('config')}"))
+            regressoes = benchmark.comparar(resultados, baseline['cenarios'], options['tolerance'])
+            if regressoes:
+                raise CommandError('Regressões em relação ao baseline:\n  ' + '\n  '.join(regressoes))
+            self.stdout.write(self.style.SUCCESS('Sem regressões em relação ao baseline'))
+
+    def executar(self, options):
+        if options['products']:
+            resumo = catalogo_sintetico.gerar_catalogo(options['products'], seed=options['seed'])
+            self.stdout.write(
+                f"Catálogo: {resumo['produtos']} produtos em {resumo['subcategorias']} subcategorias "
+                f"({resumo['segundos']:.1f}s)"
+            )
+        produto = Produto.objects.filter(ativo=True).order_by('ordem', 'nome').first()
+        if produto is None:
+            raise CommandError('Nenhum produto ativo para medir (use --products)')
+        usuario, criado = get_user_model().objects.get_or_create(
+            username=benchmark.USUARIO_BENCHMARK, defaults={'is_staff': True, 'is_superuser': True}
+        )
+
+        resultados = {}
+        # Timeout 0: as páginas nunca ficam no cache, todo request renderiza
+        with override_settings(PAGE_CACHE_TIMEOUT=0) if options['cold'] else nullcontext():
+            for cenario in benchmark.cenarios_padrao(produto.slug):
+                if cenario.nome not in options['scenario']:
+                    continue
+                self.stdout.write(f'Medindo {cenario.nome}...')
+                resultados[cenario.nome] = benchmark.medir_cenario(
+                    cenario, usuario, options['requests'], options['concurrency']
+                )
+        if criado and options['current_db']:
+            usuario.delete()
+        return resultados
+
+    def imprimir(self, resultados, options):
+        self.stdout.write(f"\n{options['requests']} requisições por cenário, {options['concurrency']} cliente(s)")
+        self.stdout.write('Cenário                 Req/s    p50 ms   p95 ms   p99 ms  Queries     KB  Erros')
+        self.stdout.write('-' * 82)
+        for nome, m in resultados.items():
+            self.stdout.write(
+                f"{nome:<22} {m['req_s']:>7.1f}  {m['p50_ms']:>7.1f}  {m['p95_ms']:>7.1f}  {m['p99_ms']:>7.1f}  "
+                f"{m['queries']:>7.1f}  {m['bytes'] / 1024:>5.1f}  {m['erros_http']:>5}"
+            )
@@ -0,0 +1,176 @@
+"""
+Compara o modo WSGI (gunicorn, sync) com o modo ASGI (uvicorn, views assíncronas)
+sob carga concorrente.
+
+Uso:
+    python manage.py benchmark_servers
+    python manage.py benchmark_servers --concurrency 64 --duration 20 --path / --path /produtos/
+    python manage.py benchmark_servers --cold
+
+Cada servidor é iniciado em uma porta livre com o banco e as configurações
+atuais; a carga é gerada por threads com conexões keep-alive (http.client).
+Ao final é impressa uma tabela com requisições/s e latências p50/p95/p99.
+
+Sem --cold as páginas públicas saem do cache de páginas (core.cache) depois
+do aquecimento, então os números medem o servidor servindo o cache; --cold
+desliga o cache (PAGE_CACHE_TIMEOUT=0) para medir as views de fato.
+"""
+
+import http.client
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import percentil
+
+SERVIDORES = {
+    'wsgi': ['gunicorn', 'betondekor.wsgi:application', '--bind', '127.0.0.1:{porta}',
+             '--workers', '{workers}', '--log-level', 'warning'],
+    'asgi': ['uvicorn', 'betondekor.asgi:application', '--host', '127.0.0.1', '--port', '{porta}',
+             '--workers', '{workers}', '--log-level', 'warning'],
+}
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def aguardar_porta(porta, processo, timeout=30):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(('127.0.0.1', porta), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def gerar_carga(porta, caminhos, concorrencia, duracao):
+    """Dispara requisições GET em `concorrencia` threads por `duracao` segundos.
+
+    Retorna `(latencias_em_ms_ordenadas, erros, segundos)`.
+    """
+    latencias = []
+    erros = [0]
+    trava = threading.Lock()
+    fim = time.monotonic() + duracao
+
+    def cliente(indice):
+        conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+        minhas, falhas = [], 0
+        i = indice
+        while time.monotonic() < fim:
+            caminho = caminhos[i % len(caminhos)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                conexao.request('GET', caminho)
+                resposta = conexao.getresponse()
+                resposta.read()
+                # 4xx também é falha: um 403/404/429 rápido não pode contar como requisição servida
+                if not 200 <= resposta.status < 400:
+                    falhas += 1
+                    continue
+            except (OSError, http.client.HTTPException):
+                falhas += 1
+                conexao.close()
+                conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=30)
+                continue
+            minhas.append((time.perf_counter() - inicio) * 1000)
+        conexao.close()
+        with trava:
+            latencias.extend(minhas)
+            erros[0] += falhas
+
+    inicio = time.monotonic()
+    threads = [threading.Thread(target=cliente, args=(n,)) for n in range(concorrencia)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencias), erros[0], time.monotonic() - inicio
+
+
+class Command(BaseCommand):
+    help = 'Compara requisições/s e latência (p50/p95/p99) entre os modos WSGI e ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', nargs='*', choices=list(SERVIDORES), default=list(SERVIDORES),
+                            help='Servidores a medir')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Caminho requisitado (repetível; padrão: home, produtos e um produto)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Clientes simultâneos')
+        parser.add_argument('--duration', type=float, default=10.0, help='Segundos de carga por servidor')
+        parser.add_argument('--warmup', type=float, default=2.0, help='Segundos de aquecimento (não medidos)')
+        parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', '2')),
+                            help='Processos de cada servidor')
+        parser.add_argument('--cold', action='store_true',
+                            help='Desliga o cache de páginas públicas (mede a renderização completa)')
+
+    def handle(self, *args, **options):
+        caminhos = options['paths'] or self.caminhos_padrao()
+        resultados = []
+        for modo in options['mode']:
+            executavel = SERVIDORES[modo][0]
+            if not shutil.which(executavel):
+                self.stdout.write(self.style.WARNING(f'{modo}: {executavel} não instalado, pulando'))
+                continue
+            resultados.append((modo, self.medir(modo, caminhos, options)))
+
+        if not resultados:
+            raise CommandError('Nenhum servidor disponível para medir')
+
+        self.stdout.write(f"\nCaminhos: {', '.join(caminhos)} | concorrência {options['concurrency']} | "
+                          f"{options['duration']:.0f}s por servidor | {options['workers']} worker(s) | "
+                          f"cache de páginas {'desligado' if options['cold'] else 'ligado'}")
+        self.stdout.write('Modo   Req/s     p50 ms   p95 ms   p99 ms   Erros')
+        self.stdout.write('-' * 52)
+        for modo, (latencias, erros, segundos) in resultados:
+            self.stdout.write(
+                f'{modo:<6} {len(latencias) / segundos:>7.1f}  {percentil(latencias, 50):>7.1f}  '
+                f'{percentil(latencias, 95):>7.1f}  {percentil(latencias, 99):>7.1f}  {erros:>6}'
+            )
+
+    def caminhos_padrao(self):
+        from core.models import Produto
+
+        caminhos = ['/', '/produtos/']
+        slug = Produto.objects.filter(ativo=True).values_list('slug', flat=True).first()
+        if slug:
+            caminhos.append(f'/produtos/{slug}/')
+        return caminhos
+
+    def medir(self, modo, caminhos, options):
+        porta = porta_livre()
+        comando = [parte.format(porta=porta, workers=options['workers']) for parte in SERVIDORES[modo]]
+        ambiente = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'betondekor.settings'),
+                    'DJANGO_ASYNC_VIEWS': '1' if modo == 'asgi' else '0'}
+        if options['cold']:
+            ambiente['PAGE_CACHE_TIMEOUT'] = '0'
+        self.stdout.write(f'{modo}: iniciando {" ".join(comando)}')
+        processo = subprocess.Popen(comando, cwd=settings.BASE_DIR, env=ambiente,
+                                    stdout=subprocess.DEVNULL, stderr=sys.stderr)
+        try:
+            if not aguardar_porta(porta, processo):
+                raise CommandError(f'{modo}: o servidor não subiu na porta {porta}')
+            if options['warmup'] > 0:
+                gerar_carga(porta, caminhos, options['concurrency'], options['warmup'])
+            return gerar_carga(porta, caminhos, options['concurrency'], options['duration'])
+        finally:
+            processo.terminate()
+            try:
+                processo.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                processo.kill()
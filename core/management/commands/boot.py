@@ -0,0 +1,343 @@
+"""
+Sequência de inicialização do container, idempotente e com impressão digital por etapa.
+
+Uso:
+    python manage.py boot
+    python manage.py boot --force collectstatic --skip superuser
+
+Cada etapa só roda quando a sua entrada mudou:
+
+    migrate           há migrações do grafo ainda não aplicadas no banco
+    image_variants    o conteúdo de static/images/ mudou (hash guardado junto às variantes)
+    assets            as fontes dos pacotes de CSS/JS mudaram (hash guardado junto aos pacotes)
+    critical_css      os templates ou as fontes dos pacotes mudaram (hash guardado junto ao CSS crítico)
+    collectstatic     a árvore de arquivos estáticos mudou (hash guardado em STATIC_ROOT)
+    cloudinary        as imagens locais ainda não migradas mudaram (MIGRATE_IMAGES_ON_BOOT=1; hash em MEDIA_ROOT)
+    superuser         o usuário admin ainda não existe
+
+Etapas independentes (banco x estáticos) rodam em paralelo; ao final é
+impresso o tempo de cada etapa.
+"""
+
+import hashlib
+import io
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Q
+
+from core import assets, css_critico, image_variants
+from core.management.commands.migrate_images_to_cloudinary import local_path
+
+ARQUIVO_FINGERPRINT = '.boot-fingerprint'
+# Padrões ignorados pelo collectstatic por padrão
+IGNORAR_ESTATICOS = ['CVS', '.*', '*~']
+
+
+def hash_arquivos(caminhos_e_stats, *extras):
+    """Hash barato de uma árvore: caminho, tamanho e mtime de cada arquivo (sem ler o conteúdo)."""
+    sha = hashlib.sha256()
+    for extra in extras:
+        sha.update(repr(extra).encode())
+    for caminho, stat in sorted(caminhos_e_stats):
+        sha.update(f'{caminho}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode())
+    return sha.hexdigest()
+
+
+def ler_fingerprint(diretorio):
+    try:
+        return (Path(diretorio) / ARQUIVO_FINGERPRINT).read_text().strip()
+    except OSError:
+        return None
+
+
+def gravar_fingerprint(diretorio, valor):
+    Path(diretorio).mkdir(parents=True, exist_ok=True)
+    (Path(diretorio) / ARQUIVO_FINGERPRINT).write_text(valor)
+
+
+class Etapa(ABC):
+    """Uma etapa do boot: `verificar()` diz se precisa rodar e por quê; `executar()` faz o trabalho."""
+    nome = ''
+    depende_de = ()
+
+    def verificar(self):
+        return True, ''
+
+    @abstractmethod
+    def executar(self, saida):
+        """Faz o trabalho da etapa, escrevendo o que tiver a dizer em `saida`."""
+
+    def concluir(self):
+        """Chamado depois de `executar()` com sucesso (ex.: gravar a impressão digital)."""
+
+
+class Migrate(Etapa):
+    nome = 'migrate'
+
+    def verificar(self):
+        connection = connections[DEFAULT_DB_ALIAS]
+        executor = MigrationExecutor(connection)
+        plano = executor.migration_plan(executor.loader.graph.leaf_nodes())
+        grafo = hashlib.sha256(repr(sorted(executor.loader.graph.nodes)).encode()).hexdigest()[:12]
+        if plano:
+            return True, f'{len(plano)} migração(ões) pendente(s) (grafo {grafo})'
+        return False, f'grafo {grafo} já aplicado'
+
+    def executar(self, saida):
+        call_command('migrate', interactive=False, verbosity=1, stdout=saida)
+
+
+class ImageVariants(Etapa):
+    nome = 'image_variants'
+
+    def fingerprint(self):
+        origem = image_variants.DIRETORIO_ORIGEM
+        arquivos = [
+            (caminho.name, caminho.stat())
+            for caminho in origem.iterdir()
+            if caminho.is_file() and caminho.suffix.lower() in image_variants.EXTENSOES_ORIGEM
+        ] if origem.exists() else []
+        return hash_arquivos(arquivos, image_variants.LARGURAS, image_variants.FORMATOS)
+
+    def verificar(self):
+        self.valor = self.fingerprint()
+        if ler_fingerprint(image_variants.DIRETORIO_VARIANTES) == self.valor:
+            return False, 'imagens de origem sem mudanças'
+        return True, 'imagens de origem mudaram'
+
+    def executar(self, saida):
+        call_command('build_image_variants', stdout=saida)
+
+    def concluir(self):
+        gravar_fingerprint(image_variants.DIRETORIO_VARIANTES, self.valor)
+
+
+class Assets(Etapa):
+    nome = 'assets'
+
+    def fingerprint(self):
+        fontes = sorted({fonte for fontes in assets.PACOTES.values() for fonte in fontes})
+        arquivos = [
+            (fonte, (assets.DIRETORIO_ORIGEM / fonte).stat())
+            for fonte in fontes if (assets.DIRETORIO_ORIGEM / fonte).exists()
+        ]
+        return hash_arquivos(arquivos, assets.PACOTES)
+
+    def verificar(self):
+        self.valor = self.fingerprint()
+        if ler_fingerprint(assets.DIRETORIO_PACOTES) == self.valor:
+            return False, 'fontes dos pacotes sem mudanças'
+        return True, 'fontes dos pacotes mudaram'
+
+    def executar(self, saida):
+        call_command('build_assets', stdout=saida)
+
+    def concluir(self):
+        gravar_fingerprint(assets.DIRETORIO_PACOTES, self.valor)
+
+
+class CssCritico(Etapa):
+    nome = 'critical_css'
+
+    def fingerprint(self):
+        fontes = sorted({fonte for fontes in assets.PACOTES.values() for fonte in fontes})
+        arquivos = [
+            (fonte, (assets.DIRETORIO_ORIGEM / fonte).stat())
+            for fonte in fontes if (assets.DIRETORIO_ORIGEM / fonte).exists()
+        ]
+        arquivos += [
+            (str(caminho.relative_to(css_critico.DIRETORIO_TEMPLATES)), caminho.stat())
+            for caminho in css_critico.DIRETORIO_TEMPLATES.rglob('*.html')
+        ]
+        return hash_arquivos(arquivos, assets.PACOTES, css_critico.PAGINAS)
+
+    def verificar(self):
+        self.valor = self.fingerprint()
+        if ler_fingerprint(css_critico.DIRETORIO_CRITICO) == self.valor:
+            return False, 'templates e CSS sem mudanças'
+        return True, 'templates ou CSS mudaram'
+
+    def executar(self, saida):
+        call_command('build_critical_css', stdout=saida)
+
+    def concluir(self):
+        gravar_fingerprint(css_critico.DIRETORIO_CRITICO, self.valor)
+
+
+class CollectStatic(Etapa):
+    nome = 'collectstatic'
+    # As variantes, os pacotes e o CSS crítico gerados fazem parte da árvore de estáticos
+    depende_de = ('image_variants', 'assets', 'critical_css')
+
+    def fingerprint(self):
+        arquivos = []
+        for finder in get_finders():
+            for caminho, storage in finder.list(IGNORAR_ESTATICOS):
+                arquivos.append((caminho, os.stat(storage.path(caminho))))
+        return hash_arquivos(arquivos, getattr(settings, 'STORAGES', {}).get('staticfiles'))
+
+    def verificar(self):
+        self.valor = self.fingerprint()
+        if ler_fingerprint(settings.STATIC_ROOT) == self.valor:
+            return False, 'árvore de estáticos sem mudanças'
+        return True, 'árvore de estáticos mudou'
+
+    def executar(self, saida):
+        call_command('collectstatic', interactive=False, verbosity=1, stdout=saida)
+
+    def concluir(self):
+        gravar_fingerprint(settings.STATIC_ROOT, self.valor)
+
+
+class Cloudinary(Etapa):
+    nome = 'cloudinary'
+    depende_de = ('migrate',)
+
+    def pendentes(self):
+        """Caminho local da imagem de cada produto ainda sem imagem no Cloudinary."""
+        from core.models import Produto
+
+        nomes = (
+            Produto.objects.exclude(imagem_nome='')
+            .filter(Q(imagem__isnull=True) | Q(imagem=''))
+            .values_list('imagem_nome', flat=True)
+        )
+        return [caminho for caminho in map(local_path, nomes) if caminho is not None]
+
+    def fingerprint(self, pendentes):
+        # Os arquivos que faltam também entram: só rodam de novo quando aparecerem
+        arquivos = [(str(caminho), caminho.stat()) for caminho in pendentes if caminho.exists()]
+        return hash_arquivos(arquivos, sorted(str(caminho) for caminho in pendentes))
+
+    def verificar(self):
+        if os.getenv('MIGRATE_IMAGES_ON_BOOT') != '1':
+            return False, 'desativado (MIGRATE_IMAGES_ON_BOOT != 1)'
+        pendentes = self.pendentes()
+        if not pendentes:
+            return False, 'nenhuma imagem pendente'
+        self.valor = self.fingerprint(pendentes)
+        if ler_fingerprint(settings.MEDIA_ROOT) == self.valor:
+            return False, f'{len(pendentes)} imagem(ns) pendente(s) sem mudanças desde o último envio'
+        if not any(caminho.exists() for caminho in pendentes):
+            # Nada a enviar: guarda a impressão digital para não refazer a busca a cada boot
+            gravar_fingerprint(settings.MEDIA_ROOT, self.valor)
+            return False, f'{len(pendentes)} produto(s) sem arquivo local'
+        return True, f'{len(pendentes)} produto(s) com imagem local'
+
+    def executar(self, saida):
+        call_command('migrate_images_to_cloudinary', stdout=saida)
+
+    def concluir(self):
+        # Se só sobraram produtos sem arquivo, o próximo boot pula; envios com falha são tentados de novo
+        pendentes = self.pendentes()
+        if not any(caminho.exists() for caminho in pendentes):
+            gravar_fingerprint(settings.MEDIA_ROOT, self.fingerprint(pendentes))
+
+
+class Superuser(Etapa):
+    nome = 'superuser'
+    depende_de = ('migrate',)
+
+    def verificar(self):
+        from django.contrib.auth import get_user_model
+
+        if get_user_model().objects.filter(username='admin').exists():
+            return False, 'usuário admin já existe'
+        return True, 'usuário admin não existe'
+
+    def executar(self, saida):
+        from django.contrib.auth import get_user_model
+
+        get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', os.getenv('DJANGO_SUPERUSER_PASSWORD', 'admin123')
+        )
+        saida.write('Superusuário admin criado\n')
+
+
+ETAPAS = (Migrate, ImageVariants, Assets, CssCritico, CollectStatic, Cloudinary, Superuser)
+
+
+class Command(BaseCommand):
+    help = 'Inicializa o container rodando só as etapas cujas entradas mudaram (em paralelo quando possível)'
+
+    def add_arguments(self, parser):
+        nomes = [etapa.nome for etapa in ETAPAS]
+        parser.add_argument('--force', nargs='*', choices=nomes, default=None,
+                            help='Roda as etapas indicadas (ou todas, sem argumentos) mesmo sem mudanças')
+        parser.add_argument('--skip', nargs='*', choices=nomes, default=[], help='Etapas a pular')
+        parser.add_argument('--workers', type=int, default=2, help='Etapas executadas em paralelo')
+
+    def handle(self, *args, **options):
+        forcar = options['force']
+        forcar = {etapa.nome for etapa in ETAPAS} if forcar == [] else set(forcar or ())
+        etapas = {classe.nome: classe() for classe in ETAPAS if classe.nome not in options['skip']}
+
+        inicio = time.monotonic()
+        resultados = {}
+        em_andamento = {}
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            while len(resultados) < len(etapas):
+                for nome, etapa in etapas.items():
+                    if nome in resultados or nome in em_andamento.values():
+                        continue
+                    dependencias = [d for d in etapa.depende_de if d in etapas]
+                    if any(resultados.get(d, {}).get('status') == 'falhou' for d in dependencias):
+                        resultados[nome] = {'status': 'falhou', 'segundos': 0.0, 'motivo': 'dependência falhou'}
+                        continue
+                    if all(d in resultados for d in dependencias):
+                        em_andamento[pool.submit(self.rodar, etapa, nome in forcar)] = nome
+
+                if not em_andamento:
+                    continue
+                concluidos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for futuro in concluidos:
+                    nome = em_andamento.pop(futuro)
+                    resultados[nome] = futuro.result()
+                    if resultados[nome].get('saida'):
+                        self.stdout.write(resultados[nome]['saida'].rstrip())
+
+        self.relatorio(etapas, resultados, time.monotonic() - inicio)
+        falhas = [nome for nome, resultado in resultados.items() if resultado['status'] == 'falhou']
+        if falhas:
+            raise CommandError(f'Etapas com falha: {", ".join(falhas)}')
+
+    def rodar(self, etapa, forcar):
+        """Executa uma etapa (em uma thread do pool) e devolve status, tempo e saída."""
+        inicio = time.monotonic()
+        saida = io.StringIO()
+        try:
+            precisa, motivo = etapa.verificar()
+            if forcar:
+                precisa, motivo = True, f'forçado ({motivo})'
+            if precisa:
+                etapa.executar(saida)
+                etapa.concluir()
+            status = 'executou' if precisa else 'pulou'
+        except Exception as e:
+            status, motivo = 'falhou', f'{type(e).__name__}: {e}'
+        finally:
+            # Cada thread abre a própria conexão; não deixa conexões penduradas
+            connections.close_all()
+        return {'status': status, 'segundos': time.monotonic() - inicio, 'motivo': motivo, 'saida': saida.getvalue()}
+
+    def relatorio(self, etapas, resultados, total):
+        self.stdout.write('\nEtapa            Status     Tempo   Motivo')
+        self.stdout.write('-' * 72)
+        for nome in etapas:
+            resultado = resultados[nome]
+            estilo = {'falhou': self.style.ERROR, 'executou': self.style.SUCCESS}.get(resultado['status'], str)
+            self.stdout.write(estilo(
+                f"{nome:<16} {resultado['status']:<9} {resultado['segundos']:>6.2f}s  {resultado['motivo']}"
+            ))
+        self.stdout.write('-' * 72)
+        self.stdout.write(f'Total: {total:.2f}s')
@@ -0,0 +1,95 @@
+"""
+Gera os pacotes de CSS/JS minificados definidos em core.assets.PACOTES.
+
+Uso:
+    python manage.py build_assets
+    python manage.py build_assets --force
+
+O processamento é incremental: pacotes cujas fontes não mudaram (hash) desde
+a última execução são pulados. O resultado é descrito em
+static/bundles/manifest.json, lido pela tag {% bundle %}. Rode antes do
+collectstatic (o `boot` já faz isso), que acrescenta o hash ao nome e gera
+as versões .gz e .br.
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import rcssmin
+import rjsmin
+from django.core.management.base import BaseCommand, CommandError
+
+from core import assets
+
+
+def minificar(nome, textos):
+    if nome.endswith('.css'):
+        return rcssmin.cssmin('\n'.join(textos))
+    # `;` entre os arquivos: um script sem ponto e vírgula final não "cola" no próximo
+    return ';\n'.join(rjsmin.jsmin(texto).strip().rstrip(';') for texto in textos) + ';\n'
+
+
+class Command(BaseCommand):
+    help = 'Concatena e minifica os pacotes de CSS/JS de core.assets (incremental por hash)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source-dir', type=str, default=str(assets.DIRETORIO_ORIGEM),
+                            help='Diretório dos arquivos de origem (static/)')
+        parser.add_argument('--output-dir', type=str, default=str(assets.DIRETORIO_PACOTES),
+                            help='Diretório onde gravar os pacotes e o manifest.json')
+        parser.add_argument('--force', action='store_true', help='Regera todos os pacotes, mesmo sem mudanças')
+
+    def handle(self, *args, **options):
+        origem = Path(options['source_dir'])
+        destino = Path(options['output_dir'])
+        destino.mkdir(parents=True, exist_ok=True)
+        manifesto_path = destino / 'manifest.json'
+
+        manifesto_antigo = {}
+        if manifesto_path.exists():
+            with open(manifesto_path, encoding='utf-8') as f:
+                manifesto_antigo = json.load(f)
+
+        inicio = time.monotonic()
+        manifesto = {}
+        gerados = 0
+        for nome, fontes in assets.PACOTES.items():
+            try:
+                textos = [(origem / fonte).read_text(encoding='utf-8') for fonte in fontes]
+            except FileNotFoundError as e:
+                raise CommandError(f'Pacote {nome}: arquivo de origem não encontrado ({e.filename})')
+            sha = hashlib.sha256()
+            for fonte, texto in zip(fontes, textos):
+                sha.update(f'{fonte}\0{texto}\0'.encode('utf-8'))
+            hash_fontes = sha.hexdigest()
+
+            anterior = manifesto_antigo.get(nome)
+            if not options['force'] and anterior and anterior['hash'] == hash_fontes and (destino / nome).exists():
+                manifesto[nome] = anterior
+                continue
+
+            conteudo = minificar(nome, textos)
+            (destino / nome).write_text(conteudo, encoding='utf-8')
+            manifesto[nome] = {
+                'hash': hash_fontes,
+                'fontes': list(fontes),
+                'bytes_origem': sum(len(texto.encode('utf-8')) for texto in textos),
+                'bytes': len(conteudo.encode('utf-8')),
+            }
+            gerados += 1
+            self.stdout.write(f'  ✓ {nome}: {manifesto[nome]["bytes_origem"]} -> {manifesto[nome]["bytes"]} bytes')
+
+        removidos = 0
+        for arquivo in destino.iterdir():
+            if arquivo.is_file() and arquivo.name not in manifesto and arquivo.name not in ('manifest.json', '.boot-fingerprint'):
+                arquivo.unlink()
+                removidos += 1
+        with open(manifesto_path, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=2, sort_keys=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{gerados} pacote(s) gerado(s), {len(manifesto) - gerados} sem mudanças, '
+            f'{removidos} obsoleto(s) removido(s) em {time.monotonic() - inicio:.1f}s'
+        ))
@@ -0,0 +1,91 @@
+"""
+Gera o CSS crítico de cada página (core.css_critico) a partir do pacote site.css.
+
+Uso:
+    python manage.py build_critical_css
+    python manage.py build_critical_css --force
+
+O processamento é incremental: páginas cujo template (com incluídos, pais e
+scripts) e CSS de origem não mudaram (hash) desde a última execução são
+puladas. O resultado fica em static/bundles/critico/manifest.json, lido pela
+tag {% css_critico %}.
+"""
+
+import json
+import time
+from pathlib import Path
+
+import rcssmin
+from django.core.management.base import BaseCommand, CommandError
+from django.template import TemplateDoesNotExist
+
+from core import assets, css_critico
+
+
+class Command(BaseCommand):
+    help = 'Extrai o CSS crítico (acima da dobra) de cada página a partir do site.css (incremental por hash)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', type=str, default=str(css_critico.DIRETORIO_CRITICO),
+                            help='Diretório onde gravar o manifest.json com o CSS de cada página')
+        parser.add_argument('--force', action='store_true', help='Regera todas as páginas, mesmo sem mudanças')
+
+    def handle(self, *args, **options):
+        destino = Path(options['output_dir'])
+        destino.mkdir(parents=True, exist_ok=True)
+        manifesto_path = destino / 'manifest.json'
+
+        manifesto_antigo = {}
+        if manifesto_path.exists():
+            with open(manifesto_path, encoding='utf-8') as f:
+                manifesto_antigo = json.load(f)
+
+        fontes = assets.PACOTES[css_critico.PACOTE]
+        try:
+            css = '\n'.join(
+                css_critico.urls_absolutas((assets.DIRETORIO_ORIGEM / fonte).read_text(encoding='utf-8'), fonte)
+                for fonte in fontes
+            )
+        except FileNotFoundError as e:
+            raise CommandError(f'Pacote {css_critico.PACOTE}: arquivo de origem não encontrado ({e.filename})')
+
+        inicio = time.monotonic()
+        arvore = None
+        manifesto = {}
+        gerados = 0
+        for pagina in css_critico.paginas():
+            try:
+                markup, scripts = css_critico.textos_da_pagina(pagina)
+                completo = css_critico.textos_da_pagina(pagina, dobra=False)
+            except TemplateDoesNotExist as e:
+                raise CommandError(f'Página {pagina}: template não encontrado ({e})')
+            hash_entradas = css_critico.hash_entradas(css, *markup, *scripts, *completo[0])
+
+            anterior = manifesto_antigo.get(pagina)
+            if not options['force'] and anterior and anterior['hash'] == hash_entradas:
+                manifesto[pagina] = anterior
+                continue
+
+            if arvore is None:
+                arvore = css_critico.analisar_css(css)
+            critico = rcssmin.cssmin(css_critico.css_usado(arvore, *css_critico.tokens(markup, scripts)))
+            usado = rcssmin.cssmin(css_critico.css_usado(arvore, *css_critico.tokens(*completo)))
+            manifesto[pagina] = {
+                'hash': hash_entradas,
+                'css': critico,
+                'bytes': len(critico.encode('utf-8')),
+                'bytes_usado': len(usado.encode('utf-8')),
+            }
+            gerados += 1
+            self.stdout.write(
+                f'  ✓ {pagina}: {manifesto[pagina]["bytes"]} bytes inline '
+                f'({manifesto[pagina]["bytes_usado"]} usados pela página inteira)'
+            )
+
+        with open(manifesto_path, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=2, sort_keys=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{gerados} página(s) gerada(s), {len(manifesto) - gerados} sem mudanças '
+            f'({len(css.encode("utf-8"))} bytes de CSS de origem) em {time.monotonic() - inicio:.1f}s'
+        ))
@@ -0,0 +1,183 @@
+"""
+Gera variantes WebP/AVIF redimensionadas das imagens de static/images/.
+
+Uso:
+    python manage.py build_image_variants
+    python manage.py build_image_variants --workers 4 --force
+
+O processamento é incremental: imagens cujo conteúdo (hash) não mudou desde
+a última execução são puladas. O resultado é descrito em
+static/images/variants/manifest.json, lido pela tag {% picture %}.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
+from PIL import Image, ImageOps, features
+
+from core import image_variants
+
+
+def hash_do_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def gerar_variantes(origem, hash_origem, destino, prefixo, larguras, formatos, qualidade):
+    """Executado nos processos do pool: gera as variantes de uma imagem e retorna a entrada do manifesto."""
+    origem = Path(origem)
+    base = f'{slugify(origem.stem) or "imagem"}.{hash_origem[:10]}'
+    with Image.open(origem) as img:
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA' if img.mode in ('LA', 'P', 'PA') else 'RGB')
+
+    largura_original, altura_original = img.size
+    alvos = sorted({min(largura, largura_original) for largura in larguras})
+    variantes = {formato: [] for formato in formatos}
+    for largura in alvos:
+        altura = max(1, round(altura_original * largura / largura_original))
+        redimensionada = img if largura == largura_original else img.resize((largura, altura), Image.LANCZOS)
+        for formato in formatos:
+            nome = f'{base}.{largura}.{formato}'
+            redimensionada.save(Path(destino) / nome, format=formato.upper(), quality=qualidade)
+            variantes[formato].append([largura, f'{prefixo}/{nome}'])
+
+    return {
+        'hash': hash_origem,
+        'largura': largura_original,
+        'altura': altura_original,
+        'variantes': variantes,
+    }
+
+
+def arquivos_do_manifesto(manifesto):
+    return {
+        Path(caminho).name
+        for entrada in manifesto.values()
+        for variantes in entrada['variantes'].values()
+        for _, caminho in variantes
+    }
+
+
+class Command(BaseCommand):
+    help = 'Gera variantes WebP/AVIF redimensionadas das imagens estáticas (incremental por hash)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source-dir', type=str, default=str(image_variants.DIRETORIO_ORIGEM),
+                            help='Diretório das imagens originais')
+        parser.add_argument('--output-dir', type=str, default=str(image_variants.DIRETORIO_VARIANTES),
+                            help='Diretório onde gravar as variantes e o manifest.json')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Número de processos usados na conversão')
+        parser.add_argument('--quality', type=int, default=70, help='Qualidade de compressão (0-100)')
+        parser.add_argument('--force', action='store_true', help='Regera todas as variantes, mesmo sem mudanças')
+
+    def handle(self, *args, **options):
+        origem = Path(options['source_dir'])
+        destino = Path(options['output_dir'])
+        prefixo = image_variants.prefixo_static(destino)
+        if prefixo is None:
+            raise CommandError(f'--output-dir precisa ficar dentro de STATICFILES_DIRS: {destino}')
+        destino.mkdir(parents=True, exist_ok=True)
+        manifesto_path = destino / 'manifest.json'
+
+        formatos = [f for f in image_variants.FORMATOS if features.check(f)]
+        if not formatos:
+            self.stdout.write(self.style.ERROR('Pillow sem suporte a WebP/AVIF; nada a fazer.'))
+            return
+        if len(formatos) < len(image_variants.FORMATOS):
+            self.stdout.write(self.style.WARNING(f'Formatos disponíveis neste Pillow: {", ".join(formatos)}'))
+
+        manifesto_antigo = {}
+        if manifesto_path.exists():
+            with open(manifesto_path, encoding='utf-8') as f:
+                manifesto_antigo = json.load(f)
+
+        inicio = time.monotonic()
+        manifesto = {}
+        pendentes = {}
+        for caminho in sorted(origem.iterdir()):
+            if not caminho.is_file() or caminho.suffix.lower() not in image_variants.EXTENSOES_ORIGEM:
+                continue
+            hash_origem = hash_do_arquivo(caminho)
+            anterior = manifesto_antigo.get(caminho.name)
+            if not options['force'] and self._atualizado(anterior, hash_origem, formatos, destino, prefixo):
+                manifesto[caminho.name] = anterior
+            else:
+                pendentes[caminho.name] = (caminho, hash_origem)
+
+        args_comuns = (str(destino), prefixo, image_variants.LARGURAS, formatos, options['quality'])
+        falhas = 0
+        if options['workers'] > 1 and len(pendentes) > 1:
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                futuros = {
+                    pool.submit(gerar_variantes, str(caminho), hash_origem, *args_comuns): nome
+                    for nome, (caminho, hash_origem) in pendentes.items()
+                }
+                for futuro in as_completed(futuros):
+                    falhas += self._registrar(manifesto, futuros[futuro], futuro.result)
+        else:
+            for nome, (caminho, hash_origem) in pendentes.items():
+                falhas += self._registrar(
+                    manifesto, nome, lambda: gerar_variantes(str(caminho), hash_origem, *args_comuns)
+                )
+
+        inalterados = len(manifesto) - (len(pendentes) - falhas)
+        removidos = self._remover_orfaos(destino, manifesto, manifesto_antigo)
+        with open(manifesto_path, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=2, sort_keys=True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(pendentes) - falhas} imagem(ns) processada(s), '
+            f'{inalterados} sem mudanças, {falhas} falha(s), '
+            f'{removidos} variante(s) obsoleta(s) removida(s) em {time.monotonic() - inicio:.1f}s'
+        ))
+
+    def _atualizado(self, entrada, hash_origem, formatos, destino, prefixo):
+        if not entrada or entrada.get('hash') != hash_origem:
+            return False
+        for formato in formatos:
+            variantes = entrada['variantes'].get(formato)
+            if not variantes:
+                return False
+            for _, caminho in variantes:
+                if caminho != f'{prefixo}/{Path(caminho).name}' or not (destino / Path(caminho).name).exists():
+                    return False
+        return True
+
+    def _registrar(self, manifesto, nome, obter_resultado):
+        try:
+            manifesto[nome] = obter_resultado()
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'Erro ao processar {nome}: {e}'))
+            return 1
+        self.stdout.write(f'  ✓ {nome}')
+        return 0
+
+    def _remover_orfaos(self, destino, manifesto, manifesto_antigo):
+        """Apaga as variantes que saíram do manifesto.
+
+        Só arquivos com o nome de uma variante ou listados no manifesto anterior:
+        um --output-dir apontado por engano para as imagens originais não as apaga.
+        """
+        em_uso = arquivos_do_manifesto(manifesto)
+        anteriores = arquivos_do_manifesto(manifesto_antigo)
+        removidos = 0
+        for arquivo in destino.iterdir():
+            if not arquivo.is_file() or arquivo.name in em_uso:
+                continue
+            if arquivo.name in anteriores or image_variants.NOME_VARIANTE.match(arquivo.name):
+                arquivo.unlink()
+                removidos += 1
+        return removidos
@@ -27,6 +27,17 @@ class Command(BaseCommand):
             default=None,
             help='Diretório onde salvar as imagens (padrão: figma_images/)'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Downloads simultâneos (padrão: 8)'
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Ignora o documento em cache (.figma_cache/) e baixa o arquivo inteiro de novo'
+        )
 
     def handle(self, *args, **options):
         file_key = options['file_key']
@@ -36,12 +47,13 @@ class Command(BaseCommand):
         self.stdout.write(f'FILE_KEY: {file_key}')
         
         try:
-            downloader = FigmaImageDownloader(file_key, output_dir)
-            result = downloader.download_all_images()
+            downloader = FigmaImageDownloader(file_key, output_dir, max_workers=options['workers'])
+            result = downloader.download_all_images(use_cache=not options['no_cache'])
             
             self.stdout.write(self.style.SUCCESS(
                 f'\n✓ Download concluído! '
-                f'{result["downloaded"]}/{result["total"]} imagens baixadas.'
+                f'{result["downloaded"]}/{result["total"]} imagens baixadas, '
+                f'{result["skipped"]} já existiam.'
             ))
             
             if result['failed'] > 0:
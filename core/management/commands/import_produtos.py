@@ -1,12 +1,69 @@
 import json
 import os
+import time
+from contextlib import nullcontext
+
+from django.core.exceptions import ValidationError
 from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
-from core.models import Produto, CategoriaPrincipal, Subcategoria
+from django.db import DatabaseError, transaction
+
+from core.cache import invalidar_paginas
+from core.models import SLUG_VALIDO, SLUGS_RESERVADOS, Produto, CategoriaPrincipal, Subcategoria, escolher_slug
+
+# Product fields copied verbatim from the backup (None becomes the field default)
+PRODUTO_CAMPOS = (
+    'descricao', 'tag', 'imagem', 'imagem_2', 'imagem_3', 'imagem_nome', 'dimensoes',
+    'cor', 'unidade_venda', 'especificacoes', 'ativo', 'ordem',
+)
+
+
+def iter_json_objects(stream, chunk_size=64 * 1024):
+    """Yield the objects of a top-level JSON array (or JSON Lines) without loading the whole file.
+
+    The file is read in `chunk_size` blocks and each object is decoded as
+    soon as it is complete, so memory stays proportional to one object.
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size).lstrip('\ufeff')
+    pos = 0
+    eof = False
+    in_array = None
+
+    while True:
+        # Skip whitespace and separators, refilling the buffer when needed
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ','):
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = stream.read(chunk_size), 0
+            eof = not buffer
+
+        if pos >= len(buffer):
+            return
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+                continue
+        if in_array and buffer[pos] == ']':
+            return
+
+        try:
+            obj, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = stream.read(chunk_size)
+            eof = not more
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield obj
+        pos = end
 
 
 class Command(BaseCommand):
-    help = 'Import products from JSON backup file'
+    help = 'Import products (and their categories) from a JSON backup file'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -15,6 +72,13 @@ class Command(BaseCommand):
             default='produtos_backup.json',
             help='Path to the JSON backup file'
         )
+        parser.add_argument('--encoding', type=str, default='utf-8', help='Backup file encoding')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Products inserted per bulk_create / transaction')
+        parser.add_argument('--update-existing', action='store_true',
+                            help='Update products whose slug already exists instead of skipping them')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Run the whole import and roll it back at the end')
 
     def handle(self, *args, **options):
         file_path = options['file']
@@ -25,76 +89,185 @@ class Command(BaseCommand):
             )
             return
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        imported_count = 0
-        skipped_count = 0
-
-        for item in data:
-            if item['model'] == 'core.produto':
-                fields = item['fields']
+        self.batch_size = options['batch_size']
+        self.update_existing = options['update_existing']
+        self.imported_count = 0
+        self.updated_count = 0
+        self.skipped_count = 0
+        self.error_count = 0
+        self.pending = []
+        self.start = time.monotonic()
 
-                # Check if product already exists
-                if Produto.objects.filter(slug=fields.get('slug')).exists():
-                    self.stdout.write(
-                        self.style.WARNING(f"Product {fields['nome']} already exists, skipping")
-                    )
-                    skipped_count += 1
-                    continue
-
-                try:
-                    # Get or create related objects
-                    categoria_principal = None
-                    if fields.get('categoria_principal'):
-                        categoria_principal, _ = CategoriaPrincipal.objects.get_or_create(
-                            nome=fields['categoria_principal']
-                        )
-
-                    subcategoria = None
-                    if fields.get('categoria'):
-                        subcategoria, _ = Subcategoria.objects.get_or_create(
-                            nome=fields['categoria']
-                        )
-
-                    # Create product
-                    produto = Produto.objects.create(
-                        nome=fields['nome'],
-                        slug=fields['slug'],
-                        tag=fields.get('tag', ''),
-                        categoria_principal=categoria_principal,
-                        categoria=subcategoria,
-                        cor=fields.get('cor'),
-                        unidade_venda=fields.get('unidade_venda'),
-                        dimensoes=fields.get('dimensoes'),
-                        especificacoes=fields.get('especificacoes'),
-                        descricao=fields.get('descricao', ''),
-                    )
-
-                    # Handle images (if they exist in media folder)
-                    # Note: Images need to be manually uploaded to Render's media folder
-                    # or copied from local media folder
-
-                    self.stdout.write(
-                        self.style.SUCCESS(f"Imported product: {produto.nome}")
-                    )
-                    imported_count += 1
-
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.ERROR(f"Error importing {fields['nome']}: {str(e)}")
-                    )
-                    continue
+        # Each batch commits on its own; a dry run wraps everything in one transaction to roll back
+        with transaction.atomic() if options['dry_run'] else nullcontext():
+            self.load_maps()
+            with open(file_path, 'r', encoding=options['encoding']) as f:
+                for item in iter_json_objects(f):
+                    self.import_item(item)
+            self.flush()
+            if options['dry_run']:
+                transaction.set_rollback(True)
 
+        elapsed = time.monotonic() - self.start
+        total = self.imported_count + self.updated_count + self.skipped_count + self.error_count
         self.stdout.write(
             self.style.SUCCESS(
-                f"Import completed: {imported_count} imported, {skipped_count} skipped"
+                f"Import completed{' (dry run, nothing saved)' if options['dry_run'] else ''}: "
+                f"{self.imported_count} imported, {self.updated_count} updated, {self.skipped_count} skipped, "
+                f"{self.error_count} errors in {elapsed:.2f}s ({total / elapsed if elapsed else total:.0f} rows/s)"
             )
         )
 
-        if imported_count > 0:
+        if (self.imported_count or self.updated_count) and not options['dry_run']:
+            # bulk_create does not send post_save: drop the cached public pages by hand
+            invalidar_paginas()
+
+    def load_maps(self):
+        """Existing categories, subcategories and slugs, one query each."""
+        self.categorias = {c.nome: c for c in CategoriaPrincipal.objects.all()}
+        self.subcategorias = {
+            (s.categoria_principal_id, s.nome): s for s in Subcategoria.objects.all()
+        }
+        self.slugs = set(Produto.objects.values_list('slug', flat=True))
+        # Backup pk -> local object, for foreign keys stored as ids in the dump
+        self.categorias_backup = {}
+        self.subcategorias_backup = {}
+        self.slug_max_length = Produto._meta.get_field('slug').max_length
+
+    def import_item(self, item):
+        model = item.get('model')
+        fields = item.get('fields', {})
+        if model == 'core.categoriaprincipal':
+            categoria = self.get_categoria(fields.get('nome'), ordem=fields.get('ordem', 0), ativo=fields.get('ativo', True))
+            self.categorias_backup[item.get('pk')] = categoria
+        elif model == 'core.subcategoria':
+            categoria = self.resolve_categoria(fields.get('categoria_principal'))
+            subcategoria = self.get_subcategoria(categoria, fields.get('nome'), ordem=fields.get('ordem', 0),
+                                                 ativo=fields.get('ativo', True))
+            self.subcategorias_backup[item.get('pk')] = subcategoria
+        elif model == 'core.produto':
+            self.import_produto(fields)
+
+    def resolve_categoria(self, ref):
+        if not ref:
+            return None
+        if isinstance(ref, int):
+            return self.categorias_backup.get(ref)
+        return self.get_categoria(ref)
+
+    def get_categoria(self, nome, **defaults):
+        if not nome:
+            return None
+        if nome not in self.categorias:
+            self.categorias[nome] = CategoriaPrincipal.objects.create(nome=nome, **defaults)
+        return self.categorias[nome]
+
+    def get_subcategoria(self, categoria, nome, **defaults):
+        # A subcategory only exists under a main category
+        if not categoria or not nome:
+            return None
+        chave = (categoria.pk, nome)
+        if chave not in self.subcategorias:
+            self.subcategorias[chave] = Subcategoria.objects.create(
+                categoria_principal=categoria, nome=nome, **defaults
+            )
+        return self.subcategorias[chave]
+
+    def clean_fields(self, nome, slug, fields):
+        """Backup values converted to the model's types; raises ValidationError on a bad value."""
+        Produto._meta.get_field('nome').run_validators(nome)
+        if slug and (not SLUG_VALIDO.match(slug) or len(slug) > self.slug_max_length or slug in SLUGS_RESERVADOS):
+            raise ValidationError(f'invalid slug {slug!r}')
+        valores = {}
+        for nome_campo in PRODUTO_CAMPOS:
+            if fields.get(nome_campo) is None:
+                continue
+            campo = Produto._meta.get_field(nome_campo)
+            try:
+                valor = campo.to_python(fields[nome_campo])
+                campo.run_validators(valor)
+            except ValidationError as e:
+                raise ValidationError(f"{nome_campo}: {'; '.join(e.messages)}")
+            valores[nome_campo] = valor
+        return valores
+
+    def import_produto(self, fields):
+        nome = fields.get('nome')
+        if not nome:
+            self.stdout.write(self.style.ERROR('Product without a name, skipping'))
+            self.error_count += 1
+            return
+
+        slug = fields.get('slug')
+        existente = slug in self.slugs
+        if existente and not self.update_existing:
             self.stdout.write(
-                self.style.WARNING(
-                    "Note: Images need to be manually uploaded to the media folder"
-                )
-            )
\ No newline at end of file
+                self.style.WARNING(f"Product {nome} already exists, skipping")
+            )
+            self.skipped_count += 1
+            return
+        try:
+            valores = self.clean_fields(nome, slug, fields)
+        except ValidationError as e:
+            self.stdout.write(self.style.ERROR(f"Error importing {nome}: {'; '.join(e.messages)}"))
+            self.error_count += 1
+            return
+        if not slug:
+            slug = escolher_slug(nome, self.slugs, self.slug_max_length)
+        self.slugs.add(slug)
+
+        categoria_principal = self.resolve_categoria(fields.get('categoria_principal'))
+        subcategoria = None
+        if isinstance(fields.get('subcategoria'), int):
+            subcategoria = self.subcategorias_backup.get(fields['subcategoria'])
+        elif fields.get('categoria'):
+            subcategoria = self.get_subcategoria(categoria_principal, fields['categoria'])
+
+        self.pending.append((Produto(
+            nome=nome,
+            slug=slug,
+            categoria_principal=categoria_principal,
+            subcategoria=subcategoria,
+            categoria=fields.get('categoria') or '',
+            **valores,
+        ), existente))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        opcoes = {}
+        if self.update_existing:
+            opcoes = {
+                'update_conflicts': True,
+                'unique_fields': ['slug'],
+                # `midia` is recomputed by pre_save from the (possibly new) images; `updated_at`
+                # moves the catalog ETag (core.cache), otherwise browsers keep revalidating to 304
+                'update_fields': [
+                    'nome', 'categoria_principal', 'subcategoria', 'categoria', *PRODUTO_CAMPOS, 'midia', 'updated_at',
+                ],
+            }
+        try:
+            with transaction.atomic():
+                Produto.objects.bulk_create([produto for produto, _ in self.pending], batch_size=self.batch_size, **opcoes)
+            salvos = self.pending
+        except DatabaseError:
+            # Something validation did not catch: save row by row so only the bad rows are lost
+            salvos = []
+            for produto, existente in self.pending:
+                try:
+                    with transaction.atomic():
+                        Produto.objects.bulk_create([produto], **opcoes)
+                except DatabaseError as e:
+                    self.stdout.write(self.style.ERROR(f'Error importing {produto.nome}: {e}'))
+                    self.error_count += 1
+                else:
+                    salvos.append((produto, existente))
+        atualizados = sum(1 for _, existente in salvos if existente)
+        self.updated_count += atualizados
+        self.imported_count += len(salvos) - atualizados
+        self.pending = []
+        elapsed = time.monotonic() - self.start
+        salvos_total = self.imported_count + self.updated_count
+        self.stdout.write(f'  {salvos_total} products ({salvos_total / elapsed if elapsed else salvos_total:.0f} rows/s)')
@@ -1,42 +1,63 @@
-import os
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from django.db.models import Q
 from core.models import Produto
-from cloudinary import uploader
+from core import cloudinary_sync, image_variants
+
+
+def local_path(imagem_nome):
+    """Path of a product's local image under static/images/, or None for empty names and URLs."""
+    # Clean the filename like in the model
+    imagem_nome = imagem_nome.strip()
+    if not imagem_nome or imagem_nome.startswith('http'):
+        return None
+    if imagem_nome.startswith(settings.STATIC_URL):
+        imagem_nome = imagem_nome.replace(settings.STATIC_URL, '').lstrip('/')
+    elif imagem_nome.startswith('static/'):
+        imagem_nome = imagem_nome.replace('static/', '', 1)
+    if imagem_nome.startswith('images/'):
+        imagem_nome = imagem_nome.replace('images/', '', 1)
+    return image_variants.DIRETORIO_ORIGEM / imagem_nome
+
 
 class Command(BaseCommand):
     help = 'Migrate existing static images to Cloudinary and update product fields'
 
+    def add_arguments(self, parser):
+        cloudinary_sync.adicionar_argumentos(parser, 'migrate')
+
     def handle(self, *args, **options):
-        produtos = Produto.objects.exclude(imagem_nome='')
+        # Rows that already have a Cloudinary image are considered migrated
+        produtos = Produto.objects.exclude(imagem_nome='').filter(Q(imagem__isnull=True) | Q(imagem=''))
+        por_id = {}
+        tarefas = []
 
         for produto in produtos:
-            imagem_nome = produto.imagem_nome.strip()
-            if not imagem_nome:
-                continue
-
-            # Clean the filename like in the model
-            if imagem_nome.startswith('http'):
-                continue  # Skip URLs
-            elif imagem_nome.startswith(settings.STATIC_URL):
-                imagem_nome = imagem_nome.replace(settings.STATIC_URL, '').lstrip('/')
-            elif imagem_nome.startswith('static/'):
-                imagem_nome = imagem_nome.replace('static/', '', 1)
-            if imagem_nome.startswith('images/'):
-                imagem_nome = imagem_nome.replace('images/', '', 1)
-
-            file_path = os.path.join(settings.BASE_DIR, 'static', 'images', imagem_nome)
-            if not os.path.exists(file_path):
+            file_path = local_path(produto.imagem_nome)
+            if file_path is None:
+                continue  # Empty or a URL
+            if not file_path.exists():
                 self.stdout.write(self.style.WARNING(f"File {file_path} not found for {produto.nome}"))
                 continue
 
-            try:
-                result = uploader.upload(file_path, folder='produtos/')
-                produto.imagem = result['public_id']
-                produto.imagem_nome = ''
-                produto.save()
-                self.stdout.write(self.style.SUCCESS(f"Migrated image for {produto.nome}"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Error migrating {produto.nome}: {e}"))
+            por_id[produto.pk] = produto
+            tarefas.append(cloudinary_sync.Tarefa(produto.pk, 'imagem', str(file_path), f'{produto.slug}-imagem'))
+
+        def aplicar(tarefa, public_id):
+            produto = por_id[tarefa.produto_id]
+            produto.imagem = public_id
+            produto.imagem_nome = ''
+            produto.save(update_fields=['imagem', 'imagem_nome', 'updated_at'])
+
+        resumo = cloudinary_sync.executar(
+            tarefas,
+            aplicar,
+            upload=cloudinary_sync.upload_das_opcoes(options),
+            workers=options['workers'],
+            checkpoint=cloudinary_sync.Checkpoint(options['checkpoint']),
+            log=self.log,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Migration completed: {cloudinary_sync.formatar_resumo(resumo)}"))
 
-        self.stdout.write(self.style.SUCCESS("Migration completed"))
\ No newline at end of file
+    def log(self, mensagem, erro=False):
+        self.stdout.write(self.style.ERROR(mensagem) if erro else mensagem)
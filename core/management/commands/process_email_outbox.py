@@ -0,0 +1,57 @@
+"""
+Drena a fila de e-mails (EmailPendente) gravada pelo formulário de contato.
+
+Uso:
+    python manage.py process_email_outbox            # processa o que estiver vencido e sai
+    python manage.py process_email_outbox --loop     # worker contínuo
+
+Os e-mails de cada lote são enviados pela mesma conexão SMTP (um único
+handshake TLS); no modo --loop a conexão é mantida enquanto houver trabalho
+e fechada quando a fila esvazia.
+"""
+
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = 'Envia os e-mails pendentes da fila (outbox) com retry exponencial'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Continua rodando e consultando a fila')
+        parser.add_argument('--interval', type=float, default=5.0,
+                            help='Segundos entre consultas quando a fila está vazia (modo --loop)')
+        parser.add_argument('--batch-size', type=int, default=outbox.TAMANHO_LOTE,
+                            help='Máximo de e-mails enviados por lote')
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        total_enviados = total_falhas = 0
+        try:
+            while True:
+                enviados, falhas = outbox.processar_lote(connection, options['batch_size'])
+                total_enviados += enviados
+                total_falhas += falhas
+                if enviados or falhas:
+                    self.stdout.write(f'Lote: {enviados} enviado(s), {falhas} falha(s)')
+
+                if enviados + falhas >= options['batch_size']:
+                    # Lote cheio: provavelmente há mais na fila, segue sem esperar
+                    continue
+                if not options['loop']:
+                    break
+                # Fila vazia: não segura a conexão ociosa (o servidor a derrubaria)
+                connection.close()
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total_enviados} e-mail(s) enviado(s), {total_falhas} falha(s)'
+        ))
@@ -0,0 +1,51 @@
+"""
+Recalcula o campo `midia` (URLs de entrega prontas) de produtos e destaques.
+
+Uso:
+    python manage.py rebuild_media_urls
+    python manage.py rebuild_media_urls --batch-size 2000
+
+O save de cada registro já mantém o campo em dia; rode depois de trocar a
+conta/configuração do Cloudinary, mudar as larguras de `core.midia` ou
+alterar imagens direto no banco (`queryset.update`, SQL).
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.cache import invalidar_paginas
+from core.midia import CAMPOS_IMAGEM_PRODUTO
+from core.models import Destaque, Produto
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as URLs de imagens e vídeos guardadas em Produto.midia e Destaque.midia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Registros por UPDATE em lote')
+
+    def handle(self, *args, **options):
+        lote = options['batch_size']
+        produtos = self.recalcular(Produto.objects.only('id', 'imagem_nome', *CAMPOS_IMAGEM_PRODUTO), lote)
+        destaques = self.recalcular(Destaque.objects.only('id', 'arquivo'), lote)
+        # bulk_update não dispara post_save: invalida as páginas em cache explicitamente
+        invalidar_paginas()
+        self.stdout.write(self.style.SUCCESS(f'{produtos} produto(s) e {destaques} destaque(s) atualizados'))
+
+    def recalcular(self, queryset, lote):
+        total = 0
+        pendentes = []
+        agora = timezone.now()
+        for obj in queryset.order_by('pk').iterator(chunk_size=lote):
+            obj.midia = obj.calcular_midia()
+            obj.updated_at = agora
+            pendentes.append(obj)
+            if len(pendentes) >= lote:
+                total += self.gravar(queryset.model, pendentes)
+                pendentes = []
+        return total + self.gravar(queryset.model, pendentes)
+
+    def gravar(self, model, objs):
+        if objs:
+            model.objects.bulk_update(objs, ['midia', 'updated_at'])
+        return len(objs)
@@ -1,43 +1,50 @@
-import os
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from core.models import Produto
-from cloudinary import uploader
+from core import cloudinary_sync
+
+CAMPOS_IMAGEM = ('imagem', 'imagem_2', 'imagem_3')
+
 
 class Command(BaseCommand):
-    help = 'Upload existing product images to Cloudinary'
+    help = 'Upload existing product images (still stored in MEDIA_ROOT) to Cloudinary'
+
+    def add_arguments(self, parser):
+        cloudinary_sync.adicionar_argumentos(parser, 'upload')
 
     def handle(self, *args, **options):
-        produtos = Produto.objects.all()
-        for produto in produtos:
-            self.stdout.write(f"Processing {produto.nome}")
-            # Upload imagem
-            if produto.imagem and hasattr(produto.imagem, 'path'):
-                try:
-                    with open(produto.imagem.path, 'rb') as f:
-                        result = uploader.upload(f, folder='produtos/')
-                        produto.imagem = result['public_id']
-                        produto.save()
-                        self.stdout.write(f"Uploaded imagem for {produto.nome}")
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error uploading imagem for {produto.nome}: {e}"))
-            # imagem_2
-            if produto.imagem_2 and hasattr(produto.imagem_2, 'path'):
-                try:
-                    with open(produto.imagem_2.path, 'rb') as f:
-                        result = uploader.upload(f, folder='produtos/')
-                        produto.imagem_2 = result['public_id']
-                        produto.save()
-                        self.stdout.write(f"Uploaded imagem_2 for {produto.nome}")
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error uploading imagem_2 for {produto.nome}: {e}"))
-            # imagem_3
-            if produto.imagem_3 and hasattr(produto.imagem_3, 'path'):
-                try:
-                    with open(produto.imagem_3.path, 'rb') as f:
-                        result = uploader.upload(f, folder='produtos/')
-                        produto.imagem_3 = result['public_id']
-                        produto.save()
-                        self.stdout.write(f"Uploaded imagem_3 for {produto.nome}")
-                except Exception as e:
-                    self.stdout.write(self.style.ERROR(f"Error uploading imagem_3 for {produto.nome}: {e}"))
-        self.stdout.write(self.style.SUCCESS("Upload completed"))
\ No newline at end of file
+        por_id = {}
+        tarefas = []
+        for produto in Produto.objects.all():
+            for campo in CAMPOS_IMAGEM:
+                valor = getattr(produto, campo)
+                if not valor:
+                    continue
+                # Only values that still point to a local file need uploading;
+                # anything else is already a Cloudinary public_id
+                nome = f'{valor.public_id}.{valor.format}' if getattr(valor, 'format', None) else str(valor)
+                caminho = settings.MEDIA_ROOT / nome
+                if not caminho.is_file():
+                    continue
+                por_id[produto.pk] = produto
+                tarefas.append(cloudinary_sync.Tarefa(produto.pk, campo, str(caminho), f'{produto.slug}-{campo}'))
+
+        self.stdout.write(f"{len(tarefas)} image(s) to upload from {len(por_id)} product(s)")
+
+        def aplicar(tarefa, public_id):
+            produto = por_id[tarefa.produto_id]
+            setattr(produto, tarefa.campo, public_id)
+            produto.save(update_fields=[tarefa.campo, 'updated_at'])
+
+        resumo = cloudinary_sync.executar(
+            tarefas,
+            aplicar,
+            upload=cloudinary_sync.upload_das_opcoes(options),
+            workers=options['workers'],
+            checkpoint=cloudinary_sync.Checkpoint(options['checkpoint']),
+            log=self.log,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Upload completed: {cloudinary_sync.formatar_resumo(resumo)}"))
+
+    def log(self, mensagem, erro=False):
+        self.stdout.write(self.style.ERROR(mensagem) if erro else mensagem)
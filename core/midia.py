@@ -0,0 +1,103 @@
+"""URLs de entrega das imagens e vídeos, calculadas no save e guardadas no campo `midia`.
+
+Os templates leem o JSON pronto, então renderizar uma página com centenas de
+cards não chama o SDK do Cloudinary. Formato:
+
+- `Produto.midia`: `{"imagens": [imagem, ...]}`
+- `Destaque.midia`: `{"tipo": "imagem" | "video", **imagem}` (vazio sem arquivo)
+
+Cada imagem é `{"src": url, "srcset": "url 320w, ..."}` (Cloudinary, com
+largura limitada e `f_auto`/`q_auto`) ou `{"static": "cobogo.png"}` para
+arquivos de static/images/, cuja URL continua sendo resolvida por `static()`
+(o nome com hash muda a cada collectstatic). Vídeos têm só `src`.
+
+Mudou a configuração do Cloudinary ou as larguras? `python manage.py rebuild_media_urls`.
+"""
+from django.db import models
+
+# Larguras (px) geradas no srcset das imagens do Cloudinary
+LARGURAS_RESPONSIVAS = (320, 480, 640, 960, 1280, 1600)
+# Largura usada no `src` para navegadores sem suporte a srcset
+LARGURA_PADRAO = 960
+
+CAMPOS_IMAGEM_PRODUTO = ('imagem', 'imagem_2', 'imagem_3')
+# Trechos do public_id/URL que indicam vídeo (o resource_type nem sempre vem preenchido)
+INDICIOS_VIDEO = ('.mp4', '.mov', '.avi', '.m4v', 'video/upload')
+
+
+def recurso(instancia, campo):
+    """Valor de um CloudinaryField como recurso (um public_id atribuído como texto vira CloudinaryResource)."""
+    return instancia._meta.get_field(campo).to_python(getattr(instancia, campo))
+
+
+def url_cloudinary(imagem, largura):
+    """URL de entrega com largura limitada e formato/qualidade automáticos."""
+    return imagem.build_url(width=largura, crop='limit', fetch_format='auto', quality='auto')
+
+
+def srcset_cloudinary(imagem, larguras=LARGURAS_RESPONSIVAS):
+    return ', '.join(f'{url_cloudinary(imagem, largura)} {largura}w' for largura in larguras)
+
+
+def descrever_imagem(imagem):
+    """Entrada do JSON para um recurso do Cloudinary ou um nome de arquivo de static/images/."""
+    if hasattr(imagem, 'build_url'):
+        return {'src': url_cloudinary(imagem, LARGURA_PADRAO), 'srcset': srcset_cloudinary(imagem)}
+    return {'static': str(imagem)}
+
+
+def eh_video(arquivo):
+    if getattr(arquivo, 'resource_type', None) == 'video':
+        return True
+    url = str(getattr(arquivo, 'url', None) or arquivo).lower()
+    return any(indicio in url for indicio in INDICIOS_VIDEO)
+
+
+def midia_produto(imagens, imagem_nome=''):
+    """`midia` de um produto a partir das imagens do Cloudinary (em ordem) e do `imagem_nome`."""
+    entradas = [descrever_imagem(imagem) for imagem in imagens if imagem]
+    if imagem_nome and not entradas:
+        entradas.append({'static': imagem_nome})
+    return {'imagens': entradas}
+
+
+def midia_destaque(arquivo):
+    """`midia` de um slide: tipo e URL (vídeos) ou `src`/`srcset` (imagens)."""
+    if not arquivo:
+        return {}
+    if eh_video(arquivo):
+        return {'tipo': 'video', 'src': arquivo.url if hasattr(arquivo, 'url') else str(arquivo)}
+    return {'tipo': 'imagem', **descrever_imagem(arquivo)}
+
+
+class MidiaField(models.JSONField):
+    """JSON recalculado por `instance.<calcular>()` a cada save.
+
+    O cálculo roda no `pre_save`, como o `auto_now`: os campos do Cloudinary
+    declarados antes dele já fizeram o upload e têm o recurso final.
+    """
+
+    def __init__(self, *args, calcular=None, **kwargs):
+        self.calcular = calcular
+        kwargs.setdefault('default', dict)
+        kwargs.setdefault('blank', True)
+        kwargs.setdefault('editable', False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs['calcular'] = self.calcular
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        calcular = getattr(model_instance, self.calcular or '', None)
+        # Modelos históricos das migrações não têm o método: mantém o valor atual
+        if calcular is None:
+            return super().pre_save(model_instance, add)
+        try:
+            valor = calcular()
+        except ValueError:
+            # SDK do Cloudinary sem cloud_name (build, testes): fica vazio e é calculado na renderização
+            valor = {}
+        setattr(model_instance, self.attname, valor)
+        return valor
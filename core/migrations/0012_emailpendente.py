@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_destaque'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assunto', models.CharField(max_length=255)),
+                ('corpo', models.TextField()),
+                ('remetente', models.CharField(blank=True, max_length=255)),
+                ('destinatarios', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('enviado', 'Enviado'), ('falhou', 'Falhou (sem novas tentativas)')], default='pendente', max_length=10)),
+                ('tentativas', models.PositiveIntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ultimo_erro', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('enviado_em', models.DateTimeField(blank=True, null=True)),
+                ('mensagem_contato', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='core.mensagemcontato')),
+            ],
+            options={
+                'verbose_name': 'E-mail Pendente',
+                'verbose_name_plural': 'E-mails Pendentes',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='core_email_fila_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:56
+
+from django.db import DatabaseError, migrations, models, transaction
+
+# Busca do admin (icontains vira UPPER(col::text) LIKE '%...%'): índices trigram
+# sobre a mesma expressão. Só existem no PostgreSQL e só se a extensão pg_trgm
+# puder ser criada; em outros bancos a busca continua sem índice.
+INDICES_TRIGRAM = {
+    'core_produto_nome_trgm_idx': ('core_produto', 'nome'),
+    'core_produto_categoria_trgm_idx': ('core_produto', 'categoria'),
+}
+
+
+def criar_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError:
+        return
+    for nome, (tabela, coluna) in INDICES_TRIGRAM.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {nome} ON {tabela} USING gin (UPPER({coluna}::text) gin_trgm_ops)'
+        )
+
+
+def remover_indices_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for nome in INDICES_TRIGRAM:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {nome}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_emailpendente'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='destaque',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['ordem', 'created_at'], name='core_destaque_ativos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mensagemcontato',
+            index=models.Index(fields=['-created_at'], name='core_mensagem_recentes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mensagemcontato',
+            index=models.Index(fields=['lida', '-created_at'], name='core_mensagem_lida_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['ordem', 'nome'], name='core_produto_ativos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(condition=models.Q(('ativo', True)), fields=['categoria_principal', 'ordem', 'nome'], name='core_produto_cat_ativos_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='produto',
+            index=models.Index(fields=['ordem', 'nome'], name='core_produto_ordem_idx'),
+        ),
+        migrations.RunPython(criar_indices_trigram, remover_indices_trigram),
+    ]
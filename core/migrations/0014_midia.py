@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:00
+
+import core.midia
+from django.db import migrations
+from core.midia import CAMPOS_IMAGEM_PRODUTO, midia_destaque, midia_produto, recurso
+
+LOTE = 500
+
+
+def preencher_midia(apps, schema_editor):
+    Produto = apps.get_model('core', 'Produto')
+    Destaque = apps.get_model('core', 'Destaque')
+    produtos = []
+    for produto in Produto.objects.only('id', 'imagem_nome', *CAMPOS_IMAGEM_PRODUTO).iterator(chunk_size=LOTE):
+        produto.midia = midia_produto([recurso(produto, campo) for campo in CAMPOS_IMAGEM_PRODUTO], produto.imagem_nome)
+        produtos.append(produto)
+    Produto.objects.bulk_update(produtos, ['midia'], batch_size=LOTE)
+
+    destaques = list(Destaque.objects.only('id', 'arquivo'))
+    for destaque in destaques:
+        destaque.midia = midia_destaque(recurso(destaque, 'arquivo'))
+    Destaque.objects.bulk_update(destaques, ['midia'], batch_size=LOTE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_indices_catalogo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destaque',
+            name='midia',
+            field=core.midia.MidiaField(blank=True, calcular='calcular_midia', default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='produto',
+            name='midia',
+            field=core.midia.MidiaField(blank=True, calcular='calcular_midia', default=dict, editable=False),
+        ),
+        migrations.RunPython(preencher_midia, migrations.RunPython.noop),
+    ]
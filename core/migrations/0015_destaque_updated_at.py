@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_midia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destaque',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
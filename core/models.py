@@ -1,9 +1,14 @@
-from django.db import models
+import re
+
+from django.db import IntegrityError, models, transaction
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 from django.conf import settings
 from cloudinary import models as cloudinary_models
 
+from .midia import CAMPOS_IMAGEM_PRODUTO, MidiaField, eh_video, midia_destaque, midia_produto, recurso
+
 class CategoriaPrincipal(models.Model):
     nome = models.CharField(max_length=100, unique=True)
     ordem = models.IntegerField(default=0)
@@ -36,6 +41,45 @@ class Subcategoria(models.Model):
     def __str__(self):
         return f"{self.categoria_principal.nome} - {self.nome}"
 
+SLUG_VALIDO = re.compile(r'^[-a-zA-Z0-9_]+$')
+# Slugs que colidiriam com rotas fixas em /produtos/ (ver core/urls.py)
+SLUGS_RESERVADOS = frozenset({'filtro'})
+# Novas tentativas de alocação quando um save concorrente pega o mesmo slug
+TENTATIVAS_SLUG = 3
+
+
+def escolher_slug(nome, ocupados, max_length=50):
+    """Primeiro de `base`, `base-1`, `base-2`... que não está em `ocupados` (sem consultar o banco)."""
+    base = slugify(nome)[:max_length].strip('-') or 'produto'
+    candidato = base
+    contador = 1
+    while candidato in ocupados or candidato in SLUGS_RESERVADOS:
+        sufixo = f'-{contador}'
+        candidato = base[:max_length - len(sufixo)].rstrip('-') + sufixo
+        contador += 1
+    return candidato
+
+
+def alocar_slug(nome, exclude_pk=None):
+    """Primeiro slug livre para `nome`: `base`, `base-1`, `base-2`...
+
+    Faz uma única consulta (todos os slugs que começam com a base) e escolhe
+    o sufixo em memória, em vez de um `exists()` por sufixo testado. O
+    resultado respeita o `max_length` do campo, encurtando a base se preciso.
+    """
+    max_length = Produto._meta.get_field('slug').max_length
+    base = slugify(nome)[:max_length].strip('-') or 'produto'
+    # Sufixos de até 5 dígitos ("-99999") cabem sem cortar mais que isso da base
+    prefixo = base[:max_length - 6]
+    ocupados = set(
+        Produto.objects.filter(slug__startswith=prefixo)
+        .exclude(pk=exclude_pk)
+        .order_by()
+        .values_list('slug', flat=True)
+    )
+    return escolher_slug(nome, ocupados, max_length)
+
+
 class Produto(models.Model):
     nome = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
@@ -67,6 +111,8 @@ class Produto(models.Model):
     especificacoes = models.TextField(blank=True, help_text="Especificações adicionais, uma por linha")
     ativo = models.BooleanField(default=True)
     ordem = models.IntegerField(default=0)
+    # URLs de entrega prontas (core.midia), recalculadas a cada save
+    midia = MidiaField(calcular='calcular_midia')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -74,21 +120,59 @@ class Produto(models.Model):
         ordering = ['ordem', 'nome']
         verbose_name = 'Produto'
         verbose_name_plural = 'Produtos'
+        indexes = [
+            # Catálogo público: só ativos, na ordem de exibição (geral e por categoria)
+            models.Index(fields=['ordem', 'nome'], condition=models.Q(ativo=True), name='core_produto_ativos_idx'),
+            models.Index(fields=['categoria_principal', 'ordem', 'nome'], condition=models.Q(ativo=True),
+                         name='core_produto_cat_ativos_idx'),
+            # Painel e admin listam todos os produtos na mesma ordem
+            models.Index(fields=['ordem', 'nome'], name='core_produto_ordem_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Nome como veio do banco: permite detectar renomeações sem um SELECT extra no save()
+        if 'nome' in field_names:
+            instance._nome_original = instance.nome
+        return instance
+
+    def _precisa_de_slug(self):
+        if not self.slug or not SLUG_VALIDO.match(self.slug) or self.slug in SLUGS_RESERVADOS:
+            return True
+        return self.pk is not None and getattr(self, '_nome_original', self.nome) != self.nome
 
     def save(self, *args, **kwargs):
-        # Gerar slug automaticamente se não existir, estiver vazio, ou for inválido
-        import re
-        slug_pattern = re.compile(r'^[-a-zA-Z0-9_]+$')
-        
-        if not self.slug or not slug_pattern.match(self.slug) or (self.pk and Produto.objects.get(pk=self.pk).nome != self.nome):
-            self.slug = slugify(self.nome)
-            # Garantir que o slug seja único
-            original_slug = self.slug
-            counter = 1
-            while Produto.objects.filter(slug=self.slug).exclude(pk=self.pk).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {*CAMPOS_IMAGEM_PRODUTO, 'imagem_nome'} & set(update_fields):
+            kwargs['update_fields'] = [*update_fields, 'midia']
+
+        # Gerar slug automaticamente se não existir, for inválido/reservado ou se o nome mudou
+        if not self._precisa_de_slug():
+            super().save(*args, **kwargs)
+            self._nome_original = self.nome
+            return
+
+        self.slug = alocar_slug(self.nome, exclude_pk=self.pk)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'slug' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'slug']
+
+        for tentativa in range(TENTATIVAS_SLUG):
+            try:
+                # Savepoint: um conflito de slug não invalida a transação de quem chamou
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                break
+            except IntegrityError:
+                # Outro save concorrente pegou o mesmo slug entre a alocação e o INSERT
+                if tentativa == TENTATIVAS_SLUG - 1:
+                    raise
+                novo_slug = alocar_slug(self.nome, exclude_pk=self.pk)
+                if novo_slug == self.slug:
+                    raise
+                self.slug = novo_slug
+        self._nome_original = self.nome
 
     def __str__(self):
         return self.nome
@@ -98,23 +182,33 @@ class Produto(models.Model):
     
     def get_imagem_url(self):
         """Retorna a URL da imagem do produto (apenas para ImageField)"""
-        if self.imagem:
-            return self.imagem.url
+        imagens = self.get_imagens()
+        if imagens and 'src' in imagens[0]:
+            return imagens[0]['src']
         return None
 
+    def calcular_midia(self):
+        return midia_produto([recurso(self, campo) for campo in CAMPOS_IMAGEM_PRODUTO], self.imagem_nome)
+
+    def get_imagens(self):
+        """Imagens (em ordem) no formato de `core.midia`, prontas para `{% imagem_responsiva %}`."""
+        if 'imagens' not in self.midia:
+            # Linha gravada sem passar pelo save() (ex.: queryset.update): calcula na hora
+            return self.calcular_midia()['imagens']
+        return self.midia['imagens']
+
+    @property
+    def imagem_principal(self):
+        """Primeira imagem (ou `None`), usada nos cards."""
+        imagens = self.get_imagens()
+        return imagens[0] if imagens else None
+
     def get_imagens_urls(self):
         """Retorna lista de URLs das imagens disponíveis (em ordem)."""
-        urls = []
-        if self.imagem:
-            urls.append(self.imagem.url)
-        if self.imagem_2:
-            urls.append(self.imagem_2.url)
-        if self.imagem_3:
-            urls.append(self.imagem_3.url)
-        if self.imagem_nome and not urls:
-            # apenas adicionar imagem_nome se nenhuma ImageField estiver presente
-            urls.append(f'{settings.STATIC_URL}images/{self.imagem_nome}')
-        return urls
+        return [
+            imagem['src'] if 'src' in imagem else f"{settings.STATIC_URL}images/{imagem['static']}"
+            for imagem in self.get_imagens()
+        ]
 
     @property
     def subcategoria_nome(self):
@@ -134,6 +228,10 @@ class MensagemContato(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Mensagem de Contato'
         verbose_name_plural = 'Mensagens de Contato'
+        indexes = [
+            models.Index(fields=['-created_at'], name='core_mensagem_recentes_idx'),
+            models.Index(fields=['lida', '-created_at'], name='core_mensagem_lida_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nome} - {self.email} ({self.created_at.strftime('%d/%m/%Y %H:%M')})"
@@ -163,23 +261,77 @@ class Destaque(models.Model):
     link_externo = models.CharField(max_length=500, blank=True, verbose_name="Link Externo (caso não seja produto)")
     ordem = models.IntegerField(default=0, verbose_name="Ordem")
     ativo = models.BooleanField(default=True, verbose_name="Ativo")
+    # Tipo e URLs de entrega prontos (core.midia), recalculados a cada save
+    midia = MidiaField(calcular='calcular_midia')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['ordem', 'created_at']
         verbose_name = 'Destaque'
         verbose_name_plural = 'Destaques'
+        indexes = [
+            # Slides ativos da home
+            models.Index(fields=['ordem', 'created_at'], condition=models.Q(ativo=True), name='core_destaque_ativos_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if self.arquivo:
-            # Tenta detectar o tipo pelo nome do arquivo ou URL
-            url = str(self.arquivo).lower()
-            video_extensions = ['.mp4', '.mov', '.avi', '.m4v', 'video/upload']
-            if any(ext in url for ext in video_extensions):
-                self.tipo = 'video'
-            else:
-                self.tipo = 'imagem'
+            # Tenta detectar o tipo pelo nome do arquivo ou URL (antes do upload, que acontece no save)
+            self.tipo = 'video' if eh_video(self.arquivo) else 'imagem'
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'arquivo' in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'tipo', 'midia']
         super().save(*args, **kwargs)
 
+    def calcular_midia(self):
+        return midia_destaque(recurso(self, 'arquivo'))
+
+    def get_midia(self):
+        """`midia` do slide, calculada na hora para linhas gravadas sem passar pelo save()."""
+        if self.arquivo and not self.midia:
+            return self.calcular_midia()
+        return self.midia
+
     def __str__(self):
         return self.titulo or f"Slide {self.id}"
+
+class EmailPendente(models.Model):
+    """Outbox de e-mails: gravado na mesma transação da mensagem e enviado pelo
+    comando `process_email_outbox`, fora do ciclo da requisição."""
+    STATUS_PENDENTE = 'pendente'
+    STATUS_ENVIADO = 'enviado'
+    STATUS_FALHOU = 'falhou'
+    STATUS_CHOICES = (
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_ENVIADO, 'Enviado'),
+        (STATUS_FALHOU, 'Falhou (sem novas tentativas)'),
+    )
+    mensagem_contato = models.ForeignKey(
+        MensagemContato,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails',
+    )
+    assunto = models.CharField(max_length=255)
+    corpo = models.TextField()
+    remetente = models.CharField(max_length=255, blank=True)
+    destinatarios = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDENTE)
+    tentativas = models.PositiveIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    ultimo_erro = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    enviado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at']
+        verbose_name = 'E-mail Pendente'
+        verbose_name_plural = 'E-mails Pendentes'
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='core_email_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.assunto} ({self.get_status_display()})"
@@ -0,0 +1,119 @@
+"""Fila de saída (outbox) dos e-mails do site.
+
+A view só grava `EmailPendente` na mesma transação da `MensagemContato`; o
+envio SMTP acontece no comando `process_email_outbox`, que reaproveita uma
+única conexão para vários e-mails e reagenda falhas com backoff exponencial.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EmailPendente
+
+# Após esse número de falhas o e-mail vai para o estado "falhou" (dead-letter)
+MAX_TENTATIVAS = 6
+# Espera antes da 1ª nova tentativa; dobra a cada falha, até o teto
+ATRASO_BASE = timedelta(seconds=30)
+ATRASO_MAXIMO = timedelta(hours=1)
+TAMANHO_LOTE = 50
+# Reserva de um lote em envio: se o worker morrer no meio, os e-mails voltam a vencer depois desse prazo
+PRAZO_RESERVA = timedelta(minutes=10)
+
+
+def enfileirar_email_contato(mensagem):
+    """Cria o e-mail de notificação de uma `MensagemContato` (chamar dentro da transação da mensagem)."""
+    return EmailPendente.objects.create(
+        mensagem_contato=mensagem,
+        assunto=f'Novo contato do site - {mensagem.nome}',
+        corpo=f'Nome: {mensagem.nome}\nE-mail: {mensagem.email}\n\nMensagem:\n{mensagem.mensagem}',
+        remetente=settings.EMAIL_HOST_USER,
+        destinatarios=[settings.EMAIL_DESTINO],
+    )
+
+
+def atraso_para(tentativas):
+    """Backoff exponencial: 30s, 60s, 120s... limitado a `ATRASO_MAXIMO`."""
+    return min(ATRASO_BASE * (2 ** max(tentativas - 1, 0)), ATRASO_MAXIMO)
+
+
+def _registrar_falha(email, erro, agora):
+    email.tentativas += 1
+    email.ultimo_erro = f'{type(erro).__name__}: {erro}'[:2000]
+    if email.tentativas >= MAX_TENTATIVAS:
+        email.status = EmailPendente.STATUS_FALHOU
+    else:
+        email.proxima_tentativa = agora + atraso_para(email.tentativas)
+    email.save(update_fields=['tentativas', 'ultimo_erro', 'status', 'proxima_tentativa'])
+
+
+def _abrir(connection):
+    """Abre a conexão (no-op se já estiver aberta). Se falhar, cada envio tenta
+    abrir de novo por conta própria e a falha é reagendada normalmente."""
+    try:
+        connection.open()
+    except Exception:
+        pass
+
+
+def reservar_lote(tamanho=TAMANHO_LOTE):
+    """Reserva até `tamanho` e-mails vencidos numa transação curta e os retorna.
+
+    A reserva empurra `proxima_tentativa` para daqui a `PRAZO_RESERVA`: outros
+    workers (e o próximo lote) não pegam esses e-mails enquanto eles são
+    enviados, e nada fica travado no banco durante o SMTP. As linhas são
+    selecionadas com `SKIP LOCKED` onde o banco suporta.
+    """
+    agora = timezone.now()
+    with transaction.atomic():
+        lote = list(
+            EmailPendente.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailPendente.STATUS_PENDENTE, proxima_tentativa__lte=agora)
+            .order_by('proxima_tentativa', 'id')[:tamanho]
+        )
+        if lote:
+            EmailPendente.objects.filter(pk__in=[email.pk for email in lote]).update(
+                proxima_tentativa=agora + PRAZO_RESERVA,
+            )
+    return lote
+
+
+def processar_lote(connection, tamanho=TAMANHO_LOTE):
+    """Envia até `tamanho` e-mails vencidos pela `connection` informada.
+
+    A conexão só é aberta se houver algo a enviar e fica aberta ao final,
+    para ser reaproveitada pelo próximo lote; quem chama decide quando fechar.
+
+    O envio acontece fora de transação (ver `reservar_lote`) e o resultado de
+    cada e-mail é gravado logo depois dele, então um erro no meio do lote não
+    desfaz o registro dos que já saíram. Retorna `(enviados, falhas)`.
+    """
+    agora = timezone.now()
+    enviados = falhas = 0
+    lote = reservar_lote(tamanho)
+    if lote:
+        _abrir(connection)
+    for email in lote:
+        mensagem = EmailMessage(
+            subject=email.assunto,
+            body=email.corpo,
+            from_email=email.remetente or None,
+            to=email.destinatarios,
+            connection=connection,
+        )
+        try:
+            mensagem.send(fail_silently=False)
+        except Exception as e:
+            _registrar_falha(email, e, agora)
+            falhas += 1
+            # A conexão pode ter caído; reabre para o restante do lote
+            connection.close()
+            _abrir(connection)
+            continue
+        EmailPendente.objects.filter(pk=email.pk).update(
+            status=EmailPendente.STATUS_ENVIADO, enviado_em=timezone.now(), ultimo_erro='',
+        )
+        enviados += 1
+    return enviados, falhas
@@ -0,0 +1,76 @@
+"""Consultas da tabela de produtos do painel administrativo.
+
+A tabela é paginada por chave (`pagina_por_chave`), com busca e ordenação
+no banco, e carrega só as colunas exibidas: com milhares de produtos cada
+página continua custando uma única consulta pequena.
+"""
+from django.db.models import Q
+
+from .catalog import TAMANHO_MAXIMO_BUSCA, pagina_por_chave
+from .models import Produto
+
+# Linhas por página da tabela (as seguintes chegam via HTMX ao rolar)
+PRODUTOS_POR_PAGINA_PAINEL = 50
+
+# Colunas que a tabela exibe (o resto, como descricao e especificacoes, fica no banco)
+COLUNAS_TABELA = ('id', 'nome', 'categoria', 'ordem', 'ativo')
+
+# chave da querystring -> (título da coluna, campos da ordenação); o `id` desempata no final
+ORDENACOES = {
+    'nome': ('Nome', ('nome',)),
+    'categoria': ('Categoria', ('categoria', 'nome')),
+    'ordem': ('Ordem', ('ordem', 'nome')),
+    'status': ('Status', ('ativo', 'nome')),
+}
+ORDENACAO_PADRAO = 'ordem'
+
+
+def ler_ordenacao(valor):
+    """`(chave, decrescente)` a partir de `ordenar` (`'nome'`, `'-nome'`...); inválidos caem no padrão."""
+    valor = (valor or '').strip()
+    decrescente = valor.startswith('-')
+    chave = valor.lstrip('-')
+    if chave not in ORDENACOES:
+        return ORDENACAO_PADRAO, False
+    return chave, decrescente
+
+
+def cabecalhos(chave_atual, decrescente):
+    """Colunas ordenáveis com o valor de `ordenar` do link (clicar de novo inverte a direção)."""
+    colunas = []
+    for chave, (titulo, _campos) in ORDENACOES.items():
+        ativa = chave == chave_atual
+        colunas.append({
+            'chave': chave,
+            'titulo': titulo,
+            'ativa': ativa,
+            'decrescente': ativa and decrescente,
+            'ordenar': f'-{chave}' if ativa and not decrescente else chave,
+        })
+    return colunas
+
+
+def tabela_de_produtos(params):
+    """Página da tabela conforme `q`, `ordenar` e `cursor` da querystring.
+
+    Retorna um dict com `produtos`, `proximo_cursor`, `q`, `ordenar` e `colunas`.
+    """
+    q = params.get('q', '').strip()[:TAMANHO_MAXIMO_BUSCA]
+    chave, decrescente = ler_ordenacao(params.get('ordenar'))
+
+    produtos = Produto.objects.only(*COLUNAS_TABELA)
+    if q:
+        produtos = produtos.filter(Q(nome__icontains=q) | Q(categoria__icontains=q))
+
+    sinal = '-' if decrescente else ''
+    ordenacao = [f'{sinal}{campo}' for campo in (*ORDENACOES[chave][1], 'id')]
+    produtos, proximo_cursor = pagina_por_chave(
+        produtos, ordenacao, cursor=params.get('cursor'), tamanho=PRODUTOS_POR_PAGINA_PAINEL
+    )
+    return {
+        'produtos': produtos,
+        'proximo_cursor': proximo_cursor,
+        'q': q,
+        'ordenar': f'{sinal}{chave}',
+        'colunas': cabecalhos(chave, decrescente),
+    }
@@ -0,0 +1,169 @@
+"""Orçamento de queries por view e detector de N+1.
+
+Cada view declara quantas queries pode fazer com `@orcamento_queries(n)`.
+`RegistroQueries` grava as queries executadas (com a linha do template ou do
+código que as disparou) e agrupa as que têm o mesmo formato de SQL: o mesmo
+formato repetido várias vezes em um request é o sintoma clássico de N+1
+(ex.: `{{ sub.categoria_principal.nome }}` dentro de um `{% for %}`).
+
+Em desenvolvimento (`QUERY_BUDGET=1`, ligado por padrão com DEBUG) o
+`OrcamentoQueriesMiddleware` registra um aviso no log `core.queries` para
+cada N+1 e para cada view acima do orçamento. Nos testes,
+`OrcamentoQueriesTestMixin.assertOrcamentoQueries()` falha nos mesmos casos.
+"""
+import logging
+import re
+import sys
+import time
+from collections import defaultdict, namedtuple
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.queries')
+
+# A partir de quantas execuções do mesmo formato de SQL o padrão é tratado como N+1
+REPETICOES_N_MAIS_1 = 3
+
+Query = namedtuple('Query', ['sql', 'formato', 'segundos', 'template', 'codigo'])
+
+_LITERAIS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_ESPACOS = re.compile(r'\s+')
+
+
+def formato_sql(sql):
+    """SQL sem parâmetros, literais e tamanho das listas `IN (...)`: queries que só diferem nos valores ficam iguais."""
+    sql = _LITERAIS.sub('?', sql)
+    sql = _LISTAS.sub('(...)', sql)
+    return _ESPACOS.sub(' ', sql).strip()
+
+
+def _origens(frame):
+    """Linha do template (nó sendo renderizado mais interno) e linha do código do projeto que executaram a query."""
+    template = codigo = None
+    base = str(settings.BASE_DIR)
+    while frame is not None and not (template and codigo):
+        if template is None and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origem = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origem is not None and token is not None:
+                template = f'{origem.template_name or origem.name}:{token.lineno}'
+        if codigo is None:
+            arquivo = frame.f_code.co_filename
+            if arquivo.startswith(base) and 'site-packages' not in arquivo and not arquivo.endswith('query_budget.py'):
+                codigo = f'{arquivo[len(base) + 1:]}:{frame.f_lineno} ({frame.f_code.co_name})'
+        frame = frame.f_back
+    return template, codigo
+
+
+class RegistroQueries:
+    """Grava as queries executadas em todas as conexões enquanto o bloco `with` está ativo."""
+
+    def __init__(self):
+        self.queries = []
+        self._pilha = None
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            template, codigo = _origens(sys._getframe(1))
+            self.queries.append(Query(sql, formato_sql(sql), time.perf_counter() - inicio, template, codigo))
+
+    def __enter__(self):
+        self._pilha = ExitStack()
+        for conexao in connections.all(initialized_only=False):
+            self._pilha.enter_context(conexao.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc):
+        self._pilha.close()
+
+    @property
+    def total(self):
+        return len(self.queries)
+
+    def repetidas(self, minimo=REPETICOES_N_MAIS_1):
+        """`[(formato, [queries])]` dos formatos executados `minimo` vezes ou mais, do mais repetido ao menos."""
+        grupos = defaultdict(list)
+        for query in self.queries:
+            grupos[query.formato].append(query)
+        return sorted(
+            ((formato, queries) for formato, queries in grupos.items() if len(queries) >= minimo),
+            key=lambda grupo: -len(grupo[1]),
+        )
+
+    def descrever_repetidas(self, minimo=REPETICOES_N_MAIS_1):
+        linhas = []
+        for formato, queries in self.repetidas(minimo):
+            origens = sorted({q.template or q.codigo or '?' for q in queries})
+            linhas.append(f'{len(queries)}x {formato[:300]}\n    em {", ".join(origens)}')
+        return linhas
+
+    def descrever(self):
+        return [
+            f'{n}. {q.sql[:300]}  [{q.template or q.codigo or "?"}]'
+            for n, q in enumerate(self.queries, 1)
+        ]
+
+
+def orcamento_queries(maximo):
+    """Declara o máximo de queries que a view pode executar em um request (usar como decorador mais externo)."""
+    def decorador(view):
+        view.orcamento_queries = maximo
+        return view
+    return decorador
+
+
+class OrcamentoExcedido(Exception):
+    pass
+
+
+class OrcamentoQueriesMiddleware:
+    """Conta as queries de cada request e avisa sobre N+1 e views acima do orçamento declarado.
+
+    Com `QUERY_BUDGET_STRICT=True` estourar o orçamento levanta `OrcamentoExcedido`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with RegistroQueries() as registro:
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(registro.total)
+        for descricao in registro.descrever_repetidas():
+            logger.warning('Possível N+1 em %s: %s', request.path, descricao)
+
+        orcamento = getattr(request, '_orcamento_queries', None)
+        if orcamento is not None and registro.total > orcamento:
+            mensagem = f'{request.path} executou {registro.total} queries (orçamento: {orcamento})'
+            logger.error('%s\n%s', mensagem, '\n'.join(registro.descrever()))
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise OrcamentoExcedido(mensagem)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._orcamento_queries = getattr(view_func, 'orcamento_queries', None)
+
+
+class OrcamentoQueriesTestMixin:
+    """Asserções de orçamento de queries para `TestCase`."""
+
+    @contextmanager
+    def assertOrcamentoQueries(self, maximo, minimo_repeticoes=REPETICOES_N_MAIS_1):
+        """Falha se o bloco executar mais de `maximo` queries ou repetir um formato de SQL (N+1)."""
+        with RegistroQueries() as registro:
+            yield registro
+        repetidas = registro.descrever_repetidas(minimo_repeticoes)
+        if repetidas:
+            self.fail('N+1 detectado:\n' + '\n'.join(repetidas))
+        if registro.total > maximo:
+            self.fail(
+                f'{registro.total} queries executadas, orçamento {maximo}:\n' + '\n'.join(registro.descrever())
+            )
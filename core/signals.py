@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+
+from .cache import invalidar_paginas
+from .models import Produto, CategoriaPrincipal, Subcategoria, Destaque
+
+MODELOS_DO_CATALOGO = (Produto, CategoriaPrincipal, Subcategoria, Destaque)
+
+
+def invalidar_cache_do_catalogo(sender, **kwargs):
+    """Qualquer alteração no catálogo invalida as páginas públicas em cache."""
+    invalidar_paginas()
+
+
+for modelo in MODELOS_DO_CATALOGO:
+    post_save.connect(invalidar_cache_do_catalogo, sender=modelo, dispatch_uid=f'cache-save-{modelo.__name__}')
+    post_delete.connect(invalidar_cache_do_catalogo, sender=modelo, dispatch_uid=f'cache-delete-{modelo.__name__}')
@@ -0,0 +1,26 @@
+"""Armazenamento dos arquivos estáticos."""
+from django.contrib.staticfiles.storage import StaticFilesStorage
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class ArmazenamentoEstatico(CompressedManifestStaticFilesStorage):
+    """Nomes com hash do conteúdo + versões .gz/.br, tolerante a referências quebradas.
+
+    - Um `url()` apontando para um arquivo que não existe fica com o nome
+      original em vez de abortar o collectstatic (o motivo de o projeto ter
+      usado `CompressedStaticFilesStorage` até aqui).
+    - Sem o manifesto (collectstatic ainda não rodou: desenvolvimento, testes),
+      `{% static %}` devolve o nome original.
+    """
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            return name
+
+    def url(self, name, force=False):
+        if not self.hashed_files:
+            return StaticFilesStorage.url(self, name)
+        return super().url(name, force)
@@ -1,4 +1,13 @@
 from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from core.assets import caminhos_do_pacote
+from core.css_critico import css_critico_de
+from core.image_variants import FORMATOS, variantes_de
+from core.midia import descrever_imagem
 
 register = template.Library()
 
@@ -9,3 +18,99 @@ def get_item(dictionary, key):
         return None
     return dictionary.get(key)
 
+
+def _atributos_extras(atributos):
+    """`data_index=0` -> ` data-index="0"` (valores escapados)."""
+    return format_html_join('', ' {}="{}"', ((nome.replace('_', '-'), valor) for nome, valor in atributos.items()))
+
+
+@register.simple_tag
+def imagem_responsiva(imagem, alt='', sizes='100vw', css_class='', loading='lazy', **atributos):
+    """Renderiza um <img> responsivo.
+
+    - Entrada de `midia` (`Produto.get_imagens`, `Destaque.midia`): usa as URLs
+      já calculadas no save, sem chamar o SDK do Cloudinary.
+    - Recurso do Cloudinary: `src` + `srcset`/`sizes` com larguras escalonadas,
+      `f_auto` e `q_auto`, para o navegador baixar só o tamanho que vai exibir.
+    - Texto (nome de arquivo em static/images/ ou URL): <img> simples, sem srcset.
+    - Vazio: nada é renderizado.
+
+    Argumentos extras viram atributos (`data_index=0` -> `data-index="0"`).
+    """
+    if not imagem:
+        return ''
+    extras = _atributos_extras(atributos)
+    if not isinstance(imagem, dict):
+        imagem = descrever_imagem(imagem)
+    if imagem.get('srcset'):
+        return format_html(
+            '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}" decoding="async"{}>',
+            imagem['src'], imagem['srcset'], sizes, alt, css_class, loading, extras,
+        )
+    src = imagem.get('src') or imagem.get('static', '')
+    if not src.startswith(('http://', 'https://', '/')):
+        src = static(f'images/{src}')
+    return format_html(
+        '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async"{}>',
+        src, alt, css_class, loading, extras,
+    )
+
+
+@register.simple_tag
+def picture(nome, alt='', sizes='100vw', css_class='', loading='lazy', **atributos):
+    """<picture> para uma imagem de static/images/ usando as variantes do manifesto.
+
+    Emite um <source> AVIF e um WebP com srcset por largura e mantém o
+    original no <img>. Sem variantes geradas, renderiza só o <img> original.
+    """
+    img = format_html(
+        '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async"{}>',
+        static(f'images/{nome}'), alt, css_class, loading, _atributos_extras(atributos),
+    )
+    variantes = variantes_de(nome)
+    if not variantes:
+        return img
+    sources = format_html_join('', '<source type="image/{}" srcset="{}" sizes="{}">', (
+        (formato, ', '.join(f'{static(caminho)} {largura}w' for largura, caminho in variantes[formato]), sizes)
+        for formato in FORMATOS if variantes.get(formato)
+    ))
+    return format_html('<picture>{}{}</picture>', sources, img)
+
+
+@register.simple_tag
+def imagem_variante(nome, formato='webp', largura=1920):
+    """URL da maior variante de `nome` com até `largura` px no `formato` (ou do original).
+
+    Útil em CSS, por exemplo em `image-set()` de imagens de fundo.
+    """
+    variantes = variantes_de(nome).get(formato)
+    if not variantes:
+        return static(f'images/{nome}')
+    candidatas = [v for v in variantes if v[0] <= int(largura)] or [min(variantes)]
+    return static(max(candidatas)[1])
+
+
+@register.simple_tag
+def bundle(nome):
+    """<link>/<script> do pacote `nome` de core.assets (ou dos arquivos de origem, antes do build e em DEBUG)."""
+    modelo = '<link rel="stylesheet" href="{}">' if nome.endswith('.css') else '<script src="{}"></script>'
+    return format_html_join('\n', modelo, ((static(caminho),) for caminho in caminhos_do_pacote(nome)))
+
+
+@register.simple_tag(takes_context=True)
+def css_critico(context, nome='site.css'):
+    """CSS crítico da página inline + o pacote `nome` carregado sem bloquear a renderização.
+
+    Sem CSS crítico gerado para o template da página (`build_critical_css`)
+    ou em DEBUG, é o mesmo que `{% bundle nome %}`.
+    """
+    template = getattr(context.template, 'name', None)
+    critico = None if settings.DEBUG or not template else css_critico_de(template)
+    if critico is None:
+        return bundle(nome)
+    links = format_html_join('\n', (
+        '<link rel="stylesheet" href="{0}" media="print" onload="this.onload=null;this.media=\'all\'">'
+        '<noscript><link rel="stylesheet" href="{0}"></noscript>'
+    ), ((static(caminho),) for caminho in caminhos_do_pacote(nome)))
+    # `</` não pode aparecer dentro do <style>
+    return format_html('<style>{}</style>\n{}', mark_safe(critico.replace('</', '<\\/')), links)
@@ -1,3 +1,1603 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+import importlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import cloudinary
+from PIL import Image
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.template import Context, Template
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches, resolve, reverse
+from django.utils import timezone
+
+from .cache import chave_pagina
+from . import admin as core_admin, assets, benchmark, catalog, catalogo_sintetico, css_critico, image_variants, outbox
+from .management.commands import benchmark_servers, boot as boot_command
+from .management.commands.import_produtos import iter_json_objects
+from utils.figma_images import FigmaImageDownloader, RateLimiter, parse_retry_after
+from .models import Produto, CategoriaPrincipal, Subcategoria, MensagemContato, EmailPendente, Destaque
+from .query_budget import OrcamentoExcedido, OrcamentoQueriesTestMixin, RegistroQueries, formato_sql
+
+
+def criar_catalogo(num_categorias=2, subcategorias_por_categoria=2, produtos_por_subcategoria=2, prefixo=''):
+    """Cria um catálogo pequeno (sem imagens do Cloudinary) para os testes."""
+    for c in range(num_categorias):
+        categoria = CategoriaPrincipal.objects.create(nome=f'{prefixo}Categoria {c}', ordem=c)
+        for s in range(subcategorias_por_categoria):
+            subcategoria = Subcategoria.objects.create(
+                categoria_principal=categoria, nome=f'Sub {c}-{s}', ordem=s
+            )
+            for p in range(produtos_por_subcategoria):
+                Produto.objects.create(
+                    nome=f'{prefixo}Produto {c}-{s}-{p}',
+                    categoria_principal=categoria,
+                    subcategoria=subcategoria,
+                    categoria=subcategoria.nome,
+                    imagem_nome='cobogo.png',
+                )
+
+
+class ProdutosViewQueryTests(TestCase):
+    # estado das tabelas (ETag) + categorias + subcategorias (prefetch) + contagens + 1ª página com JOIN nas FKs
+    QUERY_BUDGET = 5
+
+    def setUp(self):
+        cache.clear()
+
+    def test_query_budget_nao_cresce_com_o_catalogo(self):
+        criar_catalogo(num_categorias=1, subcategorias_por_categoria=1, produtos_por_subcategoria=1)
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            self.client.get(reverse('produtos'))
+
+        criar_catalogo(num_categorias=4, subcategorias_por_categoria=3, produtos_por_subcategoria=5, prefixo='Extra ')
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(reverse('produtos'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_agrupamento_preserva_ordem_e_omite_categorias_vazias(self):
+        criar_catalogo(num_categorias=2, subcategorias_por_categoria=1, produtos_por_subcategoria=2)
+        CategoriaPrincipal.objects.create(nome='Sem produtos', ordem=99)
+
+        response = self.client.get(reverse('produtos'))
+        agrupados = response.context['produtos_agrupados_list']
+
+        self.assertEqual([item['categoria'].nome for item in agrupados], ['Categoria 0', 'Categoria 1'])
+        self.assertEqual([item['total'] for item in agrupados], [2, 2])
+        self.assertEqual(
+            [p.nome for p in response.context['produtos']],
+            ['Produto 0-0-0', 'Produto 0-0-1', 'Produto 1-0-0', 'Produto 1-0-1'],
+        )
+        self.assertContains(response, 'data-subcategoria="sub 1-0"', count=2)
+
+    @mock.patch.object(catalog, 'PRODUTOS_POR_PAGINA', 3)
+    def test_grade_inicial_e_so_a_primeira_pagina(self):
+        criar_catalogo(num_categorias=2, subcategorias_por_categoria=2, produtos_por_subcategoria=2)
+        response = self.client.get(reverse('produtos'))
+        self.assertEqual(len(response.context['produtos']), 3)
+        # As contagens da barra lateral continuam sendo do catálogo inteiro
+        self.assertEqual(sum(item['total'] for item in response.context['produtos_agrupados_list']), 8)
+        # A sentinela pede a próxima página ao endpoint de filtro
+        cursor = response.context['proximo_cursor']
+        self.assertContains(response, f'hx-get="{reverse("produtos-filtro")}?cursor={cursor}"')
+
+
+class PaginaCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        criar_catalogo(num_categorias=1, subcategorias_por_categoria=1, produtos_por_subcategoria=2)
+
+    def test_segunda_requisicao_vem_do_cache_sem_consultas(self):
+        url = reverse('produtos')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'HIT')
+        self.assertIn('HX-Request', response['Vary'])
+
+    def test_htmx_e_pagina_completa_tem_chaves_distintas(self):
+        url = reverse('produtos')
+        self.client.get(url)
+        response = self.client.get(url, HTTP_HX_REQUEST='true')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+    def test_salvar_modelo_do_catalogo_invalida_o_cache(self):
+        url = reverse('produto-detalhe', kwargs={'slug': Produto.objects.first().slug})
+        self.client.get(url)
+
+        produto = Produto.objects.first()
+        produto.nome = 'Nome Atualizado'
+        produto.save()
+
+        response = self.client.get(reverse('produto-detalhe', kwargs={'slug': produto.slug}))
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, 'Nome Atualizado')
+
+        self.client.get(reverse('home'))
+        Subcategoria.objects.first().delete()
+        self.assertEqual(self.client.get(reverse('home'))['X-Page-Cache'], 'MISS')
+
+    def test_token_csrf_e_renovado_a_cada_resposta_do_cache(self):
+        url = reverse('quem-somos')
+        primeira = self.client.get(url)
+        segunda = self.client.get(url)
+        self.assertEqual(segunda['X-Page-Cache'], 'HIT')
+        self.assertNotContains(segunda, '__CSRF_TOKEN__')
+        self.assertContains(segunda, 'name="csrfmiddlewaretoken"')
+        self.assertNotEqual(primeira.content, segunda.content)
+
+    def test_usuario_autenticado_nao_usa_cache(self):
+        user = get_user_model().objects.create_user('admin', password='senha')
+        self.client.force_login(user)
+        self.client.get(reverse('home'))
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header('X-Page-Cache'))
+
+
+class RespostaCondicionalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        criar_catalogo(num_categorias=1, subcategorias_por_categoria=1, produtos_por_subcategoria=2)
+        self.produto = Produto.objects.first()
+        self.urls = (
+            reverse('home'), reverse('produtos'), reverse('produto-detalhe', kwargs={'slug': self.produto.slug}),
+        )
+
+    def test_revalidacao_responde_304_sem_renderizar(self):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertTrue(response.has_header('Last-Modified'), url)
+            self.assertIn('no-cache', response['Cache-Control'])
+            cache.delete(chave_pagina(response.wsgi_request))
+
+            with self.assertNumQueries(0), mock.patch('core.views.render') as render:
+                revalidada = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(revalidada.status_code, 304, url)
+            self.assertEqual(revalidada.content, b'')
+            self.assertEqual(revalidada['ETag'], response['ETag'])
+            self.assertIn('HX-Request', revalidada['Vary'])
+            render.assert_not_called()
+
+            por_data = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+            self.assertEqual(por_data.status_code, 304, url)
+
+    def test_etag_muda_com_edicao_remocao_e_modo_htmx(self):
+        url = reverse('produtos')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, HTTP_HX_REQUEST='true')['ETag'], etag)
+
+        self.produto.nome = 'Nome Atualizado'
+        self.produto.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Nome Atualizado')
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Apagar não altera nenhum updated_at, mas muda a contagem
+        etag = response['ETag']
+        Produto.objects.last().delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_sem_cookie_csrf_renderiza_e_grava_o_cookie(self):
+        url = reverse('home')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Cookie apagado/expirado: a página é renderizada de novo, com um token que vale
+        sem_cookie = Client()
+        response = sem_cookie.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(sem_cookie.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # Cookie trocado (login/logout): o ETag antigo não vale mais
+        self.client.cookies[settings.CSRF_COOKIE_NAME] = 'x' * 32
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_usuario_autenticado_nao_recebe_etag(self):
+        self.client.force_login(get_user_model().objects.create_user('admin', password='senha'))
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header('ETag'))
+
+
+class NavegacaoHtmxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        criar_catalogo(num_categorias=1, subcategorias_por_categoria=1, produtos_por_subcategoria=2)
+        produto = Produto.objects.first()
+        self.urls = (
+            reverse('home'), reverse('quem-somos'), reverse('produtos'),
+            reverse('produtos-categoria', kwargs={'ref': produto.categoria_principal_id}),
+            reverse('produto-detalhe', kwargs={'slug': produto.slug}),
+        )
+
+    def test_hx_get_recebe_so_o_conteudo_da_pagina(self):
+        for url in self.urls:
+            completa = self.client.get(url)
+            fragmento = self.client.get(url, HTTP_HX_REQUEST='true')
+            self.assertContains(completa, 'application/ld+json')
+            self.assertNotContains(fragmento, '<head>')
+            self.assertNotContains(fragmento, 'application/ld+json')
+            self.assertContains(completa, '/static/js/site.js')
+            self.assertNotContains(fragmento, '/static/js/site.js')
+            # O htmx atualiza a aba com o <title>; o modal de contato e o header continuam no body
+            self.assertContains(fragmento, '<title>')
+            self.assertContains(fragmento, 'id="contactModal"')
+            self.assertContains(fragmento, 'class="header')
+            self.assertLess(len(fragmento.content), len(completa.content), url)
+            self.assertEqual(fragmento['Vary'], completa['Vary'])
+            self.assertIn('HX-History-Restore-Request', fragmento['Vary'])
+
+    def test_restauracao_do_historico_recebe_a_pagina_completa(self):
+        url = reverse('produtos')
+        self.client.get(url, HTTP_HX_REQUEST='true')
+        response = self.client.get(url, HTTP_HX_REQUEST='true', HTTP_HX_HISTORY_RESTORE_REQUEST='true')
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, '<head>')
+
+
+class ProdutosFiltroTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        criar_catalogo(num_categorias=2, subcategorias_por_categoria=2, produtos_por_subcategoria=2)
+        self.categoria = CategoriaPrincipal.objects.get(nome='Categoria 1')
+        self.subcategoria = Subcategoria.objects.get(nome='Sub 1-0')
+
+    def get(self, **params):
+        return self.client.get(reverse('produtos-filtro'), params, HTTP_HX_REQUEST='true')
+
+    def test_filtra_por_categoria_e_subcategoria(self):
+        response = self.get(categoria=self.categoria.pk)
+        self.assertEqual(len(response.context['produtos']), 4)
+        self.assertTrue(all(p.categoria_principal_id == self.categoria.pk for p in response.context['produtos']))
+
+        response = self.get(categoria=self.categoria.pk, subcategoria=self.subcategoria.pk)
+        self.assertEqual(
+            [p.nome for p in response.context['produtos']],
+            ['Produto 1-0-0', 'Produto 1-0-1'],
+        )
+
+    def test_busca_por_texto_e_contagens_por_faceta(self):
+        response = self.get(q='produto 1-0', categoria=self.categoria.pk)
+        self.assertEqual(len(response.context['produtos']), 2)
+        # a faceta de categoria ignora o próprio filtro; a de subcategoria não
+        self.assertEqual(response.context['contagem_categorias'], {self.categoria.pk: 2})
+        self.assertEqual(response.context['contagem_subcategorias'], {self.subcategoria.pk: 2})
+        self.assertContains(response, f'innerHTML:.facet-count-subcategoria-{self.subcategoria.pk}')
+
+    @mock.patch.object(catalog, 'PRODUTOS_POR_PAGINA', 3)
+    def test_filtro_paginado_mantem_os_filtros_ate_o_fim(self):
+        response = self.get(q='produto')
+        vistos = [p.nome for p in response.context['produtos']]
+        self.assertEqual(len(vistos), 3)
+        self.assertContains(response, 'hx-trigger="revealed"')
+        self.assertContains(response, 'q=produto&amp;cursor=')
+        cursor = response.context['proximo_cursor']
+        while cursor:
+            # Páginas seguintes: só os cards, sem recalcular as contagens
+            with self.assertNumQueries(1):
+                response = self.get(q='produto', cursor=cursor)
+            self.assertNotContains(response, 'hx-swap-oob')
+            vistos += [p.nome for p in response.context['produtos']]
+            cursor = response.context['proximo_cursor']
+        self.assertEqual(vistos, list(Produto.objects.order_by('ordem', 'nome', 'id').values_list('nome', flat=True)))
+
+    def test_parametros_invalidos_sao_ignorados_e_o_fragmento_nao_inclui_base(self):
+        with self.assertNumQueries(3):
+            response = self.get(categoria='abc', subcategoria='')
+        self.assertEqual(len(response.context['produtos']), 8)
+        self.assertNotContains(response, '<html')
+
+
+class ProdutosCategoriaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.categoria = CategoriaPrincipal.objects.create(nome='Linha Jardim')
+        outra = CategoriaPrincipal.objects.create(nome='Outra')
+        # nomes repetidos com a mesma ordem: o desempate pelo id não pode pular nem repetir cards
+        for i in range(7):
+            Produto.objects.create(nome=f'Pisante {i % 3}', categoria_principal=self.categoria, ordem=i % 2)
+        Produto.objects.create(nome='Fora da categoria', categoria_principal=outra)
+
+    def url(self, ref):
+        return reverse('produtos-categoria', kwargs={'ref': ref})
+
+    @mock.patch.object(catalog, 'PRODUTOS_POR_PAGINA', 3)
+    def test_pagina_por_cursor_ate_o_fim_sem_repetir(self):
+        response = self.client.get(self.url('linha-jardim'))
+        vistos = [p.pk for p in response.context['produtos']]
+        cursor = response.context['proximo_cursor']
+        self.assertContains(response, 'hx-trigger="revealed"')
+
+        while cursor:
+            response = self.client.get(self.url(self.categoria.pk), {'cursor': cursor}, HTTP_HX_REQUEST='true')
+            self.assertNotContains(response, '<html')
+            vistos += [p.pk for p in response.context['produtos']]
+            cursor = response.context['proximo_cursor']
+
+        esperado = list(
+            Produto.objects.filter(categoria_principal=self.categoria)
+            .order_by('ordem', 'nome', 'id').values_list('pk', flat=True)
+        )
+        self.assertEqual(vistos, esperado)
+
+    @mock.patch.object(catalog, 'PRODUTOS_POR_PAGINA', 3)
+    def test_query_budget_da_primeira_pagina(self):
+        # categorias + subcategorias (prefetch) + contagens da barra lateral + página
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url(self.categoria.pk))
+        self.assertEqual(len(response.context['produtos']), 3)
+        self.assertEqual(response.context['categoria_atual'], self.categoria)
+
+    def test_categoria_inexistente_ou_inativa_retorna_404(self):
+        self.assertEqual(self.client.get(self.url('nao-existe')).status_code, 404)
+        self.categoria.ativo = False
+        self.categoria.save()
+        self.assertEqual(self.client.get(self.url(self.categoria.pk)).status_code, 404)
+
+    def test_cursor_invalido_volta_para_a_primeira_pagina(self):
+        response = self.client.get(self.url(self.categoria.pk), {'cursor': '!!!'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['produtos']), 7)
+
+
+class ImagemResponsivaTests(TestCase):
+    def setUp(self):
+        self.cloud_name = cloudinary.config().cloud_name
+        cloudinary.config(cloud_name='demo')
+        self.addCleanup(cloudinary.config, cloud_name=self.cloud_name)
+
+    def render(self, imagem, **extra):
+        template = Template(
+            '{% load core_extras %}'
+            '{% imagem_responsiva imagem alt="Cobogó" css_class="product-modern-image" data_index=2 %}'
+        )
+        return template.render(Context({'imagem': imagem, **extra}))
+
+    def test_recurso_do_cloudinary_gera_srcset_com_formato_e_qualidade_automaticos(self):
+        imagem = cloudinary.CloudinaryResource('produtos/cobogo', format='jpg', version='1', resource_type='image')
+        html = self.render(imagem)
+        self.assertIn('srcset="https://res.cloudinary.com/demo/image/upload/c_limit,f_auto,q_auto,w_320/v1/produtos/cobogo.jpg 320w', html)
+        self.assertIn('w_1600/v1/produtos/cobogo.jpg 1600w"', html)
+        self.assertIn('src="https://res.cloudinary.com/demo/image/upload/c_limit,f_auto,q_auto,w_960/', html)
+        self.assertIn('data-index="2"', html)
+
+    def test_imagem_estatica_degrada_para_img_simples(self):
+        html = self.render('cobogo.png')
+        self.assertIn('src="/static/images/cobogo.png"', html)
+        self.assertNotIn('srcset', html)
+        self.assertEqual(self.render(None), '')
+
+
+class MidiaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cloud_name = cloudinary.config().cloud_name
+        cloudinary.config(cloud_name='demo')
+        self.addCleanup(cloudinary.config, cloud_name=self.cloud_name)
+        self.categoria = CategoriaPrincipal.objects.create(nome='Revestimentos')
+
+    def test_urls_calculadas_no_save(self):
+        produto = Produto.objects.create(nome='Cobogó', categoria_principal=self.categoria, imagem='produtos/cobogo.jpg')
+        [imagem] = produto.midia['imagens']
+        self.assertEqual(imagem['src'], 'https://res.cloudinary.com/demo/image/upload/c_limit,f_auto,q_auto,w_960/v1/produtos/cobogo.jpg')
+        self.assertIn('w_1600/v1/produtos/cobogo.jpg 1600w', imagem['srcset'])
+
+        # Salvar só um campo de imagem também atualiza a mídia
+        produto.imagem_2 = 'produtos/cobogo-2.jpg'
+        produto.save(update_fields=['imagem_2'])
+        produto.refresh_from_db()
+        self.assertEqual(len(produto.midia['imagens']), 2)
+
+        estatico = Produto.objects.create(nome='Cuba', imagem_nome='cuba.png')
+        self.assertEqual(estatico.midia, {'imagens': [{'static': 'cuba.png'}]})
+        self.assertEqual(estatico.get_imagens_urls(), ['/static/images/cuba.png'])
+
+    def test_paginas_nao_montam_urls_na_renderizacao(self):
+        for n in range(5):
+            Produto.objects.create(nome=f'Produto {n}', categoria_principal=self.categoria, imagem=f'produtos/p{n}.jpg')
+        Destaque.objects.create(titulo='Vídeo', arquivo='video/upload/destaques/obra.mp4')
+        Destaque.objects.create(titulo='Foto', arquivo='destaques/obra.jpg')
+        produto = Produto.objects.first()
+
+        with mock.patch.object(cloudinary.CloudinaryResource, 'build_url', side_effect=AssertionError('build_url')):
+            self.assertContains(self.client.get(reverse('produtos')), 'srcset=', count=5)
+            home = self.client.get(reverse('home'))
+            self.assertContains(home, '<video src="https://res.cloudinary.com/demo/video/upload/v1/destaques/obra.mp4"')
+            self.assertContains(home, 'w_960/v1/destaques/obra.jpg')
+            self.client.get(reverse('produto-detalhe', kwargs={'slug': produto.slug}))
+
+    def test_rebuild_media_urls_recalcula_linhas_alteradas_direto_no_banco(self):
+        produto = Produto.objects.create(nome='Cobogó', imagem_nome='cobogo.png')
+        Produto.objects.filter(pk=produto.pk).update(imagem='produtos/novo.jpg')
+        call_command('rebuild_media_urls', stdout=io.StringIO())
+        produto.refresh_from_db()
+        self.assertIn('produtos/novo.jpg', produto.midia['imagens'][0]['src'])
+
+
+class ImageVariantsTests(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.origem = self.tmp / 'images'
+        self.destino = self.origem / 'variants'
+        self.origem.mkdir()
+        Image.new('RGB', (1200, 600), 'gray').save(self.origem / 'Cobogo Teste.png')
+
+        manifesto = mock.patch.object(image_variants, 'MANIFESTO', self.destino / 'manifest.json')
+        manifesto.start()
+        self.addCleanup(manifesto.stop)
+        image_variants._cache.update(mtime=None, manifesto={})
+        configuracao = override_settings(STATICFILES_DIRS=[self.tmp])
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def build(self, destino=None):
+        destino = destino or self.destino
+        call_command('build_image_variants', source_dir=str(self.origem), output_dir=str(destino),
+                     workers=1, stdout=io.StringIO())
+        return json.loads((destino / 'manifest.json').read_text())
+
+    def test_gera_variantes_limitadas_a_largura_original_e_e_incremental(self):
+        entrada = self.build()['Cobogo Teste.png']
+        for formato in image_variants.FORMATOS:
+            larguras = [largura for largura, _ in entrada['variantes'][formato]]
+            self.assertEqual(larguras, [480, 960, 1200])
+            for _, caminho in entrada['variantes'][formato]:
+                self.assertTrue((self.destino / Path(caminho).name).exists())
+
+        arquivos = {f: f.stat().st_mtime_ns for f in self.destino.iterdir()}
+        self.assertEqual(self.build()['Cobogo Teste.png'], entrada)
+        self.assertEqual({f: f.stat().st_mtime_ns for f in self.destino.iterdir() if f.name != 'manifest.json'},
+                         {f: m for f, m in arquivos.items() if f.name != 'manifest.json'})
+
+    def test_urls_seguem_o_output_dir(self):
+        entrada = self.build(self.tmp / 'img' / 'webp')['Cobogo Teste.png']
+        for _, caminho in entrada['variantes']['webp']:
+            self.assertTrue(caminho.startswith('img/webp/'), caminho)
+
+        with self.assertRaisesMessage(CommandError, 'STATICFILES_DIRS'):
+            self.build(Path(tempfile.gettempdir()) / 'fora-do-static')
+
+    def test_so_remove_variantes_orfas(self):
+        self.build()
+        (self.destino / 'antiga.0123456789.480.webp').write_bytes(b'')
+        (self.destino / 'leia-me.txt').write_text('manter')
+        self.build()
+        self.assertFalse((self.destino / 'antiga.0123456789.480.webp').exists())
+        self.assertTrue((self.destino / 'leia-me.txt').exists())
+
+        # --output-dir apontado para as imagens originais: nenhuma delas é apagada
+        self.build(self.origem)
+        self.assertTrue((self.origem / 'Cobogo Teste.png').exists())
+
+    def test_tag_picture_usa_manifesto_e_degrada_sem_variantes(self):
+        template = Template('{% load core_extras %}{% picture nome alt="Cobogó" css_class="product-image" %}')
+
+        html = template.render(Context({'nome': 'Cobogo Teste.png'}))
+        self.assertNotIn('<picture>', html)
+        self.assertIn('src="/static/images/Cobogo%20Teste.png"', html)
+
+        self.build()
+        html = template.render(Context({'nome': 'Cobogo Teste.png'}))
+        self.assertTrue(html.startswith('<picture><source type="image/avif"'))
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('.960.webp 960w', html)
+        self.assertIn('class="product-image"', html)
+
+
+class AssetsTests(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.destino = self.tmp / 'bundles'
+        manifesto = mock.patch.object(assets, 'MANIFESTO', self.destino / 'manifest.json')
+        manifesto.start()
+        self.addCleanup(manifesto.stop)
+        assets._cache.update(mtime=None, manifesto={})
+
+    def build(self):
+        call_command('build_assets', output_dir=str(self.destino), stdout=io.StringIO())
+        return json.loads((self.destino / 'manifest.json').read_text())
+
+    def test_pacotes_minificados_e_incrementais(self):
+        manifesto = self.build()
+        self.assertEqual(set(manifesto), set(assets.PACOTES))
+        for nome, entrada in manifesto.items():
+            self.assertLess(entrada['bytes'], entrada['bytes_origem'], nome)
+        self.assertNotIn('/* Subcategoria', (self.destino / 'produtos.css').read_text())
+        self.assertIn('function initMobileFilterMenu', (self.destino / 'produtos.js').read_text())
+
+        mtimes = {f.name: f.stat().st_mtime_ns for f in self.destino.iterdir() if f.name != 'manifest.json'}
+        self.assertEqual(self.build(), manifesto)
+        self.assertEqual({f.name: f.stat().st_mtime_ns for f in self.destino.iterdir() if f.name != 'manifest.json'}, mtimes)
+
+    def test_tag_bundle_usa_as_fontes_ate_o_build(self):
+        template = Template("{% load core_extras %}{% bundle 'produtos.js' %}{% bundle 'site.css' %}")
+        self.assertEqual(template.render(Context()), (
+            '<script src="/static/js/products-page.js"></script>\n<script src="/static/js/produtos.js"></script>'
+            '<link rel="stylesheet" href="/static/css/style.css">'
+        ))
+
+        self.build()
+        self.assertEqual(template.render(Context()), (
+            '<script src="/static/bundles/produtos.js"></script><link rel="stylesheet" href="/static/bundles/site.css">'
+        ))
+        with override_settings(DEBUG=True):
+            self.assertIn('/static/js/produtos.js', template.render(Context()))
+
+    def test_collectstatic_gera_nomes_com_hash_servidos_como_immutable(self):
+        self.build()
+        # Só os pacotes e uma das imagens referenciadas no CSS (copiar e comprimir todos os estáticos deixaria o teste lento)
+        imagens = self.tmp / 'images'
+        imagens.mkdir()
+        Image.new('RGB', (8, 8), 'gray').save(imagens / 'hero.jpg')
+        with override_settings(STATICFILES_DIRS=[('bundles', self.destino), ('images', imagens)],
+                               STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+                               STATIC_ROOT=self.tmp / 'staticfiles'):
+            call_command('collectstatic', interactive=False, verbosity=0, stdout=io.StringIO())
+            hashed = json.loads((self.tmp / 'staticfiles' / 'staticfiles.json').read_text())['paths']['bundles/site.css']
+            self.assertRegex(hashed, r'^bundles/site\.[0-9a-f]{12}\.css$')
+            for sufixo in ('', '.gz', '.br'):
+                self.assertTrue((self.tmp / 'staticfiles' / (hashed + sufixo)).exists(), sufixo)
+            # url() das imagens aponta para os nomes com hash; referências a arquivos ausentes ficam como estão
+            css = (self.tmp / 'staticfiles' / hashed).read_text()
+            self.assertRegex(css, r'/static/images/hero\.[0-9a-f]{12}\.jpg')
+            self.assertIn('/static/images/cobogo.png', css)
+
+            self.assertIn(f'href="/static/{hashed}"', Template("{% load core_extras %}{% bundle 'site.css' %}").render(Context()))
+            response = Client().get(f'/static/{hashed}', HTTP_ACCEPT_ENCODING='br, gzip')
+            self.assertEqual(response['Content-Encoding'], 'br')
+            self.assertIn('immutable', response['Cache-Control'])
+            response.close()
+
+
+class CssCriticoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        (self.tmp / 'css').mkdir()
+        shutil.copy(assets.DIRETORIO_ORIGEM / 'css' / 'style.css', self.tmp / 'css' / 'style.css')
+        shutil.copytree(assets.DIRETORIO_ORIGEM / 'js', self.tmp / 'js')
+        for nome, valor in (('DIRETORIO_ORIGEM', self.tmp), ('PACOTES', {**assets.PACOTES, 'site.css': ('css/style.css',)})):
+            patcher = mock.patch.object(assets, nome, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        manifesto = mock.patch.object(css_critico, 'MANIFESTO', self.tmp / 'critico' / 'manifest.json')
+        manifesto.start()
+        self.addCleanup(manifesto.stop)
+        css_critico._cache.update(mtime=None, manifesto={})
+
+    def build(self):
+        saida = io.StringIO()
+        call_command('build_critical_css', output_dir=str(self.tmp / 'critico'), stdout=saida)
+        return json.loads((self.tmp / 'critico' / 'manifest.json').read_text()), saida.getvalue()
+
+    def test_filtra_regras_pelas_classes_e_ids(self):
+        arvore = css_critico.analisar_css("""
+            @import url('fontes.css');
+            h1 { margin: 0 }
+            .a, .z { color: red }
+            .a:not(.z) > #x { content: "}" }
+            .b .c { color: blue }
+            @media (max-width: 768px) { .a { animation: girar 1s } .z { color: green } }
+            @media print { .z { display: none } }
+            @keyframes girar { to { transform: rotate(1turn) } }
+            @keyframes sumir { to { opacity: 0 } }
+        """)
+        css = css_critico.css_usado(arvore, {'a', 'b'}, {'x'})
+        self.assertIn('h1{margin: 0}', css)
+        self.assertIn('.a{color: red}', css)
+        self.assertIn('.a:not(.z) > #x{content: "}"}', css)
+        self.assertIn('@media (max-width: 768px){.a{animation: girar 1s}}', css)
+        self.assertIn('@keyframes girar', css)
+        for ausente in ('.c', '.z{', '@media print', 'sumir', '@import'):
+            self.assertNotIn(ausente, css)
+
+    def test_css_critico_por_pagina_e_incremental(self):
+        manifesto, saida = self.build()
+        self.assertEqual(set(manifesto), set(css_critico.paginas()))
+        self.assertIn('core/admin/produtos_list.html', manifesto)
+        home = manifesto['core/home.html']
+        origem = len((self.tmp / 'css' / 'style.css').read_bytes())
+        self.assertLess(home['bytes'], home['bytes_usado'])
+        self.assertLess(home['bytes_usado'], origem)
+        # O hero fica acima do `{# dobra #}`; os destaques e o rodapé, abaixo
+        self.assertIn('.hero-title', home['css'])
+        self.assertNotIn('.destaques-title', home['css'])
+        self.assertNotIn('.footer', home['css'])
+        # Classes ligadas só pelo JS (site.js) entram
+        self.assertIn('.header.scrolled', home['css'])
+
+        self.assertEqual(self.build()[0], manifesto)
+        self.assertIn('0 página(s) gerada(s)', self.build()[1])
+
+        with open(self.tmp / 'css' / 'style.css', 'a') as f:
+            f.write('\n.hero-title { letter-spacing: 1px }\n')
+        novo, saida = self.build()
+        self.assertIn(f'{len(manifesto)} página(s) gerada(s)', saida)
+        self.assertIn('letter-spacing:1px', novo['core/home.html']['css'])
+
+    def test_pagina_recebe_css_inline_e_carrega_o_pacote_sem_bloquear(self):
+        criar_catalogo(1, 1, 1)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, '<link rel="stylesheet" href="/static/css/style.css">', html=False)
+        self.assertNotContains(response, '<style>.')
+
+        manifesto, _ = self.build()
+        cache.clear()
+        response = self.client.get(reverse('home'))
+        html = response.content.decode()
+        self.assertIn(f'<style>{manifesto["core/home.html"]["css"]}</style>', html)
+        self.assertIn('href="/static/css/style.css" media="print"', html)
+        self.assertIn('<noscript><link rel="stylesheet" href="/static/css/style.css"></noscript>', html)
+
+        with override_settings(DEBUG=True):
+            cache.clear()
+            self.assertNotIn('<style>.', self.client.get(reverse('home')).content.decode())
+
+
+class EmailOutboxTests(TestCase):
+    def enviar_contato(self):
+        return self.client.post(reverse('contato'), {
+            'nome': 'Maria', 'email': 'maria@example.com', 'mensagem': 'Quero um orçamento',
+        })
+
+    def test_contato_enfileira_sem_enviar_na_requisicao(self):
+        response = self.enviar_contato()
+        self.assertRedirects(response, reverse('home'))
+        self.assertEqual(len(mail.outbox), 0)
+
+        email = EmailPendente.objects.get()
+        self.assertEqual(email.mensagem_contato, MensagemContato.objects.get())
+        self.assertEqual(email.status, EmailPendente.STATUS_PENDENTE)
+        self.assertIn('Quero um orçamento', email.corpo)
+
+    def test_worker_envia_lote_pela_mesma_conexao(self):
+        for _ in range(3):
+            self.enviar_contato()
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open') as abrir:
+            call_command('process_email_outbox', stdout=io.StringIO())
+        abrir.assert_called_once()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(EmailPendente.objects.filter(status=EmailPendente.STATUS_ENVIADO).count(), 3)
+
+        call_command('process_email_outbox', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_lote_reservado_antes_do_envio(self):
+        self.enviar_contato()
+        self.enviar_contato()
+        vistos = []
+
+        def enviar(mensagem, fail_silently=False):
+            # Durante o SMTP o lote já está reservado e fora do alcance de outro worker
+            vistos.append(outbox.processar_lote(mail.get_connection()))
+            if len(vistos) == 2:
+                raise KeyboardInterrupt  # worker morto no meio do lote
+            return 1
+
+        with mock.patch('django.core.mail.EmailMessage.send', autospec=True, side_effect=enviar):
+            with self.assertRaises(KeyboardInterrupt):
+                outbox.processar_lote(mail.get_connection())
+        self.assertEqual(vistos, [(0, 0), (0, 0)])
+        # O primeiro e-mail ficou registrado como enviado; o segundo volta a vencer depois da reserva
+        primeiro, segundo = EmailPendente.objects.order_by('id')
+        self.assertEqual(primeiro.status, EmailPendente.STATUS_ENVIADO)
+        self.assertEqual(segundo.status, EmailPendente.STATUS_PENDENTE)
+        self.assertGreater(segundo.proxima_tentativa, timezone.now() + outbox.PRAZO_RESERVA / 2)
+
+        EmailPendente.objects.filter(pk=segundo.pk).update(proxima_tentativa=timezone.now())
+        self.assertEqual(outbox.processar_lote(mail.get_connection()), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+
+    @mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('SMTP indisponível'))
+    def test_falhas_reagendam_com_backoff_e_viram_dead_letter(self, _send):
+        self.enviar_contato()
+        email = EmailPendente.objects.get()
+        connection = mail.get_connection()
+
+        for tentativa in range(1, outbox.MAX_TENTATIVAS + 1):
+            self.assertEqual(outbox.processar_lote(connection), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.tentativas, tentativa)
+            self.assertIn('SMTP indisponível', email.ultimo_erro)
+            # Ainda não venceu: o próximo lote não tenta de novo
+            self.assertEqual(outbox.processar_lote(connection), (0, 0))
+            EmailPendente.objects.update(proxima_tentativa=email.proxima_tentativa - outbox.ATRASO_MAXIMO)
+
+        self.assertEqual(email.status, EmailPendente.STATUS_FALHOU)
+        self.assertEqual(outbox.processar_lote(connection), (0, 0))
+        self.assertEqual(outbox.atraso_para(1), outbox.ATRASO_BASE)
+        self.assertEqual(outbox.atraso_para(3), outbox.ATRASO_BASE * 4)
+
+
+class ProdutoSlugTests(TestCase):
+    def test_colisoes_usam_o_primeiro_sufixo_livre_com_uma_consulta(self):
+        for _ in range(3):
+            Produto.objects.create(nome='Cobogó Colmeia')
+        Produto.objects.filter(slug='cobogo-colmeia-1').delete()
+
+        produto = Produto(nome='Cobogó Colmeia')
+        # alocação do slug + INSERT (dentro de um savepoint)
+        with self.assertNumQueries(4):
+            produto.save()
+        self.assertEqual(produto.slug, 'cobogo-colmeia-1')
+
+    def test_renomear_regenera_slug_sem_select_extra(self):
+        produto = Produto.objects.create(nome='Pisante')
+        produto = Produto.objects.get(pk=produto.pk)
+
+        with self.assertNumQueries(1):
+            produto.save()
+        self.assertEqual(produto.slug, 'pisante')
+
+        produto.nome = 'Pisante Rústico'
+        produto.save()
+        self.assertEqual(produto.slug, 'pisante-rustico')
+        produto.save()
+        self.assertEqual(produto.slug, 'pisante-rustico')
+
+    def test_slug_reservado_e_nome_longo(self):
+        self.assertEqual(Produto.objects.create(nome='Filtro').slug, 'filtro-1')
+        self.assertEqual(Produto.objects.create(nome='Qualquer', slug='filtro').slug, 'qualquer')
+
+        nome = 'Revestimento ' * 10
+        primeiro = Produto.objects.create(nome=nome)
+        segundo = Produto.objects.create(nome=nome)
+        self.assertEqual(len(primeiro.slug), 50)
+        self.assertEqual(len(segundo.slug), 50)
+        self.assertTrue(segundo.slug.endswith('-1'))
+
+    def test_conflito_concorrente_realoca_o_slug(self):
+        Produto.objects.create(nome='Cuba')
+        alocacoes = iter(['cuba', 'cuba-1'])
+        with mock.patch('core.models.alocar_slug', side_effect=lambda *a, **k: next(alocacoes)):
+            produto = Produto.objects.create(nome='Cuba')
+        self.assertEqual(produto.slug, 'cuba-1')
+
+
+class ImportProdutosTests(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.backup = self.tmp / 'backup.json'
+        dados = [
+            {'model': 'core.categoriaprincipal', 'pk': 7, 'fields': {'nome': 'Cobogós', 'ordem': 2, 'ativo': True}},
+            {'model': 'core.subcategoria', 'pk': 3, 'fields': {'categoria_principal': 7, 'nome': 'Cobogó 40x40', 'ordem': 1}},
+        ] + [
+            {'model': 'core.produto', 'pk': i, 'fields': {
+                'nome': f'Cobogó {i}', 'slug': f'cobogo-{i}', 'categoria_principal': 'Cobogós',
+                'categoria': 'Cobogó 40x40', 'cor': None, 'ordem': i,
+            }}
+            for i in range(1, 8)
+        ] + [
+            {'model': 'core.produto', 'pk': 99, 'fields': {'nome': 'Pisante', 'categoria_principal': 'Linha Jardim',
+                                                           'categoria': 'Pisante'}},
+        ]
+        self.backup.write_text(json.dumps(dados, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    def importar(self, *args):
+        saida = io.StringIO()
+        call_command('import_produtos', '--file', str(self.backup), '--batch-size', '3', *args, stdout=saida)
+        return saida.getvalue()
+
+    def test_leitura_incremental_com_blocos_pequenos(self):
+        with open(self.backup, encoding='utf-8') as f:
+            esperado = json.load(f)
+        with open(self.backup, encoding='utf-8') as f:
+            self.assertEqual(list(iter_json_objects(f, chunk_size=7)), esperado)
+        self.assertEqual(list(iter_json_objects(io.StringIO('{"a": 1}\n{"a": 2}\n'))), [{'a': 1}, {'a': 2}])
+
+    def test_importa_em_lotes_resolvendo_categorias_e_subcategorias(self):
+        saida = self.importar()
+        self.assertIn('8 imported, 0 updated, 0 skipped', saida)
+        self.assertIn('rows/s', saida)
+
+        produto = Produto.objects.get(slug='cobogo-3')
+        self.assertEqual(produto.categoria_principal.nome, 'Cobogós')
+        self.assertEqual(produto.subcategoria.nome, 'Cobogó 40x40')
+        self.assertEqual(produto.subcategoria.categoria_principal, produto.categoria_principal)
+        self.assertEqual(produto.cor, '')
+
+        # Subcategoria criada sob a categoria principal do produto (antes quebrava sem ela)
+        pisante = Produto.objects.get(nome='Pisante')
+        self.assertEqual(pisante.slug, 'pisante')
+        self.assertEqual(pisante.subcategoria.categoria_principal.nome, 'Linha Jardim')
+
+        # Sem slug no backup não há como reconhecer o produto: ganha um slug novo
+        self.assertIn('1 imported, 0 updated, 7 skipped', self.importar())
+        self.assertEqual(Produto.objects.count(), 9)
+        self.assertTrue(Produto.objects.filter(slug='pisante-1').exists())
+
+    def test_dry_run_nao_grava_nada(self):
+        saida = self.importar('--dry-run')
+        self.assertIn('dry run', saida)
+        self.assertFalse(Produto.objects.exists())
+        self.assertFalse(CategoriaPrincipal.objects.exists())
+
+    def test_update_existing_atualiza_pelo_slug(self):
+        self.importar()
+        Produto.objects.filter(slug='cobogo-1').update(nome='Alterado')
+        saida = self.importar('--update-existing')
+        self.assertEqual(Produto.objects.get(slug='cobogo-1').nome, 'Cobogó 1')
+        # Os 7 com slug são atualizados; o sem slug é inserido de novo com um slug livre
+        self.assertIn('1 imported, 7 updated, 0 skipped', saida)
+
+    def test_update_existing_recalcula_midia(self):
+        self.backup.write_text(json.dumps([
+            {'model': 'core.produto', 'fields': {'nome': 'A', 'slug': 'a', 'imagem_nome': 'cobogo.png'}},
+        ]), encoding='utf-8')
+        self.importar()
+        self.assertEqual(Produto.objects.get(slug='a').midia, {'imagens': [{'static': 'cobogo.png'}]})
+
+        self.backup.write_text(json.dumps([
+            {'model': 'core.produto', 'fields': {'nome': 'A', 'slug': 'a', 'imagem_nome': 'hero.png'}},
+        ]), encoding='utf-8')
+        self.importar('--update-existing')
+        self.assertEqual(Produto.objects.get(slug='a').midia, {'imagens': [{'static': 'hero.png'}]})
+
+    def test_update_existing_muda_o_etag(self):
+        self.backup.write_text(json.dumps([
+            {'model': 'core.produto', 'fields': {'nome': 'A', 'slug': 'a'}},
+        ]), encoding='utf-8')
+        self.importar()
+        Produto.objects.filter(slug='a').update(updated_at=timezone.now() - timedelta(days=1))
+        antigo = Produto.objects.get(slug='a').updated_at
+        url = reverse('produto-detalhe', kwargs={'slug': 'a'})
+        etag = self.client.get(url)['ETag']
+
+        self.backup.write_text(json.dumps([
+            {'model': 'core.produto', 'fields': {'nome': 'A Revisado', 'slug': 'a'}},
+        ]), encoding='utf-8')
+        self.importar('--update-existing')
+        self.assertGreater(Produto.objects.get(slug='a').updated_at, antigo)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'A Revisado')
+
+    def test_linha_invalida_nao_derruba_o_lote(self):
+        self.backup.write_text(json.dumps([
+            {'model': 'core.produto', 'fields': {'nome': 'B', 'slug': 'b'}},
+            {'model': 'core.produto', 'fields': {'nome': 'C', 'slug': 'c', 'ordem': 'x'}},
+            {'model': 'core.produto', 'fields': {'nome': 'D', 'slug': 'filtro'}},
+            {'model': 'core.produto', 'fields': {'nome': 'E', 'slug': 'e', 'tag': 't' * 101}},
+            {'model': 'core.produto', 'fields': {'nome': 'F', 'slug': 'f', 'ordem': '4'}},
+        ]), encoding='utf-8')
+        saida = self.importar()
+        self.assertIn('2 imported, 0 updated, 0 skipped, 3 errors', saida)
+        self.assertIn("Error importing C: ordem:", saida)
+        self.assertEqual(set(Produto.objects.values_list('slug', flat=True)), {'b', 'f'})
+        self.assertEqual(Produto.objects.get(slug='f').ordem, 4)
+
+    def test_erro_do_banco_perde_so_a_linha(self):
+        bulk_create = Produto.objects.bulk_create
+
+        def falhar_com_g(produtos, **kwargs):
+            if any(produto.slug == 'g' for produto in produtos):
+                raise IntegrityError('violação simulada')
+            return bulk_create(produtos, **kwargs)
+
+        self.backup.write_text(json.dumps([
+            {'model': 'core.produto', 'fields': {'nome': 'G', 'slug': 'g'}},
+            {'model': 'core.produto', 'fields': {'nome': 'H', 'slug': 'h'}},
+        ]), encoding='utf-8')
+        with mock.patch.object(Produto.objects, 'bulk_create', side_effect=falhar_com_g):
+            saida = self.importar()
+        self.assertIn('1 imported, 0 updated, 0 skipped, 1 errors', saida)
+        self.assertEqual(list(Produto.objects.values_list('slug', flat=True)), ['h'])
+
+
+class CloudinarySyncTests(TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.checkpoint = self.tmp / 'checkpoint.jsonl'
+        self.destino = self.tmp / 'cloudinary'
+        self.produtos = [Produto.objects.create(nome=f'Cobogó {i}', imagem_nome='cobogo.png') for i in range(3)]
+
+    def migrar(self):
+        saida = io.StringIO()
+        call_command('migrate_images_to_cloudinary', '--workers', '2', '--checkpoint', str(self.checkpoint),
+                     '--local-dir', str(self.destino), stdout=saida)
+        return saida.getvalue()
+
+    def test_migra_em_paralelo_e_pula_linhas_ja_migradas(self):
+        saida = self.migrar()
+        self.assertIn('3 enviada(s), 0 retomada(s) do checkpoint, 0 falha(s)', saida)
+        for produto in self.produtos:
+            produto.refresh_from_db()
+            self.assertEqual(str(produto.imagem), f'produtos/{produto.slug}-imagem')
+            self.assertEqual(produto.imagem_nome, '')
+            self.assertTrue((self.destino / f'produtos/{produto.slug}-imagem.png').exists())
+        self.assertEqual(len(self.checkpoint.read_text().splitlines()), 3)
+
+        self.assertIn('0 enviada(s), 0 retomada(s)', self.migrar())
+
+    def test_retoma_do_checkpoint_sem_reenviar(self):
+        falhas = ['produtos/a', OSError('timeout'), OSError('timeout')]
+        with mock.patch('core.cloudinary_sync.UploaderLocal.__call__', side_effect=falhas):
+            with mock.patch('core.cloudinary_sync.TENTATIVAS', 1):
+                self.assertIn('1 enviada(s), 0 retomada(s) do checkpoint, 2 falha(s)', self.migrar())
+        self.assertEqual(Produto.objects.filter(imagem_nome='').count(), 1)
+        # Simula uma queda entre o checkpoint e a escrita no banco
+        Produto.objects.update(imagem=None, imagem_nome='cobogo.png')
+
+        with mock.patch('core.cloudinary_sync.UploaderLocal.__call__', return_value='produtos/b') as upload:
+            saida = self.migrar()
+        self.assertIn('2 enviada(s), 1 retomada(s) do checkpoint, 0 falha(s)', saida)
+        self.assertEqual(upload.call_count, 2)
+        self.assertEqual(Produto.objects.filter(imagem_nome='').count(), 3)
+
+    def test_upload_envia_so_arquivos_ainda_locais(self):
+        media = self.tmp / 'media'
+        (media / 'produtos').mkdir(parents=True)
+        (media / 'produtos' / 'cuba.png').write_bytes(b'png')
+        produto = self.produtos[0]
+        Produto.objects.filter(pk=produto.pk).update(imagem='produtos/cuba.png', imagem_2='produtos/ja-no-cloudinary')
+
+        saida = io.StringIO()
+        with override_settings(MEDIA_ROOT=media):
+            call_command('upload_images_to_cloudinary', '--checkpoint', str(self.checkpoint),
+                         '--local-dir', str(self.destino), stdout=saida)
+        self.assertIn('1 image(s) to upload from 1 product(s)', saida.getvalue())
+        produto.refresh_from_db()
+        self.assertEqual(str(produto.imagem), f'produtos/{produto.slug}-imagem')
+        self.assertEqual(str(produto.imagem_2), 'produtos/ja-no-cloudinary')
+
+
+class FigmaStandIn(BaseHTTPRequestHandler):
+    """Imita os endpoints /files, /images e o CDN de imagens da API do Figma."""
+    documento = {'document': {'id': '0:0', 'children': [
+        {'id': f'1:{i}', 'name': f'Foto {i}', 'fills': [{'type': 'IMAGE', 'imageRef': f'ref{i:08d}abc'}]}
+        for i in range(5)
+    ] + [{'id': '1:99', 'name': 'Duplicada', 'fills': [{'type': 'IMAGE', 'imageRef': 'ref00000000abc'}]}]}}
+
+    def log_message(self, *args):
+        pass
+
+    def responder(self, status, corpo=b'', headers=None):
+        self.send_response(status)
+        for nome, valor in (headers or {}).items():
+            self.send_header(nome, valor)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        servidor = self.server
+        with servidor.lock:
+            servidor.requisicoes.append(self.path)
+        if self.path.startswith('/v1/files/'):
+            cabecalho = {'version': servidor.versao, 'lastModified': '2025-11-03T14:34:32Z'}
+            corpo = cabecalho if 'depth=1' in self.path else {**cabecalho, **self.documento}
+            self.responder(200, json.dumps(corpo).encode())
+        elif self.path.startswith('/v1/images/'):
+            with servidor.lock:
+                servidor.chamadas_images += 1
+                primeira = servidor.chamadas_images == 1
+            if primeira:
+                self.responder(429, headers={'Retry-After': '0'})
+                return
+            ids = self.path.split('ids=')[1].split('&')[0].replace('%3A', ':').split('%2C')
+            urls = {i: f'http://127.0.0.1:{servidor.server_port}/cdn/{i}.png' for i in ids}
+            self.responder(200, json.dumps({'images': urls}).encode())
+        elif self.path.startswith('/cdn/'):
+            self.responder(200, b'\x89PNG' + b'x' * 200_000)
+        else:
+            self.responder(404)
+
+
+class FigmaDownloaderTests(TestCase):
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), FigmaStandIn)
+        self.servidor.lock = threading.Lock()
+        self.servidor.requisicoes = []
+        self.servidor.chamadas_images = 0
+        self.servidor.versao = '1'
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+
+    def baixar(self):
+        downloader = FigmaImageDownloader(
+            'KEY', self.tmp, max_workers=3, token='x', base_url=f'http://127.0.0.1:{self.servidor.server_port}/v1',
+            cache_dir=self.tmp / 'cache',
+        )
+        with mock.patch('builtins.print'):
+            return downloader.download_all_images()
+
+    def test_lote_unico_retry_after_e_pula_imagens_ja_baixadas(self):
+        resultado = self.baixar()
+        self.assertEqual((resultado['total'], resultado['downloaded'], resultado['failed']), (5, 5, 0))
+        # 1 lote de ids (a 1ª tentativa recebeu 429 e foi repetida após o Retry-After)
+        self.assertEqual(self.servidor.chamadas_images, 2)
+        arquivos = sorted(p.name for p in self.tmp.iterdir())
+        self.assertIn('foto_0_ref00000.png', arquivos)
+        self.assertFalse([nome for nome in arquivos if nome.endswith('.part')])
+        self.assertEqual((self.tmp / 'foto_3_ref00000.png').stat().st_size, 200_004)
+
+        self.servidor.requisicoes.clear()
+        resultado = self.baixar()
+        self.assertEqual((resultado['downloaded'], resultado['skipped']), (0, 5))
+        # Documento em cache: só a checagem de versão (depth=1) vai à API
+        self.assertEqual(self.servidor.requisicoes, ['/v1/files/KEY?depth=1'])
+
+        self.servidor.versao = '2'
+        self.servidor.requisicoes.clear()
+        self.baixar()
+        self.assertEqual(self.servidor.requisicoes, ['/v1/files/KEY?depth=1', '/v1/files/KEY'])
+
+    def test_travessia_iterativa_em_arvore_profunda(self):
+        raiz = no = {'id': '0', 'children': []}
+        for i in range(1, 5000):
+            filho = {'id': str(i), 'children': []}
+            if i % 1000 == 0:
+                filho['fills'] = [{'type': 'SOLID'}, {'type': 'IMAGE', 'imageRef': f'r{i}'}]
+            no['children'].append(filho)
+            no = filho
+        raiz['children'].append({'id': 'irmao', 'fills': [{'type': 'IMAGE', 'imageRef': 'ultimo'}]})
+
+        nos = FigmaImageDownloader.iter_image_nodes(raiz)
+        self.assertEqual(next(nos)['imageRef'], 'r1000')
+        self.assertEqual([n['imageRef'] for n in nos], ['r2000', 'r3000', 'r4000', 'ultimo'])
+
+    def test_limitador_respeita_retry_after(self):
+        limiter = RateLimiter(rate=100, capacity=1)
+        limiter.acquire()
+        limiter.penalize(0.2)
+        self.assertEqual(limiter.rate, 50)
+        inicio = time.monotonic()
+        limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.2)
+
+        self.assertEqual(parse_retry_after('7', 1), 7)
+        self.assertEqual(parse_retry_after(None, 3), 3)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT', 1), 0)
+
+
+class BootCommandTests(TransactionTestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        (self.tmp / 'static' / 'images').mkdir(parents=True)
+        (self.tmp / 'static' / 'css').mkdir()
+        (self.tmp / 'static' / 'css' / 'style.css').write_text('body{}')
+        Image.new('RGB', (64, 32), 'gray').save(self.tmp / 'static' / 'images' / 'logo.png')
+
+        for modulo, nome, valor in ((image_variants, 'DIRETORIO_ORIGEM', self.tmp / 'static' / 'images'),
+                                    (image_variants, 'DIRETORIO_VARIANTES', self.tmp / 'static' / 'images' / 'variants'),
+                                    (assets, 'DIRETORIO_ORIGEM', self.tmp / 'static'),
+                                    (assets, 'DIRETORIO_PACOTES', self.tmp / 'static' / 'bundles'),
+                                    (assets, 'PACOTES', {'site.css': ('css/style.css',)}),
+                                    (css_critico, 'DIRETORIO_CRITICO', self.tmp / 'static' / 'bundles' / 'critico'),
+                                    (css_critico, 'MANIFESTO', self.tmp / 'static' / 'bundles' / 'critico' / 'manifest.json')):
+            patcher = mock.patch.object(modulo, nome, valor)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Sem hash/compressão no collectstatic: aqui só importa quais etapas rodam
+        armazenamento = {**settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}}
+        configuracao = override_settings(STATICFILES_DIRS=[self.tmp / 'static'], STATIC_ROOT=self.tmp / 'staticfiles',
+                                         STORAGES=armazenamento)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+
+    def boot(self, *args):
+        saida = io.StringIO()
+        call_command('boot', *args, stdout=saida)
+        # Linhas do relatório: "<etapa> <status> <tempo>s <motivo>"
+        return dict(re.findall(r'^(\w+) +(executou|pulou|falhou) +[\d.]+s', saida.getvalue(), re.M))
+
+    def test_so_roda_etapas_cujas_entradas_mudaram(self):
+        status = self.boot()
+        self.assertEqual(status, {'migrate': 'pulou', 'image_variants': 'executou', 'assets': 'executou',
+                                  'critical_css': 'executou', 'collectstatic': 'executou', 'cloudinary': 'pulou', 'superuser': 'executou'})
+        self.assertTrue((self.tmp / 'staticfiles' / 'css' / 'style.css').exists())
+        self.assertTrue((self.tmp / 'staticfiles' / 'bundles' / 'site.css').exists())
+        self.assertTrue(get_user_model().objects.filter(username='admin', is_superuser=True).exists())
+
+        self.assertEqual(set(self.boot().values()), {'pulou'})
+
+        (self.tmp / 'static' / 'css' / 'novo.css').write_text('p{}')
+        status = self.boot()
+        self.assertEqual((status['collectstatic'], status['image_variants'], status['assets'], status['critical_css']),
+                         ('executou', 'pulou', 'pulou', 'pulou'))
+
+        (self.tmp / 'static' / 'css' / 'style.css').write_text('body{color:red}')
+        status = self.boot()
+        self.assertEqual((status['assets'], status['critical_css'], status['collectstatic']), ('executou', 'executou', 'executou'))
+
+        status = self.boot('--force', 'image_variants', '--skip', 'superuser')
+        self.assertEqual(status['image_variants'], 'executou')
+        self.assertNotIn('superuser', status)
+
+    def test_etapa_sem_executar_falha_ao_instanciar(self):
+        class Incompleta(boot_command.Etapa):
+            nome = 'incompleta'
+
+        with self.assertRaises(TypeError):
+            Incompleta()
+
+    def test_cloudinary_pula_quando_os_arquivos_nao_existem(self):
+        Produto.objects.create(nome='Sem Arquivo', imagem_nome='sumiu.png')
+        with mock.patch.dict(os.environ, {'MIGRATE_IMAGES_ON_BOOT': '1'}), \
+                override_settings(MEDIA_ROOT=self.tmp / 'media'), \
+                mock.patch.object(boot_command.Cloudinary, 'executar') as executar:
+            etapa = boot_command.Cloudinary()
+            self.assertEqual(etapa.verificar(), (False, '1 produto(s) sem arquivo local'))
+            self.assertFalse(etapa.verificar()[0])
+            self.assertIn('sem mudanças', etapa.verificar()[1])
+
+            # Um arquivo local para enviar muda a impressão digital
+            Produto.objects.create(nome='Com Arquivo', imagem_nome='logo.png')
+            self.assertEqual(self.boot('--skip', 'superuser')['cloudinary'], 'executou')
+            executar.assert_called_once()
+
+
+class ViewsAssincronasTests(TestCase):
+    """As rotas públicas no modo ASGI (ASYNC_VIEWS) apontam para core.views_async."""
+
+    def setUp(self):
+        cache.clear()
+        self.usar_urls(async_views=True)
+        self.addCleanup(self.usar_urls, async_views=False)
+        criar_catalogo(2, 2, 3)
+
+    def usar_urls(self, async_views):
+        # O include() do urlconf raiz guarda os padrões já resolvidos: recarrega os dois
+        with override_settings(ASYNC_VIEWS=async_views):
+            importlib.reload(importlib.import_module('core.urls'))
+            importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+        clear_url_caches()
+
+    async def test_paginas_publicas_assincronas(self):
+        produto = await Produto.objects.afirst()
+        for url in (reverse('home'), reverse('produtos'), reverse('produto-detalhe', kwargs={'slug': produto.slug})):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertEqual(response['X-Page-Cache'], 'MISS')
+            self.assertEqual((await self.async_client.get(url))['X-Page-Cache'], 'HIT')
+
+        response = await self.async_client.get(reverse('produtos'))
+        self.assertContains(response, produto.nome)
+        self.assertEqual(response.resolver_match.func.__module__, 'core.views_async')
+
+        response = await self.async_client.get(reverse('produto-detalhe', kwargs={'slug': 'nao-existe'}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_contato_assincrono_enfileira_o_email(self):
+        response = await self.async_client.post(reverse('contato'), {
+            'nome': 'Ana', 'email': 'ana@example.com', 'mensagem': 'Olá',
+        }, headers={'HX-Request': 'true'})
+        self.assertContains(response, 'Ana')
+        self.assertEqual(await EmailPendente.objects.acount(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class BancoEstatisticasTests(TestCase):
+    def test_perfil_sqlite_aplica_os_pragmas(self):
+        get_user_model().objects.create_user('staff', password='x')
+        self.client.login(username='staff', password='x')
+
+        dados = self.client.get(reverse('admin-banco-estatisticas')).json()
+        self.assertEqual(dados['perfil'], 'sqlite')
+        # 1 = NORMAL; journal_mode fica "memory" no banco de teste em memória
+        self.assertEqual(dados['pragmas']['synchronous'], 1)
+        self.assertEqual(dados['pragmas']['busy_timeout'], 5000)
+        self.assertEqual(dados['pragmas']['temp_store'], 2)
+
+    def test_estatisticas_do_pool(self):
+        from django.db import connection
+        from .database import estatisticas_conexoes
+
+        pool = mock.Mock(**{'get_stats.return_value': {'pool_size': 4, 'pool_available': 3}})
+        with mock.patch.object(connection, 'pool', pool, create=True):
+            self.assertEqual(estatisticas_conexoes()['pool'], {'pool_size': 4, 'pool_available': 3})
+
+    def test_exige_login(self):
+        self.assertEqual(self.client.get(reverse('admin-banco-estatisticas')).status_code, 302)
+
+
+class AdminProdutosTabelaTests(TestCase):
+    def setUp(self):
+        criar_catalogo(num_categorias=2, subcategorias_por_categoria=2, produtos_por_subcategoria=3)
+        Produto.objects.filter(nome__endswith='-1').update(ativo=False, ordem=5)
+        self.client.force_login(get_user_model().objects.create_user('admin', password='senha'))
+
+    def percorrer(self, **params):
+        """Nomes de todas as páginas da tabela, seguindo o cursor como a sentinela HTMX."""
+        nomes = []
+        response = self.client.get(reverse('admin-produtos'), params, HTTP_HX_REQUEST='true')
+        while True:
+            nomes += [p.nome for p in response.context['produtos']]
+            cursor = response.context['proximo_cursor']
+            if not cursor:
+                return nomes
+            response = self.client.get(reverse('admin-produtos'), {**params, 'cursor': cursor}, HTTP_HX_REQUEST='true')
+            self.assertTemplateUsed(response, 'core/admin/_produtos_linhas.html')
+            self.assertTemplateNotUsed(response, 'core/admin/_produtos_tabela.html')
+
+    @mock.patch('core.painel.PRODUTOS_POR_PAGINA_PAINEL', 5)
+    def test_paginas_por_chave_em_cada_ordenacao(self):
+        casos = {
+            'ordem': ['ordem', 'nome', 'id'],
+            '-nome': ['-nome', '-id'],
+            'status': ['ativo', 'nome', 'id'],
+            '-categoria': ['-categoria', '-nome', '-id'],
+        }
+        for ordenar, campos in casos.items():
+            with self.subTest(ordenar=ordenar):
+                esperado = list(Produto.objects.order_by(*campos).values_list('nome', flat=True))
+                self.assertEqual(self.percorrer(ordenar=ordenar), esperado)
+
+    def test_busca_no_servidor_e_so_as_colunas_exibidas(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('admin-produtos'), {'q': 'sub 1-0'}, HTTP_HX_REQUEST='true')
+        self.assertNotContains(response, '<html')
+        self.assertIn('HX-Request', response['Vary'])
+        produtos = response.context['produtos']
+        self.assertEqual({p.categoria for p in produtos}, {'Sub 1-0'})
+        self.assertIn('descricao', produtos[0].get_deferred_fields())
+        # Ordenação invertida no link da coluna ativa; cursor inválido é ignorado
+        self.assertContains(response, 'ordenar=-ordem')
+        response = self.client.get(reverse('admin-produtos'), {'cursor': 'lixo', 'ordenar': 'xyz'})
+        self.assertEqual(len(response.context['produtos']), 12)
+
+    def test_restauracao_do_historico_recebe_a_pagina_completa(self):
+        response = self.client.get(reverse('admin-produtos'), {'q': 'sub 1-0'}, HTTP_HX_REQUEST='true',
+                                   HTTP_HX_HISTORY_RESTORE_REQUEST='true')
+        self.assertTemplateUsed(response, 'core/admin/produtos_list.html')
+        self.assertContains(response, '<html')
+        self.assertIn('HX-History-Restore-Request', response['Vary'])
+
+    def test_alternar_status_devolve_so_a_linha(self):
+        produto = Produto.objects.filter(ativo=True).first()
+        url = reverse('admin-produto-toggle', kwargs={'pk': produto.pk})
+        response = self.client.post(url, HTTP_HX_REQUEST='true')
+        self.assertTemplateUsed(response, 'core/admin/_produto_linha.html')
+        self.assertContains(response, f'id="produto-{produto.pk}"')
+        self.assertContains(response, 'Inativo')
+        produto.refresh_from_db()
+        self.assertFalse(produto.ativo)
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+
+class AdminEscalavelTests(TestCase):
+    def setUp(self):
+        criar_catalogo(num_categorias=2, subcategorias_por_categoria=2, produtos_por_subcategoria=3)
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x'))
+        self.changelist = reverse('admin:core_produto_changelist')
+
+    def executar_acao(self, url, acao, selecionados, **extra):
+        with RegistroQueries() as registro:
+            response = self.client.post(url, {
+                'action': acao, '_selected_action': [obj.pk for obj in selecionados], 'index': 0, **extra,
+            })
+        self.assertEqual(response.status_code, 302)
+        return [q.sql for q in registro.queries if q.sql.startswith('UPDATE')]
+
+    def test_acoes_em_lote_sao_um_unico_update(self):
+        produtos = list(Produto.objects.all()[:4])
+        cache.set('pagina-teste', 'x')
+        self.assertEqual(len(self.executar_acao(self.changelist, 'desativar', produtos)), 1)
+        self.assertEqual(Produto.objects.filter(ativo=False).count(), 4)
+
+        mensagens = [MensagemContato.objects.create(nome='Ana', email='a@example.com', mensagem='Oi') for _ in range(3)]
+        url = reverse('admin:core_mensagemcontato_changelist')
+        self.assertEqual(len(self.executar_acao(url, 'marcar_como_lida', mensagens)), 1)
+        self.assertFalse(MensagemContato.objects.filter(lida=False).exists())
+
+    def test_mover_para_categoria_limpa_subcategorias_de_outra_categoria(self):
+        destino = CategoriaPrincipal.objects.get(nome='Categoria 1')
+        produtos = list(Produto.objects.filter(nome__in=['Produto 0-0-0', 'Produto 1-1-0']))
+        updates = self.executar_acao(self.changelist, 'mover_para_categoria', produtos, categoria_principal=destino.pk)
+        self.assertEqual(len(updates), 1)
+        subcategorias = dict(Produto.objects.filter(categoria_principal=destino).values_list('nome', 'subcategoria__nome'))
+        self.assertIsNone(subcategorias['Produto 0-0-0'])
+        self.assertEqual(subcategorias['Produto 1-1-0'], 'Sub 1-1')
+
+    def test_contagem_estimada_na_lista_sem_filtros(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        Produto.objects.create(nome='Depois do ANALYZE')
+        self.assertEqual(core_admin.contagem_estimada(Produto), 12)
+        with mock.patch.object(core_admin, 'LIMITE_CONTAGEM_EXATA', 5), RegistroQueries() as registro:
+            response = self.client.get(self.changelist)
+        self.assertEqual(response.context['cl'].result_count, 12)
+        self.assertFalse([q for q in registro.queries if 'COUNT(*)' in q.sql])
+        # Com busca a contagem é exata
+        response = self.client.get(self.changelist, {'q': '0-0-'})
+        self.assertEqual(response.context['cl'].result_count, 3)
+
+    def test_autocomplete_de_subcategoria(self):
+        url = reverse('admin:autocomplete')
+        params = {'app_label': 'core', 'model_name': 'produto', 'field_name': 'subcategoria', 'term': 'Sub'}
+        with self.assertNumQueries(4):
+            response = self.client.get(url, params)
+        self.assertEqual(len(response.json()['results']), 4)
+
+
+class IndicesCatalogoTests(TestCase):
+    """As consultas quentes do site e do painel usam os índices da migração 0013."""
+
+    def setUp(self):
+        criar_catalogo(num_categorias=2, subcategorias_por_categoria=2, produtos_por_subcategoria=3)
+        self.categoria = CategoriaPrincipal.objects.first()
+
+    def consultas(self):
+        return {
+            'core_produto_ativos_idx': catalog.produtos_ativos(),
+            'core_produto_cat_ativos_idx': Produto.objects.filter(ativo=True, categoria_principal=self.categoria)
+            .order_by('ordem', 'nome', 'id')[:catalog.PRODUTOS_POR_PAGINA],
+            'core_produto_ordem_idx': Produto.objects.order_by('ordem', 'nome', 'id')[:50],
+            'core_destaque_ativos_idx': Destaque.objects.filter(ativo=True).order_by('ordem', 'created_at'),
+            'core_mensagem_recentes_idx': MensagemContato.objects.order_by('-created_at')[:100],
+        }
+
+    def assertUsaIndices(self):
+        for indice, queryset in self.consultas().items():
+            with self.subTest(indice=indice):
+                self.assertIn(indice, queryset.explain())
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN do SQLite')
+    def test_sqlite(self):
+        self.assertUsaIndices()
+
+    @skipUnless(connection.vendor == 'postgresql', 'EXPLAIN do PostgreSQL')
+    def test_postgresql(self):
+        with connection.cursor() as cursor:
+            # Com poucas linhas o planejador prefere varrer a tabela; força a escolha entre índices
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        self.assertUsaIndices()
+
+
+class OrcamentoQueriesTests(OrcamentoQueriesTestMixin, TestCase):
+    """Toda view pública e do painel declara @orcamento_queries e o respeita sem N+1.
+
+    O catálogo é grande o bastante (3 categorias x 3 subcategorias x 4 produtos)
+    para qualquer query por linha aparecer como formato repetido.
+    """
+
+    def setUp(self):
+        cache.clear()
+        criar_catalogo(3, 3, 4)
+        self.produto = Produto.objects.order_by('pk').first()
+        self.categoria = CategoriaPrincipal.objects.order_by('pk').first()
+        self.subcategoria = Subcategoria.objects.order_by('pk').first()
+        self.destaques = [
+            Destaque.objects.create(titulo=f'Slide {n}', produto_link=produto)
+            for n, produto in enumerate(Produto.objects.all()[:4])
+        ]
+        self.usuario = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'x')
+
+    def assertViewNoOrcamento(self, url, dados=None):
+        orcamento = getattr(resolve(url.split('?')[0]).func, 'orcamento_queries', None)
+        self.assertIsNotNone(orcamento, f'{url} não declara @orcamento_queries')
+        metodo = self.client.post if dados is not None else self.client.get
+        with self.assertOrcamentoQueries(orcamento):
+            response = metodo(url, dados)
+        self.assertLess(response.status_code, 400, url)
+        return response
+
+    def test_views_publicas(self):
+        for url in (
+            reverse('home'),
+            reverse('quem-somos'),
+            reverse('produtos'),
+            reverse('produtos-filtro') + f'?subcategoria={self.subcategoria.pk}',
+            reverse('produtos-categoria', kwargs={'ref': self.categoria.pk}),
+            reverse('produto-detalhe', kwargs={'slug': self.produto.slug}),
+            reverse('login'),
+        ):
+            self.assertViewNoOrcamento(url)
+        self.assertViewNoOrcamento(reverse('contato'), {'nome': 'Ana', 'email': 'ana@example.com', 'mensagem': 'Oi'})
+        self.assertViewNoOrcamento(reverse('login'), {'username': 'admin', 'password': 'x'})
+
+    def test_paginas_do_painel(self):
+        self.client.force_login(self.usuario)
+        for url in (
+            reverse('admin-produtos'),
+            reverse('admin-produto-create'),
+            reverse('admin-produto-edit', kwargs={'pk': self.produto.pk}),
+            reverse('admin-produto-delete', kwargs={'pk': self.produto.pk}),
+            reverse('admin-categoria-create'),
+            reverse('admin-categoria-edit', kwargs={'pk': self.categoria.pk}),
+            reverse('admin-categoria-delete', kwargs={'pk': self.categoria.pk}),
+            reverse('admin-subcategoria-create'),
+            reverse('admin-subcategoria-create-cat', kwargs={'categoria_pk': self.categoria.pk}),
+            reverse('admin-subcategoria-edit', kwargs={'pk': self.subcategoria.pk}),
+            reverse('admin-subcategoria-delete', kwargs={'pk': self.subcategoria.pk}),
+            reverse('admin-destaques'),
+            reverse('admin-destaque-create'),
+            reverse('admin-destaque-edit', kwargs={'pk': self.destaques[0].pk}),
+            reverse('admin-destaque-delete', kwargs={'pk': self.destaques[0].pk}),
+            reverse('admin-banco-estatisticas'),
+        ):
+            self.assertViewNoOrcamento(url)
+
+    def test_acoes_do_painel(self):
+        self.client.force_login(self.usuario)
+        produto = {
+            'nome': 'Novo', 'categoria_principal': self.categoria.pk, 'subcategoria': self.subcategoria.pk, 'ordem': '1',
+        }
+        self.assertViewNoOrcamento(reverse('admin-produto-create'), produto)
+        self.assertViewNoOrcamento(reverse('admin-produto-edit', kwargs={'pk': self.produto.pk}), {**produto, 'slug': 'novo-2'})
+        self.assertViewNoOrcamento(reverse('admin-produto-duplicate', kwargs={'pk': self.produto.pk}))
+        self.assertViewNoOrcamento(reverse('admin-categoria-duplicate', kwargs={'pk': self.categoria.pk}))
+        self.assertViewNoOrcamento(reverse('admin-produto-remove-image', kwargs={'pk': self.produto.pk}), {'field': 'imagem'})
+        self.assertViewNoOrcamento(reverse('admin-produto-toggle', kwargs={'pk': self.produto.pk}), {})
+        self.assertViewNoOrcamento(reverse('admin-categoria-create'), {'nome': 'Nova'})
+        self.assertViewNoOrcamento(reverse('admin-categoria-edit', kwargs={'pk': self.categoria.pk}), {'nome': 'Outra'})
+        self.assertViewNoOrcamento(reverse('admin-subcategoria-create'), {'nome': 'Sub', 'categoria_principal': self.categoria.pk})
+        self.assertViewNoOrcamento(reverse('admin-subcategoria-edit', kwargs={'pk': self.subcategoria.pk}),
+                                   {'nome': 'Sub 2', 'categoria_principal': self.categoria.pk})
+        self.assertViewNoOrcamento(reverse('admin-destaque-create'), {'titulo': 'Slide', 'produto_link': self.produto.pk})
+        self.assertViewNoOrcamento(reverse('admin-destaque-edit', kwargs={'pk': self.destaques[0].pk}),
+                                   {'titulo': 'Slide', 'produto_link': self.produto.pk})
+        self.assertViewNoOrcamento(reverse('admin-destaque-delete', kwargs={'pk': self.destaques[0].pk}), {})
+        self.assertViewNoOrcamento(reverse('admin-subcategoria-delete', kwargs={'pk': self.subcategoria.pk}), {})
+        self.assertViewNoOrcamento(reverse('admin-produto-delete', kwargs={'pk': self.produto.pk}), {})
+        self.assertViewNoOrcamento(reverse('admin-categoria-delete', kwargs={'pk': self.categoria.pk}), {})
+        self.assertViewNoOrcamento(reverse('logout'))
+
+    def test_admin_do_django(self):
+        self.client.force_login(self.usuario)
+        MensagemContato.objects.create(nome='Ana', email='ana@example.com', mensagem='Oi')
+        for modelo in (Produto, Subcategoria, CategoriaPrincipal, MensagemContato, EmailPendente):
+            url = reverse(f'admin:core_{modelo._meta.model_name}_changelist')
+            # Inclui a estimativa de linhas (ContagemEstimadaPaginator) e o select do formulário de ações
+            with self.assertOrcamentoQueries(10):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+
+    def test_detector_aponta_a_linha_do_template(self):
+        template = Template('{% for sub in subcategorias %}\n{{ sub.categoria_principal.nome }}{% endfor %}')
+        with RegistroQueries() as registro:
+            template.render(Context({'subcategorias': list(Subcategoria.objects.all())}))
+
+        [(formato, queries)] = registro.repetidas()
+        self.assertEqual(len(queries), Subcategoria.objects.count())
+        self.assertIn('FROM "core_categoriaprincipal"', formato)
+        self.assertEqual({q.template for q in queries}, {'<unknown source>:2'})
+        # Listas IN de tamanhos diferentes têm o mesmo formato
+        self.assertEqual(formato_sql('SELECT 1 WHERE id IN (%s, %s)'), formato_sql('SELECT 1 WHERE id IN (%s)'))
+
+    def test_middleware_estoura_o_orcamento_em_modo_estrito(self):
+        middleware = ['core.query_budget.OrcamentoQueriesMiddleware', *settings.MIDDLEWARE]
+        with override_settings(MIDDLEWARE=middleware):
+            response = self.client.get(reverse('produtos'))
+            self.assertEqual(response['X-Query-Count'], '5')
+
+            cache.clear()
+            with mock.patch.object(resolve(reverse('produtos')).func, 'orcamento_queries', 1), \
+                    override_settings(QUERY_BUDGET_STRICT=True), self.assertLogs('core.queries', 'ERROR'):
+                with self.assertRaises(OrcamentoExcedido):
+                    self.client.get(reverse('produtos'))
+
+
+class BenchmarkTests(TestCase):
+    def test_percentil(self):
+        latencias = [float(n) for n in range(1, 101)]
+        self.assertEqual(benchmark.percentil(latencias, 50), 50.0)
+        self.assertEqual(benchmark.percentil(latencias, 99), 99.0)
+        self.assertEqual(benchmark.percentil([], 95), 0.0)
+
+    def test_carga_conta_4xx_como_erro(self):
+        class Servidor(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self.send_response(200 if self.path == '/' else 404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        servidor = ThreadingHTTPServer(('127.0.0.1', 0), Servidor)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        self.addCleanup(servidor.server_close)
+        self.addCleanup(servidor.shutdown)
+
+        latencias, erros, _ = benchmark_servers.gerar_carga(servidor.server_address[1], ['/', '/sumiu/'], 1, 0.3)
+        self.assertGreater(erros, 0)
+        self.assertLessEqual(abs(len(latencias) - erros), 1)
+
+    def test_catalogo_sintetico_deterministico(self):
+        resumo = catalogo_sintetico.gerar_catalogo(60, seed=7, destaques=3, tamanho_lote=25)
+        self.assertEqual(resumo['produtos'], 60)
+        self.assertEqual(Destaque.objects.count(), 3)
+        # Espalhado por toda a árvore do populate_categorias
+        self.assertEqual(Produto.objects.values('subcategoria').distinct().count(), resumo['subcategorias'])
+        campos = ('nome', 'slug', 'imagem_nome', 'dimensoes', 'cor', 'ativo', 'ordem')
+        primeiro = list(Produto.objects.order_by('pk').values_list(*campos))
+
+        Destaque.objects.all().delete()
+        Produto.objects.all().delete()
+        catalogo_sintetico.gerar_catalogo(60, seed=7, destaques=3, tamanho_lote=25)
+        self.assertEqual(list(Produto.objects.order_by('pk').values_list(*campos)), primeiro)
+
+        # Rodar de novo acrescenta produtos sem colidir slugs
+        catalogo_sintetico.gerar_catalogo(10, seed=7, destaques=0)
+        self.assertEqual(Produto.objects.count(), 70)
+
+    def test_seed_catalog_com_arvore_sintetica(self):
+        saida = io.StringIO()
+        call_command('seed_catalog', products=30, categories=3, subcategories=2, highlights=2,
+                     batch_size=7, seed=3, stdout=saida)
+        self.assertIn('30 produtos em 6 subcategorias', saida.getvalue())
+        self.assertEqual(CategoriaPrincipal.objects.filter(nome__startswith='Linha ').count(), 3)
+        self.assertEqual(Produto.objects.filter(subcategoria__categoria_principal__nome='Linha 002').count(), 10)
+        produto = Produto.objects.order_by('pk').first()
+        # Linhas inseridas direto no banco ainda carregam os padrões do modelo
+        self.assertEqual(produto.tag, 'Base Cementícia')
+        self.assertIsNotNone(produto.created_at)
+        self.assertEqual(produto.categoria, produto.subcategoria.nome)
+        self.assertEqual(Destaque.objects.filter(produto_link__ativo=True).count(), 2)
+
+        # A árvore já existe: só os produtos são acrescentados
+        call_command('seed_catalog', products=5, categories=3, subcategories=2, highlights=0,
+                     seed=3, stdout=io.StringIO())
+        self.assertEqual(Subcategoria.objects.filter(categoria_principal__nome__startswith='Linha ').count(), 6)
+        self.assertEqual(Produto.objects.count(), 35)
+
+    def test_seed_catalog_sem_subcategoria_ativa(self):
+        call_command('populate_categorias', stdout=io.StringIO())
+        CategoriaPrincipal.objects.update(ativo=False)
+        with self.assertRaisesMessage(CommandError, 'Nenhuma subcategoria ativa'):
+            call_command('seed_catalog', products=5, stdout=io.StringIO())
+        self.assertFalse(Produto.objects.exists())
+
+    def test_populate_categorias_idempotente(self):
+        call_command('populate_categorias', stdout=io.StringIO())
+        total = Subcategoria.objects.count()
+        saida = io.StringIO()
+        # Leituras em lote, independente do tamanho da árvore
+        with self.assertNumQueries(4):
+            call_command('populate_categorias', stdout=saida)
+        self.assertEqual(Subcategoria.objects.count(), total)
+        self.assertNotIn('criada:', saida.getvalue())
+
+    def test_comparar_aponta_regressoes(self):
+        baseline = {'home': {'p95_ms': 10.0, 'queries': 1.0, 'bytes': 1000.0, 'erros_http': 0}}
+        self.assertEqual(benchmark.comparar({'home': dict(baseline['home'], p95_ms=11.0)}, baseline), [])
+        regressoes = benchmark.comparar(
+            {'home': {'p95_ms': 20.0, 'queries': 2.0, 'bytes': 1000.0, 'erros_http': 0}}, baseline
+        )
+        self.assertEqual(len(regressoes), 2)
+
+    def test_comando_grava_e_compara_o_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            arquivo = Path(tmp) / 'baseline.json'
+            opcoes = dict(products=40, requests=3, concurrency=1, current_db=True, stdout=io.StringIO())
+            call_command('benchmark', save_baseline=str(arquivo), **opcoes)
+            baseline = json.loads(arquivo.read_text())
+            self.assertEqual(set(baseline['cenarios']), {cenario.nome for cenario in benchmark.cenarios_padrao('x')})
+            self.assertEqual(baseline['cenarios']['contato']['erros_http'], 0)
+
+            # Um baseline com menos queries que o atual é uma regressão
+            baseline['cenarios']['admin_produtos']['queries'] -= 1
+            arquivo.write_text(json.dumps(baseline))
+            with self.assertRaisesMessage(CommandError, 'admin_produtos'):
+                call_command('benchmark', baseline=str(arquivo), **dict(opcoes, products=0))
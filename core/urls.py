@@ -1,14 +1,20 @@
+from django.conf import settings
 from django.urls import path
 from django.views.generic import TemplateView
-from . import views
+from . import views, views_async
+
+# No modo ASGI as páginas públicas mais acessadas usam as versões assíncronas
+publicas = views_async if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
-    path('', views.home, name='home'),
+    path('', publicas.home, name='home'),
     path('robots.txt', TemplateView.as_view(template_name="robots.txt", content_type="text/plain")),
     path('quem-somos/', views.quem_somos, name='quem-somos'),
-    path('produtos/', views.produtos, name='produtos'),
-    path('produtos/<slug:slug>/', views.produto_detalhe, name='produto-detalhe'),
-    path('contato/', views.contato, name='contato'),
+    path('produtos/', publicas.produtos, name='produtos'),
+    path('produtos/filtro/', views.produtos_filtro, name='produtos-filtro'),
+    path('produtos/categoria/<str:ref>/', views.produtos_categoria, name='produtos-categoria'),
+    path('produtos/<slug:slug>/', publicas.produto_detalhe, name='produto-detalhe'),
+    path('contato/', publicas.contato, name='contato'),
     
     # Autenticação
     path('login/', views.login_view, name='login'),
@@ -19,6 +25,7 @@ urlpatterns = [
     path('admin/produtos/criar/', views.admin_produto_create, name='admin-produto-create'),
     path('admin/produtos/<int:pk>/editar/', views.admin_produto_edit, name='admin-produto-edit'),
     path('admin/produtos/<int:pk>/duplicar/', views.admin_produto_duplicate, name='admin-produto-duplicate'),
+    path('admin/produtos/<int:pk>/alternar-status/', views.admin_produto_toggle, name='admin-produto-toggle'),
     path('admin/produtos/<int:pk>/deletar/', views.admin_produto_delete, name='admin-produto-delete'),
     path('admin/produtos/<int:pk>/remover-imagem/', views.admin_produto_remove_image, name='admin-produto-remove-image'),
     
@@ -39,5 +46,8 @@ urlpatterns = [
     path('admin/destaques/criar/', views.admin_destaque_create, name='admin-destaque-create'),
     path('admin/destaques/<int:pk>/editar/', views.admin_destaque_edit, name='admin-destaque-edit'),
     path('admin/destaques/<int:pk>/deletar/', views.admin_destaque_delete, name='admin-destaque-delete'),
+
+    # Admin - Banco de dados
+    path('admin/banco/estatisticas/', views.admin_banco_estatisticas, name='admin-banco-estatisticas'),
 ]
 
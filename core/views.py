@@ -2,64 +2,116 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
+from django.utils.cache import patch_vary_headers
 from django.views.decorators.http import require_POST
 from django_htmx.http import HttpResponseClientRedirect
-from django.core.mail import send_mail
-from .models import Produto, CategoriaPrincipal, Subcategoria, MensagemContato, Destaque
+from django.db import transaction
+from django.utils import timezone
+from .models import Produto, CategoriaPrincipal, Subcategoria, MensagemContato, Destaque, escolher_slug
+from .catalog import (
+    montar_catalogo, ler_filtros, filtrar_catalogo,
+    categorias_ativas, resolver_categoria, arvore_de_filtros, pagina_de_produtos,
+)
+from .cache import VARY_HTMX, cache_pagina_publica, invalidar_paginas, resposta_condicional
+from .context_processors import navegacao_htmx
+from .database import estatisticas_conexoes
+from .query_budget import orcamento_queries
+from .outbox import enfileirar_email_contato
+from .painel import tabela_de_produtos
 import os
 
+@orcamento_queries(3)
+@resposta_condicional(Destaque, Produto)
+@cache_pagina_publica
 def home(request):
-    destaques = Destaque.objects.filter(ativo=True).order_by('ordem', 'created_at')
+    # produto_link é usado no "Saiba mais" de cada slide
+    destaques = Destaque.objects.filter(ativo=True).select_related('produto_link').order_by('ordem', 'created_at')
     return render(request, 'core/home.html', {'destaques': destaques})
 
+@orcamento_queries(2)
+@cache_pagina_publica
 def quem_somos(request):
     return render(request, 'core/quem-somos.html')
 
+@orcamento_queries(5)
+@resposta_condicional(CategoriaPrincipal, Subcategoria, Produto)
+@cache_pagina_publica
 def produtos(request):
-    categoria_filtro = request.GET.get('categoria', '').lower()
-    
-    # Buscar categorias principais do banco
-    categorias_principais = CategoriaPrincipal.objects.filter(ativo=True).order_by('ordem', 'nome')
-    
-    # Agrupar produtos por categoria_principal - usar lista para facilitar no template
-    produtos_agrupados_list = []
-    for categoria in categorias_principais:
-        produtos_categoria = Produto.objects.filter(
-            ativo=True,
-            categoria_principal=categoria
-        ).order_by('ordem', 'nome')
-        if produtos_categoria.exists():
-            produtos_agrupados_list.append({
-                'categoria': categoria,
-                'produtos': produtos_categoria
-            })
-    
-    # Também criar dicionário para compatibilidade
-    produtos_agrupados = {}
-    for item in produtos_agrupados_list:
-        produtos_agrupados[item['categoria'].nome] = item['produtos']
-    
-    # SEMPRE retornar TODOS os produtos ativos
-    # O filtro será aplicado via JavaScript no frontend
-    produtos_list = Produto.objects.filter(ativo=True).order_by('ordem', 'nome')
-    
+    """Catálogo com a barra lateral e a primeira página de cards.
+
+    As páginas seguintes (e os filtros) vêm do `produtos_filtro`, pedidas pela
+    sentinela HTMX ao rolar: o HTML não cresce com o tamanho do catálogo.
+    """
     return render(request, 'core/produtos.html', {
-        'produtos': produtos_list,
-        'produtos_agrupados': produtos_agrupados,
-        'produtos_agrupados_list': produtos_agrupados_list,  # Nova estrutura mais fácil de usar
-        'categoria_filtro': categoria_filtro,
-        'categorias_principais': categorias_principais
+        **montar_catalogo(),
+        'categoria_filtro': request.GET.get('categoria', '').lower(),
+    })
+
+@orcamento_queries(7)
+@cache_pagina_publica
+def produtos_categoria(request, ref):
+    """Produtos de uma categoria (por id ou slug do nome), paginados por cursor.
+
+    A primeira página vem com o layout completo; as seguintes são pedidas pela
+    sentinela HTMX (`hx-trigger="revealed"`) e retornam só os cards.
+    """
+    categorias_principais = list(categorias_ativas())
+    categoria = resolver_categoria(categorias_principais, ref)
+    if categoria is None:
+        raise Http404('Categoria não encontrada')
+
+    produtos_list, proximo_cursor = pagina_de_produtos(
+        Produto.objects.filter(ativo=True, categoria_principal=categoria)
+        .select_related('categoria_principal', 'subcategoria'),
+        cursor=request.GET.get('cursor'),
+    )
+    contexto = {'produtos': produtos_list, 'proximo_cursor': proximo_cursor}
+    if request.htmx and request.GET.get('cursor'):
+        return render(request, 'core/_produtos_pagina.html', contexto)
+
+    produtos_agrupados_list, contagem_subcategorias = arvore_de_filtros(categorias_principais)
+    contexto.update({
+        'categoria_atual': categoria,
+        'produtos_agrupados_list': produtos_agrupados_list,
+        'categorias_principais': categorias_principais,
+        'contagem_subcategorias': contagem_subcategorias,
+    })
+    return render(request, 'core/produtos.html', contexto)
+
+@orcamento_queries(5)
+@cache_pagina_publica
+def produtos_filtro(request):
+    """Fragmento HTMX com os cards filtrados (categoria, subcategoria, q), paginados por cursor.
+
+    A primeira página traz as contagens por faceta; com `cursor` (sentinela do
+    scroll infinito) vêm só os cards da próxima página.
+    """
+    cursor = request.GET.get('cursor')
+    produtos_list, proximo_cursor, contagem_categorias, contagem_subcategorias = filtrar_catalogo(
+        **ler_filtros(request.GET), cursor=cursor,
+    )
+    contexto = {'produtos': produtos_list, 'proximo_cursor': proximo_cursor}
+    if cursor:
+        return render(request, 'core/_produtos_pagina.html', contexto)
+    return render(request, 'core/_produtos_filtro.html', {
+        **contexto,
+        'contagem_categorias': contagem_categorias,
+        'contagem_subcategorias': contagem_subcategorias,
     })
 
+@orcamento_queries(4)
+@resposta_condicional(Produto, CategoriaPrincipal, Subcategoria)
+@cache_pagina_publica
 def produto_detalhe(request, slug):
-    produto = get_object_or_404(Produto, slug=slug)
+    produto = get_object_or_404(Produto.objects.select_related('categoria_principal'), slug=slug)
     outros_produtos = Produto.objects.exclude(slug=slug).filter(ativo=True).order_by('ordem', 'nome')[:4]
     return render(request, 'core/produto-detalhe.html', {
         'produto': produto,
         'outros_produtos': outros_produtos
     })
 
+@orcamento_queries(4)
 def contato(request):
     if request.method == 'POST':
         nome = request.POST.get('nome', '').strip()
@@ -68,25 +120,15 @@ def contato(request):
         
         # Validar campos
         if nome and email and mensagem:
-            # Salvar mensagem no banco de dados
-            MensagemContato.objects.create(
-                nome=nome,
-                email=email,
-                mensagem=mensagem
-            )
-
-            # Enviar e-mail via SMTP Outlook
-            try:
-                from django.conf import settings as django_settings
-                send_mail(
-                    subject=f'Novo contato do site - {nome}',
-                    message=f'Nome: {nome}\nE-mail: {email}\n\nMensagem:\n{mensagem}',
-                    from_email=django_settings.EMAIL_HOST_USER,
-                    recipient_list=[django_settings.EMAIL_DESTINO],
-                    fail_silently=False,
+            # Salvar mensagem e enfileirar a notificação na mesma transação;
+            # o envio SMTP fica com o comando process_email_outbox
+            with transaction.atomic():
+                mensagem_contato = MensagemContato.objects.create(
+                    nome=nome,
+                    email=email,
+                    mensagem=mensagem
                 )
-            except Exception as e:
-                print(f'Erro ao enviar email: {e}')
+                enfileirar_email_contato(mensagem_contato)
             
             if request.htmx:
                 # Retorna uma mensagem de sucesso via HTMX
@@ -109,6 +151,7 @@ def contato(request):
     return render(request, 'core/contato.html')
 
 # Autenticação
+@orcamento_queries(9)
 def login_view(request):
     if request.user.is_authenticated:
         return redirect('admin-produtos')
@@ -125,6 +168,7 @@ def login_view(request):
             messages.error(request, 'Usuário ou senha incorretos.')
     return render(request, 'core/login.html')
 
+@orcamento_queries(4)
 @login_required
 def logout_view(request):
     logout(request)
@@ -132,19 +176,53 @@ def logout_view(request):
     return redirect('home')
 
 # Admin - CRUD de Produtos
+@orcamento_queries(7)
 @login_required
 def admin_produtos(request):
-    produtos_list = Produto.objects.all()
-    categorias = CategoriaPrincipal.objects.filter(ativo=True).prefetch_related('subcategorias')
-    subcategorias = Subcategoria.objects.select_related('categoria_principal').all()
-    destaques = Destaque.objects.all().order_by('ordem')
-    return render(request, 'core/admin/produtos_list.html', {
-        'produtos': produtos_list,
+    """Painel com a tabela de produtos paginada por chave, com busca e ordenação no servidor.
+
+    Requisições HTMX recebem só o fragmento: a tabela inteira (busca/ordenação)
+    ou as linhas da próxima página (`cursor`, pedida pela sentinela ao rolar).
+    A restauração do histórico (a busca e a ordenação usam `hx-push-url`)
+    recebe a página completa.
+    """
+    tabela = tabela_de_produtos(request.GET)
+    if navegacao_htmx(request):
+        if request.GET.get('cursor'):
+            response = render(request, 'core/admin/_produtos_linhas.html', tabela)
+        else:
+            response = render(request, 'core/admin/_produtos_tabela.html', tabela)
+        patch_vary_headers(response, VARY_HTMX)
+        return response
+
+    categorias = CategoriaPrincipal.objects.filter(ativo=True).only('id', 'nome', 'ordem', 'ativo')
+    subcategorias = Subcategoria.objects.select_related('categoria_principal').only(
+        'id', 'nome', 'ordem', 'ativo', 'categoria_principal__nome'
+    )
+    destaques = Destaque.objects.only('id', 'titulo', 'tipo', 'ordem', 'ativo').order_by('ordem')
+    response = render(request, 'core/admin/produtos_list.html', {
+        **tabela,
         'categorias': categorias,
         'subcategorias': subcategorias,
         'destaques': destaques
     })
+    patch_vary_headers(response, VARY_HTMX)
+    return response
+
+@orcamento_queries(5)
+@login_required
+@require_POST
+def admin_produto_toggle(request, pk):
+    """Ativa/desativa o produto e devolve só a linha atualizada para o HTMX trocar no lugar."""
+    produto = get_object_or_404(Produto, pk=pk)
+    produto.ativo = not produto.ativo
+    produto.save(update_fields=['ativo', 'updated_at'])
+    if request.htmx:
+        return render(request, 'core/admin/_produto_linha.html', {'produto': produto})
+    messages.success(request, f'Produto "{produto.nome}" {"ativado" if produto.ativo else "desativado"}.')
+    return redirect('admin-produtos')
 
+@orcamento_queries(9)
 @login_required
 def admin_produto_create(request):
     if request.method == 'POST':
@@ -201,12 +279,15 @@ def admin_produto_create(request):
                 pass
         messages.success(request, f'Produto "{produto.nome}" criado com sucesso!')
         return redirect('admin-produtos')
-    categorias_principais = CategoriaPrincipal.objects.filter(ativo=True).order_by('ordem', 'nome')
+    categorias_principais = (
+        CategoriaPrincipal.objects.filter(ativo=True).prefetch_related('subcategorias').order_by('ordem', 'nome')
+    )
     return render(request, 'core/admin/produto_form.html', {'produto': None, 'categorias_principais': categorias_principais})
 
+@orcamento_queries(9)
 @login_required
 def admin_produto_edit(request, pk):
-    produto = get_object_or_404(Produto, pk=pk)
+    produto = get_object_or_404(Produto.objects.select_related('categoria_principal', 'subcategoria'), pk=pk)
     if request.method == 'POST':
         produto.nome = request.POST.get('nome')
         produto.slug = request.POST.get('slug')
@@ -249,9 +330,12 @@ def admin_produto_edit(request, pk):
         produto.save()
         messages.success(request, f'Produto "{produto.nome}" atualizado com sucesso!')
         return redirect('admin-produtos')
-    categorias_principais = CategoriaPrincipal.objects.filter(ativo=True).order_by('ordem', 'nome')
+    categorias_principais = (
+        CategoriaPrincipal.objects.filter(ativo=True).prefetch_related('subcategorias').order_by('ordem', 'nome')
+    )
     return render(request, 'core/admin/produto_form.html', {'produto': produto, 'categorias_principais': categorias_principais})
 
+@orcamento_queries(4)
 @login_required
 @require_POST
 def admin_produto_remove_image(request, pk):
@@ -278,6 +362,7 @@ def admin_produto_remove_image(request, pk):
     except Exception as e:
         return JsonResponse({'ok': False, 'error': str(e)}, status=500)
 
+@orcamento_queries(5)
 @login_required
 def admin_produto_delete(request, pk):
     produto = get_object_or_404(Produto, pk=pk)
@@ -288,6 +373,7 @@ def admin_produto_delete(request, pk):
         return redirect('admin-produtos')
     return render(request, 'core/admin/produto_confirm_delete.html', {'produto': produto})
 
+@orcamento_queries(8)
 @login_required
 def admin_produto_duplicate(request, pk):
     produto_original = get_object_or_404(Produto, pk=pk)
@@ -324,6 +410,7 @@ def admin_produto_duplicate(request, pk):
     return redirect('admin-produtos')
 
 # Admin - CRUD de Categorias
+@orcamento_queries(4)
 @login_required
 def admin_categoria_create(request):
     if request.method == 'POST':
@@ -345,6 +432,7 @@ def admin_categoria_create(request):
     
     return render(request, 'core/admin/categoria_form.html', {'categoria': None})
 
+@orcamento_queries(4)
 @login_required
 def admin_categoria_edit(request, pk):
     categoria = get_object_or_404(CategoriaPrincipal, pk=pk)
@@ -357,6 +445,7 @@ def admin_categoria_edit(request, pk):
         return redirect('admin-produtos')
     return render(request, 'core/admin/categoria_form.html', {'categoria': categoria})
 
+@orcamento_queries(12)
 @login_required
 def admin_categoria_delete(request, pk):
     categoria = get_object_or_404(CategoriaPrincipal, pk=pk)
@@ -391,6 +480,7 @@ def admin_categoria_delete(request, pk):
         'quantidade_produtos': quantidade_produtos
     })
 
+@orcamento_queries(8)
 @login_required
 def admin_categoria_duplicate(request, pk):
     categoria_original = get_object_or_404(CategoriaPrincipal, pk=pk)
@@ -404,13 +494,15 @@ def admin_categoria_duplicate(request, pk):
     
     nova_categoria.save()
     
-    # Duplicar todos os produtos associados à categoria original
-    # Buscar produtos que tenham categoria_principal igual ao nome da categoria original
-    produtos_originais = Produto.objects.filter(
-        categoria_principal=categoria_original
-    )
-    
-    produtos_duplicados = 0
+    # Duplicar todos os produtos associados à categoria original.
+    # Nomes e slugs já usados vêm em uma consulta cada e os produtos são criados
+    # com um único bulk_create, em vez de um exists() e um save() por produto.
+    produtos_originais = list(Produto.objects.filter(categoria_principal=categoria_original))
+    nomes_usados = set(Produto.objects.filter(nome__contains='(Cópia').values_list('nome', flat=True))
+    slugs_usados = set(Produto.objects.values_list('slug', flat=True))
+    max_length_slug = Produto._meta.get_field('slug').max_length
+
+    novos_produtos = []
     for produto_original in produtos_originais:
         # Criar novo produto com nome único
         nome_base = produto_original.nome.replace(' (Cópia)', '')
@@ -418,13 +510,16 @@ def admin_categoria_duplicate(request, pk):
         
         # Garantir que o nome seja único
         counter = 1
-        while Produto.objects.filter(nome=nome_novo).exists():
+        while nome_novo in nomes_usados:
             nome_novo = f"{nome_base} (Cópia {counter})"
             counter += 1
+        nomes_usados.add(nome_novo)
+        slug = escolher_slug(nome_novo, slugs_usados, max_length_slug)
+        slugs_usados.add(slug)
         
         novo_produto = Produto(
             nome=nome_novo,
-            slug=None,  # Será gerado automaticamente
+            slug=slug,
             descricao=produto_original.descricao,
             categoria_principal=nova_categoria,  # Associar à nova categoria
             categoria=produto_original.categoria,
@@ -442,8 +537,13 @@ def admin_categoria_duplicate(request, pk):
         if produto_original.imagem:
             novo_produto.imagem = produto_original.imagem
         
-        novo_produto.save()
-        produtos_duplicados += 1
+        novos_produtos.append(novo_produto)
+
+    Produto.objects.bulk_create(novos_produtos)
+    produtos_duplicados = len(novos_produtos)
+    # bulk_create não dispara post_save: invalida as páginas em cache explicitamente
+    if produtos_duplicados:
+        invalidar_paginas()
     
     if produtos_duplicados > 0:
         messages.success(request, f'Categoria "{nova_categoria.nome}" e {produtos_duplicados} produto(s) duplicados com sucesso!')
@@ -453,6 +553,7 @@ def admin_categoria_duplicate(request, pk):
     return redirect('admin-produtos')
 
 # Admin - CRUD de Subcategorias
+@orcamento_queries(5)
 @login_required
 def admin_subcategoria_create(request, categoria_pk=None):
     categoria = None
@@ -496,6 +597,7 @@ def admin_subcategoria_create(request, categoria_pk=None):
         'categoria': categoria, 'subcategoria': None, 'categoria_list': categorias_list
     })
 
+@orcamento_queries(5)
 @login_required
 def admin_subcategoria_edit(request, pk):
     subcategoria = get_object_or_404(Subcategoria, pk=pk)
@@ -514,6 +616,7 @@ def admin_subcategoria_edit(request, pk):
         'categoria_list': categorias_list
     })
 
+@orcamento_queries(8)
 @login_required
 def admin_subcategoria_delete(request, pk):
     subcategoria = get_object_or_404(Subcategoria, pk=pk)
@@ -524,7 +627,7 @@ def admin_subcategoria_delete(request, pk):
         # Remover a subcategoria dos produtos associados
         produtos_associados = Produto.objects.filter(subcategoria=subcategoria)
         quantidade_produtos = produtos_associados.count()
-        produtos_associados.update(subcategoria=None)
+        produtos_associados.update(subcategoria=None, updated_at=timezone.now())
         
         subcategoria.delete()
         
@@ -543,6 +646,7 @@ def admin_subcategoria_delete(request, pk):
     })
 
 # Admin - CRUD de Destaques
+@orcamento_queries(3)
 @login_required
 def admin_destaques(request):
     destaques = Destaque.objects.all().order_by('ordem', 'created_at')
@@ -555,6 +659,7 @@ def admin_destaques(request):
         'subcategorias': subcategorias
     })
 
+@orcamento_queries(4)
 @login_required
 def admin_destaque_create(request):
     if request.method == 'POST':
@@ -596,6 +701,7 @@ def admin_destaque_create(request):
         'produtos': produtos_list
     })
 
+@orcamento_queries(5)
 @login_required
 def admin_destaque_edit(request, pk):
     destaque = get_object_or_404(Destaque, pk=pk)
@@ -629,6 +735,7 @@ def admin_destaque_edit(request, pk):
         'produtos': produtos_list
     })
 
+@orcamento_queries(4)
 @login_required
 def admin_destaque_delete(request, pk):
     destaque = get_object_or_404(Destaque, pk=pk)
@@ -637,4 +744,10 @@ def admin_destaque_delete(request, pk):
         destaque.delete()
         messages.success(request, f'Destaque "{titulo}" deletado com sucesso!')
         return redirect('admin-destaques')
-    return render(request, 'core/admin/destaque_confirm_delete.html', {'destaque': destaque})
\ No newline at end of file
+    return render(request, 'core/admin/destaque_confirm_delete.html', {'destaque': destaque})
+# Admin - Banco de dados
+@orcamento_queries(7)
+@login_required
+def admin_banco_estatisticas(request):
+    """Estatísticas das conexões do worker que atendeu o request (pool, PRAGMAs do SQLite)."""
+    return JsonResponse(estatisticas_conexoes())
@@ -0,0 +1,100 @@
+"""Versões assíncronas das views públicas mais acessadas, usadas no modo ASGI.
+
+Com `ASYNC_VIEWS` ligado (padrão ao servir por `betondekor.asgi`), `core.urls`
+aponta `home`, `produtos`, `produto-detalhe` e `contato` para cá. As consultas
+usam o ORM assíncrono e todo queryset é avaliado antes do render, porque o
+template roda no event loop e não pode disparar consultas preguiçosas.
+O que continua bloqueante (a transação do formulário de contato) é delegado
+a uma thread com `sync_to_async`.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.db import transaction
+from django.shortcuts import render, redirect, aget_object_or_404
+
+from .cache import cache_pagina_publica, resposta_condicional
+from .catalog import amontar_catalogo
+from .models import CategoriaPrincipal, Destaque, MensagemContato, Produto, Subcategoria
+from .outbox import enfileirar_email_contato
+from .query_budget import orcamento_queries
+
+
+async def _resolver_usuario(request):
+    """Carrega o usuário pela API assíncrona; o cabeçalho usa `user.is_authenticated`
+    e o carregamento preguiçoso padrão faria uma consulta síncrona durante o render."""
+    request.user = await request.auser()
+
+
+@orcamento_queries(3)
+@resposta_condicional(Destaque, Produto)
+@cache_pagina_publica
+async def home(request):
+    await _resolver_usuario(request)
+    destaques = [
+        destaque async for destaque in
+        Destaque.objects.filter(ativo=True).select_related('produto_link').order_by('ordem', 'created_at')
+    ]
+    return render(request, 'core/home.html', {'destaques': destaques})
+
+
+@orcamento_queries(5)
+@resposta_condicional(CategoriaPrincipal, Subcategoria, Produto)
+@cache_pagina_publica
+async def produtos(request):
+    await _resolver_usuario(request)
+    return render(request, 'core/produtos.html', {
+        **await amontar_catalogo(),
+        'categoria_filtro': request.GET.get('categoria', '').lower(),
+    })
+
+
+@orcamento_queries(4)
+@resposta_condicional(Produto, CategoriaPrincipal, Subcategoria)
+@cache_pagina_publica
+async def produto_detalhe(request, slug):
+    await _resolver_usuario(request)
+    produto = await aget_object_or_404(
+        Produto.objects.select_related('categoria_principal', 'subcategoria'), slug=slug
+    )
+    outros_produtos = [
+        outro async for outro in
+        Produto.objects.exclude(slug=slug).filter(ativo=True).order_by('ordem', 'nome')[:4]
+    ]
+    return render(request, 'core/produto-detalhe.html', {
+        'produto': produto,
+        'outros_produtos': outros_produtos
+    })
+
+
+@sync_to_async
+def _salvar_contato(nome, email, mensagem):
+    # Mesma transação da versão síncrona: mensagem + e-mail na fila (outbox)
+    with transaction.atomic():
+        mensagem_contato = MensagemContato.objects.create(nome=nome, email=email, mensagem=mensagem)
+        enfileirar_email_contato(mensagem_contato)
+
+
+@orcamento_queries(4)
+async def contato(request):
+    await _resolver_usuario(request)
+    if request.method == 'POST':
+        nome = request.POST.get('nome', '').strip()
+        email = request.POST.get('email', '').strip()
+        mensagem = request.POST.get('mensagem', '').strip()
+
+        if nome and email and mensagem:
+            await _salvar_contato(nome, email, mensagem)
+            if request.htmx:
+                return render(request, 'core/contact_success.html', {'nome': nome})
+            messages.success(request, 'Mensagem enviada com sucesso!')
+            return redirect('home')
+
+        if request.htmx:
+            return render(request, 'core/contact_success.html', {
+                'nome': nome,
+                'erro': 'Por favor, preencha todos os campos.'
+            })
+        messages.error(request, 'Por favor, preencha todos os campos.')
+        return redirect('contato')
+
+    return render(request, 'core/contato.html')
@@ -11,7 +11,7 @@ if [ "$DB_HOST" = "db" ]; then
     max_attempts=60
     attempt=0
 
-    until python -c "import psycopg2; psycopg2.connect(host='$DB_HOST', port=$DB_PORT, user='$DB_USER', password='$DB_PASSWORD', dbname='$DB_NAME')" 2>/dev/null; do
+    until python -c "import psycopg; psycopg.connect(host='$DB_HOST', port=$DB_PORT, user='$DB_USER', password='$DB_PASSWORD', dbname='$DB_NAME')" 2>/dev/null; do
         attempt=$((attempt + 1))
         if [ $attempt -ge $max_attempts ]; then
             echo "PostgreSQL is still unavailable after $max_attempts attempts. Exiting."
@@ -27,18 +27,11 @@ else
     echo "DB_HOST: $DB_HOST"
 fi
 
-echo "Running migrations..."
-python manage.py makemigrations --noinput || true
-python manage.py migrate --noinput
-
-echo "Migrating images to Cloudinary..."
-python manage.py migrate_images_to_cloudinary || true
-
-echo "Collecting static files..."
-python manage.py collectstatic --noinput || true
-
-echo "Creating superuser..."
-echo "from django.contrib.auth import get_user_model; User = get_user_model(); User.objects.filter(username='admin').exists() or User.objects.create_superuser('admin', 'admin@example.com', 'admin123')" | python manage.py shell || true
+# Migrações, variantes de imagem, collectstatic, migração para o Cloudinary
+# (MIGRATE_IMAGES_ON_BOOT=1) e superusuário: cada etapa só roda se a sua
+# entrada mudou desde o último boot (ver core/management/commands/boot.py)
+echo "Booting..."
+python manage.py boot
 
 echo "Starting server..."
 exec "$@"
@@ -0,0 +1,110 @@
+function initHomePage() {
+    const cards = document.querySelectorAll('.products-grid .product-card');
+    cards.forEach(card => {
+        if (card._homeInit) return;
+        card._homeInit = true;
+        card.addEventListener('click', function (e) {
+            const clickedLink = e.target.closest('a, button');
+            if (clickedLink) return;
+
+            const detailLink = card.querySelector('a.product-link');
+            if (detailLink) {
+                detailLink.click();
+            }
+        });
+    });
+
+    // Testimonials carousel
+    const testimonialCards = document.querySelectorAll('.testimonial-card');
+    const prevButton = document.querySelector('.testimonial-nav-prev');
+    const nextButton = document.querySelector('.testimonial-nav-next');
+    let currentIndex = 0;
+
+    function showTestimonials() {
+        testimonialCards.forEach((card, index) => {
+            card.style.display = 'none';
+        });
+
+        // Show 2 cards at a time
+        testimonialCards[currentIndex].style.display = 'flex';
+        testimonialCards[currentIndex + 1].style.display = 'flex';
+    }
+
+    if (prevButton && nextButton && testimonialCards.length >= 4) {
+        if (!prevButton._carouselInit) {
+            prevButton._carouselInit = true;
+            nextButton._carouselInit = true;
+            showTestimonials();
+
+            nextButton.addEventListener('click', function () {
+                currentIndex = (currentIndex + 2) % testimonialCards.length;
+                if (currentIndex === testimonialCards.length - 1) {
+                    currentIndex = 0;
+                }
+                showTestimonials();
+            });
+
+            prevButton.addEventListener('click', function () {
+                currentIndex = currentIndex - 2;
+                if (currentIndex < 0) {
+                    currentIndex = testimonialCards.length - 2;
+                }
+                showTestimonials();
+            });
+        }
+    }
+}
+
+// Call immediately (script runs after DOM above it)
+initHomePage();
+
+// Highlights Carousel Logic - Intelligent Video Version
+let currentIdx = 0;
+let autoPlay;
+const slides = document.querySelectorAll('.carousel-slide');
+const dots = document.querySelectorAll('.carousel-indicators .dot');
+const DEFAULT_TIME = 2200; // Tempo para fotos
+
+function showSlide(n) {
+    if (!slides.length) return;
+
+    // Limpa qualquer timer anterior
+    clearTimeout(autoPlay);
+
+    slides.forEach(s => {
+        s.classList.remove('active');
+        const video = s.querySelector('video');
+        if (video) {
+            video.pause();
+            video.currentTime = 0;
+        }
+    });
+    dots.forEach(d => d.classList.remove('active'));
+
+    currentIdx = (n + slides.length) % slides.length;
+    const activeSlide = slides[currentIdx];
+    activeSlide.classList.add('active');
+    if (dots[currentIdx]) dots[currentIdx].classList.add('active');
+
+    // Verifica se é vídeo ou foto
+    const video = activeSlide.querySelector('video');
+    if (video) {
+        video.play();
+        // Quando o vídeo acabar, chama o próximo
+        video.onended = () => moveHighlight(1);
+    } else {
+        // Se for foto, espera o tempo padrão
+        autoPlay = setTimeout(() => moveHighlight(1), DEFAULT_TIME);
+    }
+}
+
+function moveHighlight(n) {
+    showSlide(currentIdx + n);
+}
+
+function currentHighlight(n) {
+    showSlide(n);
+}
+
+// Inicia o carrossel
+window.addEventListener('load', () => showSlide(0));
@@ -14,11 +14,12 @@
         SCROLL_DELAY: 100,
         PRODUCTS_SECTION_ID: 'products-cards-section',
         HEADER_SELECTOR: '.header',
-        PRODUCT_CARD_SELECTOR: '.product-card-link',
         CATEGORY_TITLE_SELECTOR: '.filter-category-title',
         FILTER_ITEM_SELECTOR: '.filter-item',
         SEARCH_INPUT_ID: 'product-search',
-        ALL_PRODUCTS_BUTTON_SELECTOR: '.filter-all-products'
+        ALL_PRODUCTS_BUTTON_SELECTOR: '.filter-all-products',
+        CARDS_CONTAINER_ID: 'products-cards',
+        SEARCH_DEBOUNCE: 300
     };
 
     // ============================================
@@ -26,7 +27,8 @@
     // ============================================
     const state = {
         activeFilter: null,
-        isInitialized: false
+        isInitialized: false,
+        searchTimer: null
     };
 
     // ============================================
@@ -84,47 +86,34 @@
     // ============================================
     const FilterManager = {
         /**
-         * Filtra produtos por categoria ou termo de busca
+         * Busca no servidor os cards que atendem aos filtros
+         * ({categoria, subcategoria, q}) e substitui a grade de produtos.
+         * As contagens por faceta chegam na mesma resposta (hx-swap-oob).
          */
-        filter(filterValue, filterByCategory = false) {
-            utils.log('Filtrando produtos:', filterValue, filterByCategory);
-            
-            const cards = document.querySelectorAll(CONFIG.PRODUCT_CARD_SELECTOR);
-            utils.log('Total de produtos encontrados:', cards.length);
-            
-            if (cards.length === 0) {
-                utils.log('Nenhum produto encontrado no DOM');
-                return 0;
+        filter(params = {}) {
+            utils.log('Filtrando produtos:', params);
+
+            const container = document.getElementById(CONFIG.CARDS_CONTAINER_ID);
+            if (!container || typeof htmx === 'undefined') {
+                utils.log('Grade de produtos ou HTMX indisponível');
+                return Promise.resolve();
             }
-            
-            let visibleCount = 0;
-            
-            cards.forEach(card => {
-                const categoriaPrincipal = card.getAttribute('data-categoria-principal') || '';
-                let shouldShow = false;
-                
-                if (filterByCategory && filterValue) {
-                    shouldShow = utils.stringsMatch(categoriaPrincipal, filterValue);
-                } else if (filterValue) {
-                    shouldShow = utils.stringsMatch(categoriaPrincipal, filterValue);
-                } else {
-                    shouldShow = true;
-                }
-                
-                if (shouldShow) {
-                    card.style.display = 'flex';
-                    card.style.pointerEvents = 'auto';
-                    card.style.visibility = 'visible';
-                    card.style.opacity = '1';
-                    visibleCount++;
-                } else {
-                    card.style.display = 'none';
-                    card.style.pointerEvents = 'none';
-                }
+
+            const query = new URLSearchParams();
+            Object.keys(params).forEach(key => {
+                if (params[key]) query.set(key, params[key]);
             });
-            
-            utils.log('Produtos visíveis após filtro:', visibleCount, 'de', cards.length);
-            return visibleCount;
+            const url = container.dataset.filtroUrl + (query.toString() ? '?' + query.toString() : '');
+
+            return htmx.ajax('GET', url, { target: '#' + CONFIG.CARDS_CONTAINER_ID, swap: 'innerHTML' });
+        },
+
+        /**
+         * Busca por nome com debounce (evita uma requisição por tecla)
+         */
+        search(term) {
+            clearTimeout(state.searchTimer);
+            state.searchTimer = setTimeout(() => this.filter({ q: term }), CONFIG.SEARCH_DEBOUNCE);
         },
 
         /**
@@ -133,7 +122,6 @@
         showAll() {
             utils.log('Mostrando todos os produtos');
             
-            const cards = document.querySelectorAll(CONFIG.PRODUCT_CARD_SELECTOR);
             const filterItems = document.querySelectorAll(CONFIG.FILTER_ITEM_SELECTOR);
             const categoryTitles = document.querySelectorAll(CONFIG.CATEGORY_TITLE_SELECTOR);
             const searchInput = document.getElementById(CONFIG.SEARCH_INPUT_ID);
@@ -150,18 +138,8 @@
             // Remove filtro ativo
             state.activeFilter = null;
             
-            // Mostra todos os produtos
-            cards.forEach(card => {
-                card.style.removeProperty('display');
-                card.style.removeProperty('visibility');
-                card.style.removeProperty('opacity');
-                card.style.removeProperty('pointer-events');
-                
-                card.style.display = 'flex';
-                card.style.pointerEvents = 'auto';
-                card.style.visibility = 'visible';
-                card.style.opacity = '1';
-            });
+            // Recarrega a grade sem filtros
+            this.filter();
             
             // Limpa parâmetro da URL
             const urlParams = new URLSearchParams(window.location.search);
@@ -171,8 +149,6 @@
                     (urlParams.toString() ? '?' + urlParams.toString() : '');
                 window.history.replaceState({}, '', newUrl);
             }
-            
-            utils.log('Todos os produtos visíveis:', cards.length);
         },
 
         /**
@@ -214,7 +190,7 @@
                     }
                     
                     // Aplica filtro
-                    this.filter(categoriaPrincipal, true);
+                    this.filter({ categoria: title.getAttribute('data-categoria-id') });
                     found = true;
                 }
             });
@@ -348,7 +324,7 @@
                     state.activeFilter = null;
                 }
                 
-                FilterManager.filter(searchTerm);
+                FilterManager.search(searchTerm);
             });
         },
 
@@ -386,8 +362,7 @@
                     }
                     
                     // Aplica filtro
-                    const categoriaPrincipal = newTitle.getAttribute('data-categoria-principal');
-                    FilterManager.filter(categoriaPrincipal, true);
+                    FilterManager.filter({ categoria: newTitle.getAttribute('data-categoria-id') });
                 });
             });
         },
@@ -429,12 +404,8 @@
             // Inicializa eventos primeiro (listeners, filtros)
             EventManager.init();
 
-            // Aplica filtro da URL se houver. Se não houver filtro, mostra todos os produtos.
+            // Aplica filtro da URL se houver (sem filtro, a página já vem com todos os produtos)
             const hasCategoryFilter = FilterManager.applyCategoryFromURL();
-            if (!hasCategoryFilter) {
-                // Nenhum filtro na URL: garantir que todos os produtos fiquem visíveis
-                this.makeAllProductsVisible();
-            }
             
             // Se houver filtro de categoria, faz scroll
             if (hasCategoryFilter) {
@@ -447,21 +418,6 @@
             utils.log('Página de produtos inicializada');
         },
 
-        /**
-         * Garante que todos os produtos estejam visíveis
-         */
-        makeAllProductsVisible() {
-            const cards = document.querySelectorAll(CONFIG.PRODUCT_CARD_SELECTOR);
-            utils.log('Tornando', cards.length, 'produtos visíveis');
-            
-            cards.forEach(card => {
-                card.style.display = 'flex';
-                card.style.visibility = 'visible';
-                card.style.opacity = '1';
-                card.style.pointerEvents = 'auto';
-            });
-        },
-
         /**
          * Reinicializa após HTMX swap
          */
@@ -484,7 +440,8 @@
         init: () => ProductsPage.init(),
         reinit: () => ProductsPage.reinit(),
         scrollToProducts: () => ScrollManager.scrollToProducts(),
-        filter: (value, byCategory) => FilterManager.filter(value, byCategory),
+        filter: (params) => FilterManager.filter(params),
+        search: (term) => FilterManager.search(term),
         showAll: () => FilterManager.showAll()
     };
 
@@ -0,0 +1,166 @@
+// Scroll para o topo da seção do produto imediatamente (sem delay).
+// Antes: havia um pequeno timeout que permitia que a página exibisse
+// parcialmente a seção "Outros Produtos" antes de rolar — por isso
+// usamos um comportamento instantâneo para posicionar corretamente.
+function scrollToProductSection(immediate = true) {
+    const productSection = document.getElementById('product-detail-section');
+    if (productSection) {
+        const headerHeight = document.querySelector('.header')?.offsetHeight || 80;
+        const sectionPosition = productSection.getBoundingClientRect().top + window.pageYOffset - headerHeight;
+
+        window.scrollTo({
+            top: sectionPosition,
+            behavior: immediate ? 'auto' : 'smooth'
+        });
+    }
+}
+
+// Inicialização principal quando o DOM estiver pronto
+function initProductPage() {
+    // Posicionar imediatamente no produto
+    scrollToProductSection(true);
+
+    // Inicializa carousel simples para as imagens do produto
+    function initProductCarousel() {
+        const slides = Array.from(document.querySelectorAll('.product-image-slide'));
+        const leftBtn = document.querySelector('.carousel-arrow-left');
+        const rightBtn = document.querySelector('.carousel-arrow-right');
+        let currentIndex = 0;
+
+        if (!slides.length) {
+            if (leftBtn) leftBtn.style.display = 'none';
+            if (rightBtn) rightBtn.style.display = 'none';
+            return;
+        }
+
+        function showIndex(i) {
+            currentIndex = (i + slides.length) % slides.length;
+            slides.forEach((s, idx) => {
+                s.style.display = idx === currentIndex ? 'block' : 'none';
+            });
+        }
+
+        // Inicializar estado
+        showIndex(0);
+
+        if (slides.length <= 1) {
+            if (leftBtn) leftBtn.style.display = 'none';
+            if (rightBtn) rightBtn.style.display = 'none';
+        } else {
+            if (leftBtn) {
+                leftBtn.style.display = 'flex';
+                leftBtn.addEventListener('click', function(e) {
+                    e.preventDefault();
+                    showIndex(currentIndex - 1);
+                });
+            }
+            if (rightBtn) {
+                rightBtn.style.display = 'flex';
+                rightBtn.addEventListener('click', function(e) {
+                    e.preventDefault();
+                    showIndex(currentIndex + 1);
+                });
+            }
+        }
+
+        // Re-posicionar a página quando imagens terminarem de carregar (evita layout shift)
+        let loadedAny = false;
+        slides.forEach((img) => {
+            if (img.complete) {
+                loadedAny = true;
+            } else {
+                img.addEventListener('load', () => {
+                    // quando qualquer imagem carregar, refazer o jump
+                    scrollToProductSection(true);
+                });
+            }
+        });
+        // Fallbacks para garantir posicionamento
+        if (!loadedAny) {
+            setTimeout(() => scrollToProductSection(true), 500);
+        } else {
+            // se já carregou, garantir posição imediata
+            scrollToProductSection(true);
+        }
+    }
+
+    initProductCarousel();
+}
+
+// Initialize immediately (script runs after DOM above it)
+initProductPage();
+
+/* Lightbox and image interactions for product detail page (pan/zoom) */
+(function(){
+    let scale = 1, tx = 0, ty = 0;
+    let isPanning = false, startX = 0, startY = 0, activePointer = null;
+
+    function getLB() { return document.getElementById('detail-image-lightbox'); }
+    function getLBImg() { return document.getElementById('detail-lightbox-img'); }
+
+    function apply(){
+        const lbImg = getLBImg();
+        if (!lbImg) return;
+        lbImg.style.transform = `translate(${tx}px, ${ty}px) scale(${scale})`;
+        lbImg.style.cursor = scale > 1 ? 'grab' : 'zoom-in';
+    }
+
+    function openLB(src, alt){
+        const lb = getLB(); const lbImg = getLBImg();
+        if (!lb || !lbImg) return;
+        lbImg.src = src; lbImg.alt = alt || '';
+        lb.classList.add('active'); lb.setAttribute('aria-hidden','false');
+        document.body.style.overflow = 'hidden';
+        scale = 1; tx = 0; ty = 0; apply();
+        lbImg.style.touchAction = 'none';
+    }
+
+    function closeLB(){
+        const lb = getLB(); const lbImg = getLBImg();
+        if (!lb) return;
+        lb.classList.remove('active'); lb.setAttribute('aria-hidden','true');
+        if (lbImg) { lbImg.src = ''; lbImg.style.touchAction = ''; }
+        document.body.style.overflow = '';
+        scale = 1; tx = 0; ty = 0; apply();
+    }
+
+    // Global escape key (only needs to bind once)
+    document.addEventListener('keydown', function(e){ if (e.key === 'Escape') closeLB(); });
+
+    function initDetailLightbox() {
+        const lb = getLB(); const lbImg = getLBImg();
+        const lbClose = document.getElementById('detail-lightbox-close');
+
+        if (lbClose) lbClose.onclick = closeLB;
+        if (lb) lb.onclick = function(e){ if (e.target === lb) closeLB(); };
+
+        // Attach click on all images in the image section
+        const slides = document.querySelectorAll('#product-image-section img, #product-image-section .product-image-slide, #product-image-section .product-modern-image');
+        slides.forEach(function(elem) {
+            elem.style.cursor = 'zoom-in';
+            elem.onclick = function(e){
+                e.preventDefault();
+                e.stopPropagation();
+                if (elem.tagName === 'IMG') {
+                    // currentSrc: a variante do srcset que o navegador escolheu
+                    openLB(elem.currentSrc || elem.src, elem.alt || '');
+                }
+            };
+        });
+
+        if (!lbImg) return;
+        // Pan/zoom interactions — use onclick/on* to avoid duplicate listeners on re-init
+        lbImg.onpointerdown = function(e){ if (scale <= 1) return; isPanning = true; startX = e.clientX - tx; startY = e.clientY - ty; activePointer = e.pointerId; lbImg.setPointerCapture(activePointer); lbImg.style.cursor = 'grabbing'; };
+        lbImg.onpointermove = function(e){ if (!isPanning || e.pointerId !== activePointer) return; tx = e.clientX - startX; ty = e.clientY - startY; apply(); };
+        lbImg.onpointerup = lbImg.onpointercancel = lbImg.onpointerleave = function(e){ if (e.pointerId !== activePointer) return; isPanning = false; try{ lbImg.releasePointerCapture(activePointer); }catch(_){} activePointer = null; lbImg.style.cursor = scale > 1 ? 'grab' : 'zoom-in'; };
+
+        // Wheel zoom
+        lb.onwheel = function(e){ e.preventDefault(); const d = e.deltaY > 0 ? -0.1 : 0.1; scale = Math.max(1, Math.min(3, scale + d)); if (scale === 1){ tx = 0; ty = 0; } apply(); };
+
+        // Double-click toggle zoom
+        lbImg.ondblclick = function(){ if (scale > 1){ scale = 1; tx = 0; ty = 0; } else { scale = 2; } apply(); };
+    }
+
+    // Initialize immediately
+    initDetailLightbox();
+})();
@@ -0,0 +1,112 @@
+// Configuração de debug (opcional - remover em produção)
+window.DEBUG = true;
+
+function initMobileFilterMenu() {
+    const mobileFilterBtn = document.getElementById('mobile-filter-btn');
+    const mobileFilterMenu = document.getElementById('mobile-filter-menu');
+    const mobileFilterOverlay = document.getElementById('mobile-filter-overlay');
+    const mobileFilterClose = document.getElementById('mobile-filter-close');
+    const mobileProductSearch = document.getElementById('mobile-product-search');
+    const mobileFilterAllProducts = document.querySelector('.mobile-filter-all-products');
+
+    // Open mobile filter menu
+    if (mobileFilterBtn) {
+        mobileFilterBtn.addEventListener('click', function() {
+            mobileFilterMenu.classList.add('active');
+            mobileFilterOverlay.classList.add('active');
+            document.body.style.overflow = 'hidden'; // Prevent background scrolling
+        });
+    }
+
+    // Close mobile filter menu
+    function closeMobileFilter() {
+        mobileFilterMenu.classList.remove('active');
+        mobileFilterOverlay.classList.remove('active');
+        document.body.style.overflow = ''; // Restore scrolling
+    }
+
+    if (mobileFilterClose) {
+        mobileFilterClose.addEventListener('click', closeMobileFilter);
+    }
+
+    if (mobileFilterOverlay) {
+        mobileFilterOverlay.addEventListener('click', closeMobileFilter);
+    }
+
+    // Mobile search functionality (filtrada no servidor)
+    if (mobileProductSearch) {
+        mobileProductSearch.addEventListener('input', function(e) {
+            window.ProductsPage.search(e.target.value.trim());
+        });
+    }
+
+    // Mobile "All Products" button
+    if (mobileFilterAllProducts) {
+        mobileFilterAllProducts.addEventListener('click', function() {
+            // Clear search
+            if (mobileProductSearch) {
+                mobileProductSearch.value = '';
+            }
+
+            // Show all products
+            window.ProductsPage.showAll();
+
+            // Close menu
+            closeMobileFilter();
+        });
+    }
+
+    // Mobile category filtering
+    const mobileCategoryTitles = document.querySelectorAll('.mobile-filter-category-title');
+    mobileCategoryTitles.forEach(title => {
+        title.addEventListener('click', function() {
+            window.ProductsPage.filter({ categoria: this.getAttribute('data-categoria-id') });
+
+            // Close menu
+            closeMobileFilter();
+        });
+    });
+}
+
+// Initialize on page load
+initMobileFilterMenu();
+
+    function initProductsFilters() {
+        // Filtrar produtos por subcategoria (no servidor)
+        function filterBySubcategory(subId) {
+            window.ProductsPage.filter({ subcategoria: subId });
+        }
+
+        // Desktop subcategory links
+        document.querySelectorAll('.filter-subcategory-link').forEach(link => {
+            // avoid duplicate listeners
+            if (link._filterInit) return;
+            link._filterInit = true;
+            link.addEventListener('click', function(e) {
+                e.preventDefault();
+                filterBySubcategory(this.dataset.subcategoriaId);
+            });
+        });
+
+        // Mobile subcategory links
+        document.querySelectorAll('.mobile-filter-subcategory-link').forEach(link => {
+            if (link._filterInit) return;
+            link._filterInit = true;
+            link.addEventListener('click', function(e) {
+                e.preventDefault();
+                const subId = this.dataset.subcategoriaId;
+                // close mobile menu
+                const mobileMenu = document.getElementById('mobile-filter-menu');
+                const mobileOverlay = document.getElementById('mobile-filter-overlay');
+                if (mobileMenu) mobileMenu.classList.remove('active');
+                if (mobileOverlay) mobileOverlay.classList.remove('active');
+                document.body.style.overflow = '';
+                filterBySubcategory(subId);
+            });
+        });
+    }
+
+    // Initialize immediately
+    initProductsFilters();
+
+    // Lightbox removed from products listing — loupe available only on product detail page
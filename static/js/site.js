@@ -0,0 +1,288 @@
+// Função para inicializar menu hambúrguer
+function initMobileMenu() {
+    const menuToggle = document.querySelector('.mobile-menu-toggle');
+    const nav = document.querySelector('.nav');
+
+    if (!menuToggle || !nav) return;
+
+    // Remover listeners antigos usando uma flag
+    if (menuToggle._menuInitialized) return;
+    menuToggle._menuInitialized = true;
+
+    // Toggle menu ao clicar no botão
+    menuToggle.addEventListener('click', function(e) {
+        e.stopPropagation();
+        e.preventDefault();
+        menuToggle.classList.toggle('active');
+        nav.classList.toggle('active');
+    });
+
+    // Fechar menu ao clicar em um link
+    const navLinks = nav.querySelectorAll('a');
+    navLinks.forEach(link => {
+        link.addEventListener('click', function() {
+            menuToggle.classList.remove('active');
+            nav.classList.remove('active');
+        });
+    });
+
+    // Fechar menu ao clicar fora dele
+    function closeMenuOnOutsideClick(e) {
+        if (nav.classList.contains('active') && 
+            !nav.contains(e.target) && 
+            !menuToggle.contains(e.target)) {
+            menuToggle.classList.remove('active');
+            nav.classList.remove('active');
+        }
+    }
+
+    document.addEventListener('click', closeMenuOnOutsideClick);
+}
+
+// Inicializar ao carregar
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initMobileMenu);
+} else {
+    initMobileMenu();
+}
+
+// Reinicializar após swaps do HTMX
+if (typeof htmx !== 'undefined') {
+    document.addEventListener('htmx:afterSwap', function(event) {
+        if (event.detail.target === document.body || event.detail.target.tagName === 'BODY') {
+            // Resetar flag para permitir reinicialização
+            const menuToggle = document.querySelector('.mobile-menu-toggle');
+            if (menuToggle) {
+                menuToggle._menuInitialized = false;
+            }
+            setTimeout(initMobileMenu, 50);
+        }
+    });
+}
+
+function openContactModal() {
+    const modal = document.getElementById('contactModal');
+    if (!modal) return;
+    modal.classList.add('active');
+    document.body.style.overflow = 'hidden';
+}
+
+function closeContactModal() {
+    const modal = document.getElementById('contactModal');
+    if (!modal) return;
+    modal.classList.remove('active');
+    document.body.style.overflow = 'auto';
+    // Resetar para tela inicial
+    showContactOptions();
+}
+
+function showContactOptions() {
+    const optionsScreen = document.getElementById('contactOptions');
+    const formScreen = document.getElementById('emailFormScreen');
+    if (optionsScreen && formScreen) {
+        optionsScreen.style.display = 'block';
+        formScreen.style.display = 'none';
+    }
+}
+
+function showEmailForm() {
+    const optionsScreen = document.getElementById('contactOptions');
+    const formScreen = document.getElementById('emailFormScreen');
+    if (optionsScreen && formScreen) {
+        optionsScreen.style.display = 'none';
+        formScreen.style.display = 'block';
+    }
+}
+
+// Close modal on ESC
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Escape') {
+        closeContactModal();
+    }
+});
+
+// Scroll behavior after HTMX swaps: prefer jumping to fragment/hash when present
+document.addEventListener('htmx:afterSwap', function(event) {
+    if (event.detail.target === document.body || event.detail.target.tagName === 'BODY') {
+        // If there's a fragment in the URL (hash), try to scroll to it
+        if (window.location.hash) {
+            try {
+                const id = window.location.hash.substring(1);
+                const el = document.getElementById(id) || document.querySelector(window.location.hash);
+                if (el) {
+                    const headerHeight = document.querySelector('.header')?.offsetHeight || 80;
+                    const top = el.getBoundingClientRect().top + window.pageYOffset - headerHeight;
+                    window.scrollTo({ top: top, behavior: 'smooth' });
+                    return;
+                }
+            } catch (e) {
+                console.warn('Error scrolling to hash:', e);
+            }
+        }
+
+        // Fallback: Scroll to top when navigating between pages, unless a category param or products page is present
+        const urlParams = new URLSearchParams(window.location.search);
+        if (!urlParams.has('categoria') && !window.location.pathname.includes('/produtos')) {
+            window.scrollTo({ top: 0, behavior: 'smooth' });
+        }
+    }
+});
+
+// Smooth section-to-section scrolling was intentionally disabled.
+// The previous implementation attached a 'wheel' listener and forced
+// scrollIntoView for the next/previous section. That behavior caused
+// poor UX on some devices, so it was removed. If you need a similar
+// feature later, consider using a well-tested library or a
+// progressively-enhanced implementation scoped to specific pages.
+
+// Detectar página atual e aplicar classe ao header
+function detectPageAndSetHeaderClass() {
+    const header = document.querySelector('.header');
+    if (!header) return;
+
+    const path = window.location.pathname;
+    const url = window.location.href;
+
+    // Remover classes anteriores
+    header.classList.remove('header-home', 'header-produtos', 'header-quem-somos', 'header-produto-detalhe');
+
+    // Verificar se é página de detalhe do produto (ex: /produtos/slug-do-produto/)
+    const pathParts = path.split('/').filter(p => p);
+    if (pathParts.length >= 2 && pathParts[0] === 'produtos' && pathParts.length > 1) {
+        // É uma página de detalhe de produto
+        header.classList.add('header-produto-detalhe');
+        return; // Não aplicar outras classes
+    }
+
+    // Adicionar classe baseada na página
+    // Verificar também pela presença de elementos específicos da página
+    if (path === '/' || path.includes('home') || document.querySelector('.hero-section:not(.products-hero-section):not(.qs-hero)')) {
+        header.classList.add('header-home');
+    } else if (path.includes('produtos') || document.querySelector('.products-hero-section')) {
+        header.classList.add('header-produtos');
+    } else if (path.includes('quem-somos') || document.querySelector('.qs-hero')) {
+        header.classList.add('header-quem-somos');
+    }
+}
+
+// Mudar background da nav baseado no scroll
+function updateHeaderBackground() {
+    const header = document.querySelector('.header');
+
+    // Se for página de detalhe do produto, manter preto sempre
+    if (header && header.classList.contains('header-produto-detalhe')) {
+        return; // Não fazer nada, manter preto
+    }
+
+    // Verificar tanto .hero-section quanto .qs-hero (para página quem-somos)
+    const heroSection = document.querySelector('.hero-section') || document.querySelector('.qs-hero');
+
+    if (!header || !heroSection) return;
+
+    const scrollPosition = window.pageYOffset || document.documentElement.scrollTop;
+    const heroTop = heroSection.offsetTop;
+    const heroHeight = heroSection.offsetHeight;
+    const heroBottom = heroTop + heroHeight;
+
+    // Se estiver dentro da hero section
+    if (scrollPosition < heroBottom - header.offsetHeight) {
+        // Dentro da hero section - remover classe scrolled para ficar transparente
+        header.classList.remove('scrolled');
+    } else {
+        // Fora da hero section - adicionar classe scrolled para mostrar imagem de fundo da página
+        header.classList.add('scrolled');
+    }
+}
+
+function initHeaderBackground() {
+    // Detectar página e aplicar classe
+    detectPageAndSetHeaderClass();
+
+    // Atualizar background baseado no scroll
+    updateHeaderBackground();
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Inicializar ao carregar
+    initHeaderBackground();
+
+    // Atualizar ao fazer scroll
+    window.addEventListener('scroll', function() {
+        updateHeaderBackground();
+    }, { passive: true });
+
+    // Atualizar após HTMX swap
+    if (typeof htmx !== 'undefined') {
+        document.addEventListener('htmx:afterSwap', function(event) {
+            if (event.detail.target === document.body || event.detail.target.tagName === 'BODY') {
+                setTimeout(function() {
+                    initHeaderBackground();
+                    updateHeaderBackground();
+                }, 50);
+            }
+        });
+    }
+});
+
+// Executar também quando a página carregar sem DOMContentLoaded (caso já esteja carregada)
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', initHeaderBackground);
+} else {
+    initHeaderBackground();
+}
+
+// Global fallback: se a página atual contém a seção de detalhe do produto,
+// garanta posicionamento imediato e inicialize carousel simples.
+(function() {
+    function scrollToProductSectionImmediate() {
+        const productSection = document.getElementById('product-detail-section');
+        if (!productSection) return false;
+        const headerHeight = document.querySelector('.header')?.offsetHeight || 80;
+        const sectionPosition = productSection.getBoundingClientRect().top + window.pageYOffset - headerHeight;
+        window.scrollTo({ top: sectionPosition, behavior: 'auto' });
+        return true;
+    }
+
+    function initFallbackProductCarousel() {
+        const slides = Array.from(document.querySelectorAll('.product-image-slide'));
+        const leftBtn = document.querySelector('.carousel-arrow-left');
+        const rightBtn = document.querySelector('.carousel-arrow-right');
+        if (!slides.length) {
+            if (leftBtn) leftBtn.style.display = 'none';
+            if (rightBtn) rightBtn.style.display = 'none';
+            return;
+        }
+        let currentIndex = 0;
+        function showIndex(i) {
+            currentIndex = (i + slides.length) % slides.length;
+            slides.forEach((s, idx) => s.style.display = idx === currentIndex ? 'block' : 'none');
+        }
+        showIndex(0);
+        if (slides.length <= 1) {
+            if (leftBtn) leftBtn.style.display = 'none';
+            if (rightBtn) rightBtn.style.display = 'none';
+        } else {
+            if (leftBtn) leftBtn.addEventListener('click', (e) => { e.preventDefault(); showIndex(currentIndex - 1); });
+            if (rightBtn) rightBtn.addEventListener('click', (e) => { e.preventDefault(); showIndex(currentIndex + 1); });
+        }
+        // Reposition after images load
+        slides.forEach(img => {
+            if (!img.complete) img.addEventListener('load', () => scrollToProductSectionImmediate());
+        });
+        setTimeout(() => scrollToProductSectionImmediate(), 500);
+    }
+
+    function runIfProductDetail() {
+        const found = scrollToProductSectionImmediate();
+        if (found) initFallbackProductCarousel();
+    }
+
+    document.addEventListener('DOMContentLoaded', runIfProductDetail);
+    if (typeof htmx !== 'undefined') {
+        document.addEventListener('htmx:afterSwap', function(event) {
+            if (event.detail.target === document.body || event.detail.target.tagName === 'BODY') {
+                runIfProductDetail();
+            }
+        });
+    }
+})();
@@ -11,27 +11,101 @@ Uso:
 import os
 import requests
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import List, Dict, Set
+from typing import Dict, Iterator, List, Optional
 from django.conf import settings
 
 
+class RateLimiter:
+    """
+    Token bucket adaptativo, compartilhado entre as threads de download.
+
+    Cada requisição consome um token; os tokens são repostos a `rate` por
+    segundo até `capacity`. Ao receber 429 o limitador pausa todas as
+    threads pelo tempo do `Retry-After` e reduz a taxa pela metade; cada
+    sucesso devolve um pouco da taxa, até o máximo configurado.
+    """
+
+    def __init__(self, rate: float = 5.0, capacity: int = 5, min_rate: float = 0.2):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now >= self.blocked_until:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                else:
+                    wait = self.blocked_until - now
+            time.sleep(wait)
+
+    def penalize(self, retry_after: float):
+        with self.lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+            self.updated = max(now, self.blocked_until)
+
+    def reward(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+def parse_retry_after(value: Optional[str], default: float) -> float:
+    """Converte o header Retry-After (segundos ou data HTTP) em segundos."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
 class FigmaImageDownloader:
     """Classe para baixar imagens do Figma via API."""
     
     BASE_URL = "https://api.figma.com/v1"
+    # A API de imagens aceita até 100 ids por requisição
+    BATCH_SIZE = 100
+    CHUNK_SIZE = 64 * 1024
     
-    def __init__(self, file_key: str, output_dir: str = None):
+    def __init__(self, file_key: str, output_dir: str = None, max_workers: int = 8,
+                 base_url: str = None, token: str = None, rate: float = 5.0, cache_dir: str = None):
         """
         Inicializa o downloader.
         
         Args:
             file_key: Chave do arquivo Figma
             output_dir: Diretório onde salvar as imagens (padrão: figma_images/)
+            max_workers: Downloads simultâneos
+            base_url: URL base da API (para apontar para um servidor local nos testes)
+            token: Token da API (padrão: variável de ambiente FIGMA_TOKEN)
+            rate: Requisições por segundo à API antes de qualquer 429
+            cache_dir: Onde guardar o documento do arquivo (padrão: .figma_cache/)
         """
         self.file_key = file_key
-        self.token = os.environ.get('FIGMA_TOKEN')
+        self.token = token or os.environ.get('FIGMA_TOKEN')
         
         if not self.token:
             raise ValueError(
@@ -50,29 +124,162 @@ class FigmaImageDownloader:
         # Criar diretório se não existir
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        if cache_dir:
+            self.cache_dir = Path(cache_dir)
+        else:
+            base_dir = Path(settings.BASE_DIR) if hasattr(settings, 'BASE_DIR') else Path.cwd()
+            self.cache_dir = base_dir / ".figma_cache"
+        
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        self.max_workers = max_workers
         self.headers = {
             "X-Figma-Token": self.token
         }
+        # Limites separados: a API do Figma e o CDN das imagens têm cotas diferentes
+        self.api_limiter = RateLimiter(rate=rate)
+        self.download_limiter = RateLimiter(rate=max(rate, max_workers * 4), capacity=max_workers)
+        self._local = threading.local()
+    
+    def _session(self) -> requests.Session:
+        """Uma sessão (pool de conexões keep-alive) por thread."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+    
+    def _request(self, url: str, limiter: RateLimiter, max_retries: int = 5, **kwargs) -> requests.Response:
+        """
+        GET respeitando o limitador; em 429/503 espera o `Retry-After` e tenta de novo.
+        
+        Erros de rede são repetidos com backoff exponencial. Retorna a resposta
+        (já validada com `raise_for_status`).
+        """
+        for attempt in range(max_retries):
+            limiter.acquire()
+            try:
+                response = self._session().get(url, timeout=30, **kwargs)
+            except requests.exceptions.RequestException:
+                if attempt == max_retries - 1:
+                    raise
+                time.sleep(min(2 ** attempt, 30))
+                continue
+            
+            if response.status_code in (429, 503):
+                wait = parse_retry_after(response.headers.get('Retry-After'), default=min(2 ** (attempt + 1), 60))
+                response.close()
+                if attempt == max_retries - 1:
+                    response.raise_for_status()
+                print(f"⚠ Rate limit ({response.status_code}) - aguardando {wait:.0f}s")
+                limiter.penalize(wait)
+                continue
+            
+            response.raise_for_status()
+            limiter.reward()
+            return response
+        raise requests.exceptions.RetryError(f"Número máximo de tentativas excedido: {url}")
+    
+    def _cache_path(self) -> Path:
+        return self.cache_dir / f"{self.file_key}.json"
+    
+    def _load_cache(self) -> Optional[Dict]:
+        try:
+            with open(self._cache_path(), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
     
-    def get_file_data(self) -> Dict:
+    def _save_cache(self, data: Dict):
+        """Grava o documento de forma atômica (arquivo temporário + rename)."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._cache_path().with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self._cache_path())
+    
+    def get_file_version(self) -> Dict:
+        """
+        Busca só a versão do arquivo (`depth=1` devolve o cabeçalho sem a árvore de nós).
+        
+        Returns:
+            Dicionário com `version` e `lastModified`
+        """
+        url = f"{self.base_url}/files/{self.file_key}"
+        response = self._request(url, self.api_limiter, headers=self.headers, params={'depth': 1})
+        data = response.json()
+        return {'version': data.get('version'), 'lastModified': data.get('lastModified')}
+    
+    def get_file_data(self, use_cache: bool = True) -> Dict:
         """
         Busca os dados do arquivo Figma.
         
+        Com `use_cache`, o documento completo fica em disco (em `cache_dir`) e só
+        é baixado de novo quando `version`/`lastModified` do arquivo mudam; a
+        checagem custa uma requisição pequena em vez do documento inteiro.
+        
         Returns:
             Dicionário com os dados do arquivo
         """
-        url = f"{self.BASE_URL}/files/{self.file_key}"
+        url = f"{self.base_url}/files/{self.file_key}"
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            return response.json()
+            cached = self._load_cache() if use_cache else None
+            if cached:
+                current = self.get_file_version()
+                if current['version'] and (
+                    current['version'] == cached.get('version')
+                    and current['lastModified'] == cached.get('lastModified')
+                ):
+                    print(f"Documento em cache (versão {current['version']})")
+                    return cached
+            
+            response = self._request(url, self.api_limiter, headers=self.headers)
+            data = response.json()
         except requests.exceptions.RequestException as e:
             raise Exception(f"Erro ao buscar dados do arquivo Figma: {str(e)}")
+        
+        if use_cache:
+            self._save_cache(data)
+        return data
+    
+    @staticmethod
+    def iter_image_nodes(node: Dict) -> Iterator[Dict]:
+        """
+        Percorre a árvore de nós (em profundidade, na ordem do documento) e gera os nós com imagens.
+        
+        Usa uma pilha explícita em vez de recursão, então frames muito
+        profundos não esbarram no limite de recursão do Python, e os nós são
+        entregues à medida que são encontrados.
+        
+        Args:
+            node: Nó raiz
+        
+        Yields:
+            Informações de cada nó que contém uma imagem
+        """
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            
+            # Verificar se o nó tem fills com imagens
+            for fill in current.get('fills', ()):
+                if fill.get('type') == 'IMAGE' and 'imageRef' in fill:
+                    yield {
+                        'id': current.get('id'),
+                        'name': current.get('name', 'unnamed'),
+                        'imageRef': fill.get('imageRef'),
+                        'type': current.get('type'),
+                        'absoluteBoundingBox': current.get('absoluteBoundingBox', {})
+                    }
+                    break  # Um nó pode ter apenas uma imagem relevante
+            
+            # Filhos empilhados ao contrário para sair na ordem original
+            children = current.get('children')
+            if children:
+                stack.extend(reversed(children))
     
     def find_image_nodes(self, node: Dict, image_nodes: List[Dict] = None) -> List[Dict]:
         """
-        Percorre recursivamente a árvore de nós e encontra nós com imagens.
+        Lista dos nós com imagens (ver `iter_image_nodes`).
         
         Args:
             node: Nó atual da árvore
@@ -83,96 +290,46 @@ class FigmaImageDownloader:
         """
         if image_nodes is None:
             image_nodes = []
-        
-        # Verificar se o nó tem fills com imagens
-        fills = node.get('fills', [])
-        for fill in fills:
-            if fill.get('type') == 'IMAGE' and 'imageRef' in fill:
-                # Adicionar informações do nó
-                image_nodes.append({
-                    'id': node.get('id'),
-                    'name': node.get('name', 'unnamed'),
-                    'imageRef': fill.get('imageRef'),
-                    'type': node.get('type'),
-                    'absoluteBoundingBox': node.get('absoluteBoundingBox', {})
-                })
-                break  # Um nó pode ter apenas uma imagem relevante
-        
-        # Recursivamente processar filhos
-        children = node.get('children', [])
-        for child in children:
-            self.find_image_nodes(child, image_nodes)
-        
+        image_nodes.extend(self.iter_image_nodes(node))
         return image_nodes
     
-    def get_image_urls(self, node_ids: List[str], max_retries: int = 3) -> Dict[str, str]:
+    def get_image_urls(self, node_ids: List[str], max_retries: int = 5) -> Dict[str, str]:
         """
         Obtém as URLs das imagens para os IDs fornecidos.
         
+        Os ids vão em lotes de até `BATCH_SIZE` por requisição; o ritmo fica a
+        cargo do limitador (sem pausas fixas entre lotes).
+        
         Args:
             node_ids: Lista de IDs dos nós
-            max_retries: Número máximo de tentativas em caso de rate limit
+            max_retries: Número máximo de tentativas por lote
         
         Returns:
             Dicionário mapeando node_id -> image_url
         """
-        if not node_ids:
-            return {}
-        
-        # Figma API aceita até 100 IDs por requisição
-        batch_size = 100
         all_urls = {}
         
-        for i in range(0, len(node_ids), batch_size):
-            batch = node_ids[i:i + batch_size]
-            ids_param = ','.join(batch)
-            
-            url = f"{self.BASE_URL}/images/{self.file_key}?ids={ids_param}&format=png"
-            
-            # Tentar com retry para rate limit
-            for attempt in range(max_retries):
-                try:
-                    response = requests.get(url, headers=self.headers, timeout=30)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        images = data.get('images', {})
-                        all_urls.update(images)
-                        break  # Sucesso, sair do loop de retry
-                    
-                    elif response.status_code == 429:
-                        # Rate limit - aguardar antes de tentar novamente
-                        wait_time = (attempt + 1) * 30  # 30s, 60s, 90s
-                        if attempt < max_retries - 1:
-                            print(f"⚠ Rate limit detectado. Aguardando {wait_time} segundos antes de tentar novamente...")
-                            time.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"✗ Rate limit persistente após {max_retries} tentativas")
-                            break
-                    
-                    else:
-                        response.raise_for_status()
-                        
-                except requests.exceptions.RequestException as e:
-                    if attempt < max_retries - 1:
-                        wait_time = (attempt + 1) * 10
-                        print(f"⚠ Erro na requisição. Aguardando {wait_time} segundos...")
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        print(f"Erro ao buscar URLs das imagens: {str(e)}")
-                        break
-            
-            # Delay entre batches para evitar rate limit
-            if i + batch_size < len(node_ids):
-                time.sleep(2)
+        for i in range(0, len(node_ids), self.BATCH_SIZE):
+            batch = node_ids[i:i + self.BATCH_SIZE]
+            url = f"{self.base_url}/images/{self.file_key}"
+            try:
+                response = self._request(
+                    url, self.api_limiter, max_retries=max_retries,
+                    headers=self.headers, params={'ids': ','.join(batch), 'format': 'png'},
+                )
+            except requests.exceptions.RequestException as e:
+                print(f"Erro ao buscar URLs das imagens: {str(e)}")
+                continue
+            all_urls.update({k: v for k, v in response.json().get('images', {}).items() if v})
         
         return all_urls
     
     def download_image(self, image_url: str, filepath: Path) -> bool:
         """
-        Baixa uma imagem da URL fornecida.
+        Baixa uma imagem da URL fornecida, gravando em blocos direto no disco.
+        
+        O corpo nunca fica inteiro em memória; o arquivo é escrito como `.part`
+        e renomeado no final, então uma interrupção não deixa imagem truncada.
         
         Args:
             image_url: URL da imagem
@@ -181,174 +338,148 @@ class FigmaImageDownloader:
         Returns:
             True se o download foi bem-sucedido, False caso contrário
         """
+        partial = filepath.with_name(filepath.name + '.part')
         try:
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-            
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
-            
+            with self._request(image_url, self.download_limiter, max_retries=3, stream=True) as response:
+                with open(partial, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                        f.write(chunk)
+            os.replace(partial, filepath)
             return True
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, OSError) as e:
+            partial.unlink(missing_ok=True)
             print(f"Erro ao baixar imagem {image_url}: {str(e)}")
             return False
     
-    def download_all_images(self, save_metadata: bool = True) -> Dict:
+    @staticmethod
+    def build_filename(node: Dict) -> str:
+        """Nome do arquivo: nome do nó sanitizado + prefixo do imageRef."""
+        node_name = node['name'].lower().replace(' ', '_')
+        # Remover caracteres inválidos
+        node_name = ''.join(c for c in node_name if c.isalnum() or c in ('_', '-'))
+        
+        # Determinar extensão (PNG por padrão)
+        extension = 'png'
+        if 'jpg' in node_name or 'jpeg' in node_name:
+            extension = 'jpg'
+        
+        return f"{node_name}_{node['imageRef'][:8]}.{extension}"
+    
+    def existing_images(self) -> Dict[str, Dict]:
+        """Imagens de execuções anteriores (metadata.json) que ainda estão no disco, por imageRef."""
+        metadata_path = self.output_dir / 'metadata.json'
+        if not metadata_path.exists():
+            return {}
+        try:
+            with open(metadata_path, encoding='utf-8') as f:
+                images = json.load(f).get('images', [])
+        except (OSError, ValueError):
+            return {}
+        return {
+            image['image_ref']: image
+            for image in images
+            if (self.output_dir / image['filename']).exists()
+        }
+    
+    def download_all_images(self, save_metadata: bool = True, use_cache: bool = True) -> Dict:
         """
         Baixa todas as imagens do arquivo Figma.
         
+        Imagens cujo `imageRef` já foi baixado (segundo o metadata.json) são
+        puladas antes mesmo de pedir a URL à API.
+        
         Args:
             save_metadata: Se True, salva um arquivo JSON com metadados
+            use_cache: Se True, reaproveita o documento em cache quando a versão não mudou
         
         Returns:
             Dicionário com estatísticas do download
         """
+        start = time.monotonic()
         print(f"Buscando dados do arquivo Figma (FILE_KEY: {self.file_key})...")
-        file_data = self.get_file_data()
+        file_data = self.get_file_data(use_cache=use_cache)
         
         # Encontrar o documento raiz
         document = file_data.get('document', {})
         
         print("Procurando nós com imagens...")
-        image_nodes = self.find_image_nodes(document)
+        # Agrupar por imageRef (à medida que a travessia encontra os nós) para evitar downloads duplicados
+        total_nodes = 0
+        unique_images = {}
+        for node in self.iter_image_nodes(document):
+            total_nodes += 1
+            unique_images.setdefault(node['imageRef'], node)
         
-        if not image_nodes:
+        if not unique_images:
             print("Nenhuma imagem encontrada no arquivo.")
             return {
                 'total': 0,
                 'downloaded': 0,
+                'skipped': 0,
                 'failed': 0,
                 'images': []
             }
         
-        print(f"Encontradas {len(image_nodes)} imagens.")
-        
-        # Agrupar por imageRef para evitar downloads duplicados
-        unique_images = {}
-        for node in image_nodes:
-            image_ref = node['imageRef']
-            if image_ref not in unique_images:
-                unique_images[image_ref] = node
-        
+        print(f"Encontradas {total_nodes} imagens.")
         print(f"Imagens únicas: {len(unique_images)}")
         
-        # Obter URLs das imagens - uma por uma para evitar rate limit
-        node_ids = [node['id'] for node in unique_images.values()]
-        print("Obtendo URLs das imagens (uma por uma para evitar rate limit)...")
-        image_urls = {}
+        existing = self.existing_images()
+        images = [existing[ref] for ref in unique_images if ref in existing]
+        pending = {ref: node for ref, node in unique_images.items() if ref not in existing}
+        if images:
+            print(f"Já baixadas anteriormente: {len(images)}")
         
-        for i, node_id in enumerate(node_ids, 1):
-            print(f"[{i}/{len(node_ids)}] Obtendo URL...", end=' ')
-            
-            # Tentar obter URL com retry
-            for attempt in range(5):
-                try:
-                    url = f"{self.BASE_URL}/images/{self.file_key}?ids={node_id}&format=png"
-                    response = requests.get(url, headers=self.headers, timeout=30)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        urls = data.get('images', {})
-                        if node_id in urls:
-                            image_urls[node_id] = urls[node_id]
-                            print("✓")
-                            break
-                    elif response.status_code == 429:
-                        wait = min(15 * (attempt + 1), 60)  # Max 60 segundos
-                        if attempt < 4:
-                            print(f"⚠ Rate limit - aguardando {wait}s...", end=' ')
-                            time.sleep(wait)
-                            continue
-                        else:
-                            print("✗ Rate limit persistente")
-                            break
-                    else:
-                        print(f"✗ Erro {response.status_code}")
-                        break
-                except Exception as e:
-                    if attempt < 4:
-                        time.sleep(5)
-                        continue
-                    else:
-                        print(f"✗ Erro: {str(e)[:30]}")
-                        break
-            
-            # Delay entre requisições
-            if i < len(node_ids):
-                time.sleep(2)
+        # Obter URLs das imagens em lotes
+        node_ids = [node['id'] for node in pending.values()]
+        print(f"Obtendo URLs de {len(node_ids)} imagens em lotes de {self.BATCH_SIZE}...")
+        image_urls = self.get_image_urls(node_ids) if node_ids else {}
         
         # Baixar imagens
         downloaded = 0
         failed = 0
-        downloaded_files = []
         
-        print(f"\nBaixando imagens para: {self.output_dir}")
+        print(f"\nBaixando imagens para: {self.output_dir} ({self.max_workers} downloads simultâneos)")
         print("-" * 70)
         
-        for image_ref, node in unique_images.items():
-            node_id = node['id']
-            image_url = image_urls.get(node_id)
-            
-            if not image_url:
-                print(f"✗ {node['name']} (ID: {node_id}) - URL não encontrada")
-                failed += 1
-                continue
-            
-            # Gerar nome do arquivo
-            # Usar o nome do nó, sanitizado, ou o imageRef como fallback
-            node_name = node['name'].lower().replace(' ', '_')
-            # Remover caracteres inválidos
-            node_name = ''.join(c for c in node_name if c.isalnum() or c in ('_', '-'))
-            
-            # Determinar extensão (PNG por padrão)
-            extension = 'png'
-            if 'jpg' in node_name or 'jpeg' in node_name:
-                extension = 'jpg'
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for image_ref, node in pending.items():
+                image_url = image_urls.get(node['id'])
+                if not image_url:
+                    print(f"✗ {node['name']} (ID: {node['id']}) - URL não encontrada")
+                    failed += 1
+                    continue
+                filepath = self.output_dir / self.build_filename(node)
+                futures[pool.submit(self.download_image, image_url, filepath)] = (node, filepath)
             
-            filename = f"{node_name}_{image_ref[:8]}.{extension}"
-            filepath = self.output_dir / filename
-            
-            # Baixar imagem com retry
-            print(f"[{downloaded + failed + 1}/{len(unique_images)}] {node['name']}...", end=' ')
-            
-            success = False
-            for retry in range(3):
-                if self.download_image(image_url, filepath):
-                    size_kb = filepath.stat().st_size / 1024
-                    print(f"✓ ({size_kb:.1f} KB)")
-                    downloaded += 1
-                    downloaded_files.append({
-                        'name': node['name'],
-                        'filename': filename,
-                        'path': str(filepath),
-                        'size_kb': round(size_kb, 2),
-                        'node_id': node_id,
-                        'image_ref': image_ref
-                    })
-                    success = True
-                    break
-                elif retry < 2:
-                    print(f"⚠ Tentando novamente...", end=' ')
-                    time.sleep(5)
-            
-            if not success:
-                print(f"✗")
-                failed += 1
-            
-            # Delay entre downloads
-            if downloaded + failed < len(unique_images):
-                time.sleep(1)
+            for future in as_completed(futures):
+                node, filepath = futures[future]
+                if not future.result():
+                    print(f"✗ {node['name']}")
+                    failed += 1
+                    continue
+                size_kb = filepath.stat().st_size / 1024
+                downloaded += 1
+                print(f"[{downloaded + failed}/{len(pending)}] {node['name']} ✓ ({size_kb:.1f} KB)")
+                images.append({
+                    'name': node['name'],
+                    'filename': filepath.name,
+                    'path': str(filepath),
+                    'size_kb': round(size_kb, 2),
+                    'node_id': node['id'],
+                    'image_ref': node['imageRef']
+                })
         
         # Salvar metadados se solicitado
         if save_metadata:
             metadata_path = self.output_dir / 'metadata.json'
             metadata = {
                 'file_key': self.file_key,
-                'total_images': len(image_nodes),
+                'total_images': total_nodes,
                 'unique_images': len(unique_images),
                 'downloaded': downloaded,
                 'failed': failed,
-                'images': downloaded_files
+                'images': sorted(images, key=lambda image: image['filename'])
             }
             
             with open(metadata_path, 'w', encoding='utf-8') as f:
@@ -360,8 +491,9 @@ class FigmaImageDownloader:
         result = {
             'total': len(unique_images),
             'downloaded': downloaded,
+            'skipped': len(unique_images) - len(pending),
             'failed': failed,
-            'images': downloaded_files
+            'images': images
         }
         
         print("\n" + "=" * 70)
@@ -369,19 +501,22 @@ class FigmaImageDownloader:
         print("=" * 70)
         print(f"Total de imagens: {result['total']}")
         print(f"✓ Baixadas: {result['downloaded']}")
+        print(f"↷ Já existentes: {result['skipped']}")
         print(f"✗ Falhas: {result['failed']}")
+        print(f"Tempo: {time.monotonic() - start:.1f}s")
         print("=" * 70)
         
         return result
 
 
-def download_figma_images(file_key: str, output_dir: str = None) -> Dict:
+def download_figma_images(file_key: str, output_dir: str = None, max_workers: int = 8) -> Dict:
     """
     Função auxiliar para facilitar o uso.
     
     Args:
         file_key: Chave do arquivo Figma
         output_dir: Diretório onde salvar as imagens (opcional)
+        max_workers: Downloads simultâneos
     
     Returns:
         Dicionário com estatísticas do download
@@ -392,6 +527,6 @@ def download_figma_images(file_key: str, output_dir: str = None) -> Dict:
         result = download_figma_images("bGtm8mc5RnpGntMspMA70K")
         print(f"Baixadas {result['downloaded']} imagens")
     """
-    downloader = FigmaImageDownloader(file_key, output_dir)
+    downloader = FigmaImageDownloader(file_key, output_dir, max_workers=max_workers)
     return downloader.download_all_images()
 
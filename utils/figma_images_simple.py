@@ -1,18 +1,22 @@
 """
-Versão simplificada que baixa uma imagem por vez com delays maiores.
-Use este se a versão principal estiver com problemas de rate limit.
+Versão simplificada: baixa uma lista fixa de nós conhecidos, com nomes de arquivo definidos.
+
+Usa o mesmo limitador (Retry-After/token bucket) e os downloads em streaming
+do `FigmaImageDownloader`, então não precisa de pausas fixas.
 """
 
 import os
-import requests
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from django.conf import settings
 
+from utils.figma_images import FigmaImageDownloader
+
 
-def download_figma_images_simple(file_key: str, output_dir: str = None):
+def download_figma_images_simple(file_key: str, output_dir: str = None, max_workers: int = 4,
+                                 base_url: str = None):
     """
-    Versão simplificada que baixa uma imagem por vez.
+    Versão simplificada que baixa os nós conhecidos que ainda não estão no disco.
     """
     token = os.environ.get('FIGMA_TOKEN')
     if not token:
@@ -26,7 +30,7 @@ def download_figma_images_simple(file_key: str, output_dir: str = None):
     
     output_path.mkdir(parents=True, exist_ok=True)
     
-    headers = {"X-Figma-Token": token}
+    downloader = FigmaImageDownloader(file_key, output_path, max_workers=max_workers, base_url=base_url, token=token)
     
     # Lista de node IDs conhecidos do seu arquivo
     nodes = [
@@ -45,61 +49,25 @@ def download_figma_images_simple(file_key: str, output_dir: str = None):
         ("104:25", "profile-1.png"),
     ]
     
-    print(f"Baixando {len(nodes)} imagens...")
-    print("Aguardando 60 segundos inicialmente para resetar rate limit...")
-    time.sleep(60)
+    pending = [(node_id, filename) for node_id, filename in nodes if not (output_path / filename).exists()]
+    downloaded = len(nodes) - len(pending)
+    print(f"Baixando {len(pending)} imagens ({downloaded} já existem)...")
     
-    downloaded = 0
+    # Uma única requisição resolve as URLs de todos os nós pendentes
+    image_urls = downloader.get_image_urls([node_id for node_id, _ in pending]) if pending else {}
     
-    for i, (node_id, filename) in enumerate(nodes, 1):
-        filepath = output_path / filename
-        
-        if filepath.exists():
-            print(f"[{i}/{len(nodes)}] ✓ {filename} já existe")
-            downloaded += 1
-            continue
-        
-        print(f"[{i}/{len(nodes)}] {filename}...", end=' ')
-        
-        # Tentar até 3 vezes
-        for attempt in range(3):
-            try:
-                # Obter URL
-                url = f"https://api.figma.com/v1/images/{file_key}?ids={node_id}&format=png"
-                r = requests.get(url, headers=headers, timeout=30)
-                
-                if r.status_code == 200:
-                    image_url = r.json().get('images', {}).get(node_id)
-                    if image_url:
-                        # Baixar imagem
-                        img_r = requests.get(image_url, timeout=30)
-                        if img_r.status_code == 200:
-                            with open(filepath, 'wb') as f:
-                                f.write(img_r.content)
-                            size_kb = len(img_r.content) / 1024
-                            print(f"✓ ({size_kb:.1f} KB)")
-                            downloaded += 1
-                            break
-                elif r.status_code == 429:
-                    wait = 60 if attempt == 0 else 90
-                    print(f"⚠ Rate limit - aguardando {wait}s...", end=' ')
-                    time.sleep(wait)
-                    continue
-                else:
-                    print(f"✗ Erro {r.status_code}")
-                    break
-            except Exception as e:
-                if attempt < 2:
-                    time.sleep(30)
-                    continue
-                else:
-                    print(f"✗ Erro")
-                    break
-        
-        # Delay entre imagens
-        if i < len(nodes):
-            time.sleep(5)
+    def download(item):
+        node_id, filename = item
+        image_url = image_urls.get(node_id)
+        if not image_url:
+            print(f"✗ {filename} - URL não encontrada")
+            return False
+        ok = downloader.download_image(image_url, output_path / filename)
+        print(f"{'✓' if ok else '✗'} {filename}")
+        return ok
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        downloaded += sum(pool.map(download, pending))
     
     print(f"\n✓ Baixadas: {downloaded}/{len(nodes)}")
     return downloaded
-